@@ -0,0 +1,146 @@
+"""benchmark fact dedupe keys: hex SHA-256 column vs. natural composite key vs. 16-byte digest"""
+import argparse
+import hashlib
+import logging
+import random
+import sys
+import time
+from collections.abc import Callable, Sequence
+from datetime import date, timedelta
+
+from db_setup import get_connection
+
+logger = logging.getLogger(__name__)
+
+_FACT_COLUMNS = """
+    cik VARCHAR(10) NOT NULL,
+    accession_number VARCHAR(20) NOT NULL,
+    concept_id INTEGER NOT NULL,
+    unit VARCHAR(100) NOT NULL,
+    value DOUBLE PRECISION,
+    period_type VARCHAR(10) NOT NULL,
+    instant_date DATE,
+    start_date DATE,
+    end_date DATE,
+    filed_date DATE
+"""
+
+_COLUMNS = (
+    "cik, accession_number, concept_id, unit, value, period_type, "
+    "instant_date, start_date, end_date, filed_date"
+)
+
+_NATURAL_KEY = "cik, concept_id, unit, period_type, instant_date, start_date, end_date"
+
+# name -> (key column DDL, key column name or None, conflict target, row -> key)
+_VARIANTS: dict[str, tuple[str, str | None, str, Callable[[tuple], object] | None]] = {
+    "hex_sha256": (
+        "fact_hash VARCHAR(64) NOT NULL UNIQUE,", "fact_hash", "(fact_hash)",
+        lambda r: hashlib.sha256(_identity(r).encode("utf-8")).hexdigest(),
+    ),
+    "natural_key": (
+        f"UNIQUE NULLS NOT DISTINCT ({_NATURAL_KEY}),", None, f"({_NATURAL_KEY})", None,
+    ),
+    "digest16": (
+        "fact_key BYTEA NOT NULL UNIQUE,", "fact_key", "(fact_key)",
+        lambda r: hashlib.sha256(_identity(r).encode("utf-8")).digest()[:16],
+    ),
+}
+
+
+def _identity(r: tuple) -> str:
+    cik, _, concept_id, unit, _, period_type, instant, start, end, _ = r
+    return f"{cik}|{concept_id}|{unit}|{period_type}|{instant}|{start}|{end}"
+
+
+def _synthetic_facts(n: int, seed: int = 0) -> list[tuple]:
+    """Company Facts-shaped rows: few companies, many concepts, mostly durations."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        cik = f"{rng.randrange(500):010d}"
+        end = date(2010, 3, 31) + timedelta(days=91 * rng.randrange(60))
+        instant = rng.random() < 0.3
+        start = None if instant else end - timedelta(days=rng.choice((90, 364)))
+        filed = end + timedelta(days=40)
+        rows.append((
+            cik, f"{cik}-{filed.year % 100:02d}-{i % 1_000_000:06d}",
+            rng.randrange(3000), rng.choice(("USD", "shares", "USD/shares")),
+            rng.random() * 1e9, "instant" if instant else "duration",
+            end if instant else None, start, end, filed,
+        ))
+    return rows
+
+
+def _run_variant(conn, name: str, rows: list[tuple]) -> dict[str, float]:
+    key_ddl, key_col, conflict, key_fn = _VARIANTS[name]
+    table = f"bench_{name}"
+    cols = f"{key_col}, {_COLUMNS}" if key_col else _COLUMNS
+    with conn.cursor() as cur:
+        cur.execute(f"DROP TABLE IF EXISTS {table}")
+        cur.execute(f"CREATE TEMP TABLE {table} (id BIGSERIAL PRIMARY KEY, {key_ddl} {_FACT_COLUMNS})")
+    conn.commit()
+
+    started = time.perf_counter()
+    params = [(key_fn(r), *r) for r in rows] if key_fn else rows
+    key_s = time.perf_counter() - started
+
+    sql = (
+        f"INSERT INTO {table} ({cols}) VALUES ({', '.join(['%s'] * len(params[0]))}) "
+        f"ON CONFLICT {conflict} DO UPDATE SET value = EXCLUDED.value, "
+        f"accession_number = EXCLUDED.accession_number"
+    )
+    timings = {"key_build_s": key_s}
+    # first pass inserts, second pass takes the conflict path for every row
+    for label in ("insert_s", "reupsert_s"):
+        started = time.perf_counter()
+        with conn.cursor() as cur:
+            for i in range(0, len(params), 5000):
+                cur.executemany(sql, params[i : i + 5000])
+        conn.commit()
+        timings[label] = time.perf_counter() - started
+
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT pg_table_size(%s::regclass), pg_indexes_size(%s::regclass)", (table, table)
+        )
+        timings["table_mb"], timings["index_mb"] = (b / 2**20 for b in cur.fetchone())
+        cur.execute(f"DROP TABLE {table}")
+    conn.commit()
+    return timings
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    logging.basicConfig(level=logging.INFO)
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument(
+        "--facts",
+        type=int,
+        default=200_000,
+        help="Synthetic numerical facts to load per variant. Default = 200000",
+    )
+    ap.add_argument(
+        "--variant",
+        action="append",
+        choices=tuple(_VARIANTS),
+        help="Variant(s) to run. Defaults to all.",
+    )
+    args = ap.parse_args(argv)
+
+    rows = list({(r[0], r[2], r[3], r[5], r[6], r[7], r[8]): r for r in _synthetic_facts(args.facts)}.values())
+    logger.info(" Benchmarking %d distinct fact(s)", len(rows))
+
+    print(f"{'variant':<12} {'key_build_s':>11} {'insert_s':>9} {'reupsert_s':>10} {'table_mb':>9} {'index_mb':>9}")
+    with get_connection() as conn:
+        for name in args.variant or _VARIANTS:
+            t = _run_variant(conn, name, rows)
+            print(
+                f"{name:<12} {t['key_build_s']:>11.3f} {t['insert_s']:>9.2f} {t['reupsert_s']:>10.2f}"
+                f" {t['table_mb']:>9.1f} {t['index_mb']:>9.1f}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""benchmark fact indexes: EXPLAIN ANALYZE the query helpers under the legacy and shipped index sets"""
+import argparse
+import json
+import logging
+import sys
+import time
+from collections.abc import Sequence
+
+import screener
+from db_setup import get_connection
+from explain_pruning import helper_queries, plan_nodes
+
+logger = logging.getLogger(__name__)
+
+# the single-column fact indexes ddl.sql shipped before the covering ones
+_LEGACY_INDEXES = (
+    "CREATE INDEX idx_textual_by_company ON textual(cik)",
+    "CREATE INDEX idx_textual_by_accession ON textual(accession_number)",
+    "CREATE INDEX idx_textual_qname ON textual(qname)",
+    "CREATE INDEX idx_textual_end_date ON textual(end_date DESC) WHERE end_date IS NOT NULL",
+    "CREATE INDEX idx_textual_instant_date ON textual(instant_date DESC) WHERE instant_date IS NOT NULL",
+    "CREATE INDEX idx_textual_filing ON textual(cik, accession_number)",
+    "CREATE INDEX idx_numerical_by_company ON numerical(cik)",
+    "CREATE INDEX idx_numerical_by_accession ON numerical(accession_number)",
+    "CREATE INDEX idx_numerical_concept ON numerical(cik, concept_id)",
+    "CREATE INDEX idx_numerical_end_date ON numerical(end_date DESC) WHERE end_date IS NOT NULL",
+    "CREATE INDEX idx_numerical_instant_date ON numerical(instant_date DESC) WHERE instant_date IS NOT NULL",
+    "CREATE INDEX idx_numerical_filing ON numerical(cik, accession_number)",
+)
+
+_FACT_INDEXES_SQL = r"""
+SELECT indexname FROM pg_indexes
+ WHERE schemaname = current_schema()
+   AND tablename IN ('numerical', 'textual') AND indexname LIKE 'idx\_%'
+"""
+
+# companies with the most facts, so the plans run against realistic row counts
+_BUSIEST_SQL = """
+SELECT c.ticker, c.cik
+  FROM companies c
+  JOIN numerical f ON f.cik = c.cik
+ GROUP BY c.ticker, c.cik
+ ORDER BY COUNT(*) DESC
+ LIMIT %s
+"""
+
+_TICKER_SQL = "SELECT ticker, cik FROM companies WHERE ticker = ANY(%s::text[])"
+
+
+def _queries(companies: list[tuple[str, str]]) -> list[tuple[str, str, str, Sequence]]:
+    """(ticker, helper, sql, params) for every helper and company, plus one screen."""
+    out = [
+        (ticker, name, sql, params)
+        for ticker, cik in companies
+        for name, (sql, params) in helper_queries(ticker, cik).items()
+    ]
+    out.append(("*", "screen", screener._SCREEN_SQL, {
+        "metrics": ["revenue"], "tickers": None, "query_type": "annual",
+    }))
+    return out
+
+
+def _profile(conn, queries, repeat: int) -> list[dict]:
+    """best-of-`repeat` EXPLAIN ANALYZE of each query, with the plan it ran."""
+    results = []
+    with conn.cursor() as cur:
+        for ticker, name, sql, params in queries:
+            best = None
+            for _ in range(repeat):
+                cur.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", params)
+                plan = cur.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                if best is None or plan[0]["Execution Time"] < best["Execution Time"]:
+                    best = plan[0]
+            top = best["Plan"]
+            scans = sorted({
+                f"{n['Node Type']} using {n['Index Name']}" if "Index Name" in n else n["Node Type"]
+                for n in plan_nodes(top)
+                if (n.get("Relation Name") or n.get("Index Name", "")).startswith(("numerical", "textual"))
+                and n.get("Actual Loops", 0) > 0
+            })
+            results.append({
+                "ticker": ticker,
+                "helper": name,
+                "execution_ms": best["Execution Time"],
+                "buffers": top.get("Shared Hit Blocks", 0) + top.get("Shared Read Blocks", 0),
+                "heap_fetches": sum(n.get("Heap Fetches", 0) for n in plan_nodes(top)),
+                "scans": scans,
+                "plan": best,
+            })
+    return results
+
+
+def _with_legacy_indexes(conn, queries, repeat: int) -> list[dict]:
+    """profile with the legacy index set in place, rolled back afterwards."""
+    with conn.cursor() as cur:
+        cur.execute(_FACT_INDEXES_SQL)
+        for (name,) in cur.fetchall():
+            cur.execute(f'DROP INDEX "{name}"')
+        started = time.perf_counter()
+        for stmt in _LEGACY_INDEXES:
+            cur.execute(stmt)
+        cur.execute("ANALYZE numerical, textual")
+        logger.info(" Built legacy indexes in %.1fs", time.perf_counter() - started)
+    try:
+        return _profile(conn, queries, repeat)
+    finally:
+        conn.rollback()
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    logging.basicConfig(level=logging.INFO)
+
+    ap = argparse.ArgumentParser(
+        description="Holds exclusive locks on numerical and textual while the "
+                    "legacy indexes are in place; don't run it during a refresh.",
+    )
+    ap.add_argument(
+        "-t", "--ticker",
+        action="append",
+        dest="tickers",
+        metavar="SYMBOL",
+        help="Company to profile. May be repeated. Defaults to the --busiest companies.",
+    )
+    ap.add_argument(
+        "--busiest",
+        type=int,
+        default=5,
+        help="Profile the N companies with the most numerical facts. Default = 5",
+    )
+    ap.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Runs per query; the fastest is kept. Default = 3",
+    )
+    ap.add_argument(
+        "-o", "--out",
+        metavar="PATH",
+        help="Write every EXPLAIN ANALYZE plan, before and after, to this JSON file.",
+    )
+    args = ap.parse_args(argv)
+
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            if args.tickers:
+                cur.execute(_TICKER_SQL, ([t.upper() for t in args.tickers],))
+            else:
+                cur.execute(_BUSIEST_SQL, (args.busiest,))
+            companies = cur.fetchall()
+        conn.rollback()
+        if not companies:
+            ap.error("No matching companies in the database.")
+        queries = _queries(companies)
+
+        logger.info(" Profiling %d quer(ies) across %d compan(ies)", len(queries), len(companies))
+        runs = {
+            "legacy": _with_legacy_indexes(conn, queries, args.repeat),
+            "shipped": _profile(conn, queries, args.repeat),
+        }
+        conn.rollback()
+
+    print(f"{'variant':<8} {'ticker':<6} {'helper':<24} {'exec_ms':>9} {'buffers':>8} {'heap':>6}  scans")
+    for variant, results in runs.items():
+        for r in results:
+            print(
+                f"{variant:<8} {r['ticker']:<6} {r['helper']:<24} {r['execution_ms']:>9.2f}"
+                f" {r['buffers']:>8} {r['heap_fetches']:>6}  {'; '.join(r['scans']) or '-'}"
+            )
+    print()
+    for variant, results in runs.items():
+        print(f"{variant}: {sum(r['execution_ms'] for r in results):.1f} ms total")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(runs, fh, indent=2, default=str)
+        logger.info(" Wrote plans to %s", args.out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
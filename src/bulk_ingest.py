@@ -0,0 +1,194 @@
+"""CLI entry point for loading SEC's nightly companyfacts.zip bulk archive into the database."""
+import argparse
+import json
+import logging
+import re
+import sys
+import zipfile
+from collections.abc import Sequence
+
+from db_setup import get_connection
+from models import SECFilingParserError
+from parser import SECFilingParser
+from store import store_numerical_facts_bulk
+from ticker_loader import TickerLoadError, load_tickers_from_file
+from scrape_textual import open_parser
+from splits import refresh_split_factors
+from resolved import rebuild_resolved_metrics
+
+logger = logging.getLogger(__name__)
+
+COMPANYFACTS_ARCHIVE = "companyfacts"
+
+# one document per company; submissions.zip also holds paged
+# CIK##########-submissions-###.json overflow members, which are skipped.
+_CIK_MEMBER = re.compile(r"^CIK(\d{10})\.json$")
+
+
+def load_submission_tickers(path: str) -> dict[str, str]:
+    """cik -> primary ticker, read from a local submissions.zip (no HTTP)."""
+    cik_to_ticker: dict[str, str] = {}
+    with zipfile.ZipFile(path) as zf:
+        for info in zf.infolist():
+            m = _CIK_MEMBER.match(info.filename)
+            if not m:
+                continue
+            with zf.open(info) as fh:
+                meta = json.load(fh)
+            tickers = meta.get("tickers") if isinstance(meta, dict) else None
+            if tickers:
+                cik_to_ticker[m.group(1)] = str(tickers[0]).upper()
+    logger.info(" Loaded %d ticker(s) from %s", len(cik_to_ticker), path)
+    return cik_to_ticker
+
+
+def _cik_to_ticker(parser: SECFilingParser, submissions_path: str | None) -> dict[str, str]:
+    if submissions_path:
+        return load_submission_tickers(submissions_path)
+    return parser._get_cik_to_ticker()
+
+
+def _stored_crcs(conn, archive: str) -> dict[str, int]:
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT member, crc FROM bulk_archive_members WHERE archive = %s",
+            (archive,),
+        )
+        return dict(cur.fetchall())
+
+
+def _record_crc(conn, archive: str, member: str, crc: int) -> None:
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO bulk_archive_members (archive, member, crc) VALUES (%s, %s, %s)
+            ON CONFLICT (archive, member) DO UPDATE SET crc = EXCLUDED.crc, ingested_at = now()
+            """,
+            (archive, member, crc),
+        )
+
+
+def ingest_companyfacts_archive(
+    path: str,
+    tickers: Sequence[str] | None = None,
+    submissions_path: str | None = None,
+    force: bool = False,
+) -> tuple[int, int]:
+    """
+    stream every CIK member of a locally downloaded companyfacts.zip through
+    the same fact building and bulk store path as the per-ticker ingest.
+    members whose CRC matches the last successful ingest are skipped unless
+    `force` is set. `tickers` limits the run to those companies; otherwise
+    every CIK with a known ticker is loaded. tickers come from
+    `submissions_path` (a submissions.zip) when given, else from one
+    company_tickers.json request.
+    """
+    total_upserted = total_failed = skipped = 0
+    with get_connection() as conn:
+        with open_parser(conn) as parser:
+            cik_to_ticker = _cik_to_ticker(parser, submissions_path)
+            if tickers:
+                by_ticker = {t: c for c, t in cik_to_ticker.items()}
+                wanted: set[str] = set()
+                for t in tickers:
+                    try:
+                        wanted.add(by_ticker.get(t.upper()) or parser._get_cik(t))
+                    except SECFilingParserError:
+                        print(f"[{t}] not found in SEC EDGAR. skipping.")
+                cik_to_ticker = {c: t for c, t in cik_to_ticker.items() if c in wanted}
+
+            known = {} if force else _stored_crcs(conn, COMPANYFACTS_ARCHIVE)
+
+            with zipfile.ZipFile(path) as zf:
+                for info in zf.infolist():
+                    m = _CIK_MEMBER.match(info.filename)
+                    if not m or m.group(1) not in cik_to_ticker:
+                        continue
+                    if known.get(info.filename) == info.CRC:
+                        skipped += 1
+                        continue
+
+                    cik = m.group(1)
+                    ticker = cik_to_ticker[cik]
+                    with zf.open(info) as fh:
+                        raw = json.load(fh)
+                    if not isinstance(raw, dict) or not isinstance(raw.get("facts"), dict):
+                        logger.warning(" Unexpected company facts member %s — skipping", info.filename)
+                        continue
+
+                    facts = parser.build_numerical_facts(ticker, cik, raw)
+                    upserted, failed = store_numerical_facts_bulk(conn, facts)
+                    if upserted:
+                        refresh_split_factors(conn, cik)
+                        rebuild_resolved_metrics(conn, cik)
+                    # only remember the CRC once the member fully landed, so
+                    # partial failures are retried on the next run.
+                    if failed == 0:
+                        _record_crc(conn, COMPANYFACTS_ARCHIVE, info.filename, info.CRC)
+                    conn.commit()
+
+                    total_upserted += upserted
+                    total_failed += failed
+                    print(f"[{ticker}] upserted={upserted} failed={failed}")
+
+    logger.info(" Skipped %d unchanged archive member(s)", skipped)
+    return total_upserted, total_failed
+
+def main(argv: Sequence[str] | None = None) -> int:
+    logging.basicConfig(level=logging.INFO)
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument(
+        "archive",
+        help="Path to a locally downloaded companyfacts.zip.",
+    )
+    ap.add_argument(
+        "tickers",
+        nargs="*",
+        help="Ticker symbols passed inline. Defaults to every company in the archive.",
+    )
+    ap.add_argument(
+        "-f", "--file",
+        action="append",
+        dest="files",
+        metavar="PATH",
+        default=[],
+        help="Path to a text file with one ticker per line. May be repeated.",
+    )
+    ap.add_argument(
+        "--submissions",
+        metavar="PATH",
+        default=None,
+        help="Path to submissions.zip, used to map CIKs to tickers without any HTTP.",
+    )
+    ap.add_argument(
+        "--force",
+        action="store_true",
+        help="Reload every member, even those whose CRC is unchanged since the last run.",
+    )
+    args = ap.parse_args(argv)
+
+    try:
+        results: list[str] = []
+
+        if args.tickers:
+            results.extend(t.strip().upper() for t in args.tickers if t)
+
+        if args.files:
+            for fp in args.files:
+                results.extend(load_tickers_from_file(fp))
+
+        tickers = list(set(results))
+    except TickerLoadError as e:
+        ap.error(str(e))  # exits with status 2
+
+    total_upserted, total_failed = ingest_companyfacts_archive(
+        args.archive,
+        tickers=tickers or None,
+        submissions_path=args.submissions,
+        force=args.force,
+    )
+    print(f"\nDone. Total upserted: {total_upserted}, total failed: {total_failed}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -264,24 +264,22 @@ def _format_fact_rows(raw_rows, format_type: str = "currency") -> list[tuple]:
 
         # format numeric value
         try:
-            numeric = float(value) if not isinstance(value, (int, float)) else value
-
             if format_type == "percentage":
-                value_str = f"{numeric:.2f}%"
+                value_str = f"{value:.2f}%"
             elif format_type == "ratio":
-                value_str = f"{numeric:.2f}"
+                value_str = f"{value:.2f}"
             elif format_type == "number":
-                if abs(numeric) >= 1_000_000_000:
-                    value_str = f"{numeric / 1_000_000_000:.2f}B"
-                elif abs(numeric) >= 1_000_000:
-                    value_str = f"{numeric / 1_000_000:.2f}M"
-                elif abs(numeric) >= 1_000:
-                    value_str = f"{numeric / 1_000:.2f}K"
+                if abs(value) >= 1_000_000_000:
+                    value_str = f"{value / 1_000_000_000:.2f}B"
+                elif abs(value) >= 1_000_000:
+                    value_str = f"{value / 1_000_000:.2f}M"
+                elif abs(value) >= 1_000:
+                    value_str = f"{value / 1_000:.2f}K"
                 else:
-                    value_str = f"{numeric:,.0f}"
+                    value_str = f"{value:,.0f}"
             else:  # currency
-                sign = "-" if numeric < 0 else ""
-                abs_numeric = abs(numeric)
+                sign = "-" if value < 0 else ""
+                abs_numeric = abs(value)
                 if abs_numeric >= 1_000_000_000:
                     value_str = f"{sign}${abs_numeric / 1_000_000_000:.2f}B"
                 elif abs_numeric >= 1_000_000:
@@ -9,14 +9,37 @@ DEFAULT_FILING_TYPES = ("10-K", "10-Q")
 
 ARELLE_PLUGINS_PATH = os.getenv("ARELLE_PLUGINS_PATH", "")
 
+# local Arelle web cache for taxonomy schemas/linkbases; cached files are
+# trusted without rechecking so repeat filings never re-fetch them. unset
+# keeps Arelle's own per-user cache.
+ARELLE_CACHE_DIR = os.getenv("ARELLE_CACHE_DIR", "")
+# "|"-separated taxonomy package zips (e.g. us-gaap-2024.zip) to pre-populate
+# the taxonomy cache with
+ARELLE_TAXONOMY_PACKAGES = [
+    p for p in os.getenv("ARELLE_TAXONOMY_PACKAGES", "").split("|") if p
+]
+
 SEC_COMPANY_TICKERS_URL = "https://www.sec.gov/files/company_tickers.json"
 SEC_COMPANY_FACTS_URL = "https://data.sec.gov/api/xbrl/companyfacts/CIK{cik}.json"
+SEC_SUBMISSIONS_URL = "https://data.sec.gov/submissions/CIK{cik}.json"
+SEC_ARCHIVES_URL = "https://www.sec.gov/Archives/edgar/data/{cik}/{accession}/"
+
+# how long the persisted ticker-to-cik map is trusted before re-downloading
+SEC_TICKER_MAP_TTL_HOURS = float(os.getenv("SEC_TICKER_MAP_TTL_HOURS", "24"))
+
+# on-disk ETag/Last-Modified cache for SEC JSON endpoints; unset disables it
+SEC_HTTP_CACHE_DIR = os.getenv("SEC_HTTP_CACHE_DIR", "")
+SEC_HTTP_CACHE_MAX_MB = int(os.getenv("SEC_HTTP_CACHE_MAX_MB", "1024"))
 
 DB_HOST = os.getenv("DB_HOST")
 DB_PORT = os.getenv("DB_PORT")
 DB_NAME = os.getenv("DB_NAME")
 DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
+# process-wide connection pool bounds; DB_POOL_MAX must cover the pipelined
+# ingest's writer connections plus the ingest's own
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
 def db_kwargs() -> dict[str, Any]:
     """connection kwargs for psycopg.connect(**db_kwargs())."""
     return {
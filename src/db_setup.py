@@ -1,17 +1,77 @@
 """handles core database activities: database creation, setup, and connections management"""
+import atexit
 import logging
 import os
 import sys
+import threading
 from contextlib import contextmanager
-from typing import cast
+from typing import Any, cast
 
 import psycopg
 from psycopg import Error, sql
 from psycopg.abc import Query
+from psycopg_pool import ConnectionPool
 import config
 
 logger = logging.getLogger(__name__)
 
+# ddl.sql's fact keys are UNIQUE NULLS NOT DISTINCT, new in PostgreSQL 15
+MIN_SERVER_VERSION = 150000
+
+_pool: ConnectionPool | None = None
+_pool_lock = threading.Lock()
+
+class _PooledConnection(psycopg.Connection):
+    """
+    psycopg leaves pool-owned connections open on `with` exit, expecting
+    pool.connection(); close (i.e. return) them so `with get_connection()`
+    keeps working.
+    """
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        super().__exit__(exc_type, exc_val, exc_tb)
+        self.close()
+
+def _reset_connection(conn: psycopg.Connection) -> None:
+    """undo per-caller session tweaks before a connection goes back in the pool."""
+    conn.autocommit = False
+    conn.read_only = None
+
+def get_pool() -> ConnectionPool:
+    """the process-wide pool for the configured database, opened on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(
+                kwargs=config.db_kwargs(),
+                connection_class=_PooledConnection,
+                min_size=config.DB_POOL_MIN,
+                max_size=max(config.DB_POOL_MAX, config.DB_POOL_MIN),
+                # conn.close() (including `with get_connection() as conn`) hands
+                # the connection back instead of closing it
+                close_returns=True,
+                reset=_reset_connection,
+                check=ConnectionPool.check_connection,
+                name="cheesecloth",
+                open=True,
+            )
+        return _pool
+
+def close_pool() -> None:
+    """close every pooled connection; the next get_connection() opens a new pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+atexit.register(close_pool)
+
+def pool_stats() -> dict[str, Any]:
+    """psycopg_pool counters (pool_size, pool_available, requests_num, ...), or {} if unopened."""
+    with _pool_lock:
+        return _pool.get_stats() if _pool is not None else {}
+
 @contextmanager
 def get_cursor(write: bool = True):
     conn = None
@@ -22,6 +82,8 @@ def get_cursor(write: bool = True):
         yield cursor
         if write:
             conn.commit()
+        else:
+            conn.rollback()  # end the read transaction before the pool sees it
     except Exception:
         if conn:
             conn.rollback()
@@ -39,6 +101,23 @@ def get_connection(
     user: str | None = None,
     password: str | None = None,
 ) -> psycopg.Connection:
+    """
+    a connection to the configured database, drawn from the shared pool;
+    close it (or leave its `with` block) to return it. passing any
+    parameter bypasses the pool with a dedicated connection, e.g. to reach
+    the postgres maintenance database.
+    """
+    if not any((host, port, dbname, user, password)):
+        try:
+            return get_pool().getconn()
+        except Error as e:
+            defaults = config.db_kwargs()
+            logger.error(
+                "Connection error (db=%s, host=%s, port=%s, user=%s): %s",
+                defaults["dbname"], defaults["host"], defaults["port"], defaults["user"], e,
+            )
+            raise
+
     defaults = config.db_kwargs()
     kwargs = {
         "host": host or defaults["host"],
@@ -93,6 +172,12 @@ def init_schema() -> tuple[int, str]:
 
         conn = get_connection()
         try:
+            version = conn.info.server_version
+            if version < MIN_SERVER_VERSION:
+                return (1, (
+                    f"cheesecloth needs PostgreSQL {MIN_SERVER_VERSION // 10000} or newer; "
+                    f"the server is version {version // 10000}."
+                ))
             conn.autocommit = True
             with conn.cursor() as cursor:
                 cursor.execute(cast(Query, ddl_sql))
@@ -128,6 +213,7 @@ def setup_database() -> int:
 def reset_database() -> bool:
     """drops ALL tables and recreate. warning: deletes all data."""
     try:
+        close_pool()  # pooled sessions would block the DROP
         conn = get_connection(dbname="postgres")
         conn.autocommit = True
         with conn.cursor() as cursor:
@@ -2,19 +2,36 @@ CREATE TABLE IF NOT EXISTS companies (
     cik VARCHAR(10) PRIMARY KEY
       CHECK (cik ~ '^[0-9]{10}$'),
     ticker VARCHAR(10) NOT NULL UNIQUE,
-    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    facts_filed_through DATE,  -- incremental Company Facts sync watermark
+    split_ref_digest TEXT      -- md5 of the share-count rows split_factors was built from
 );
 
 CREATE TABLE IF NOT EXISTS filings (
     cik VARCHAR(10) NOT NULL REFERENCES companies(cik) ON DELETE CASCADE,
     accession_number VARCHAR(20) NOT NULL
       CHECK (accession_number ~ '^[0-9]{10}-[0-9]{2}-[0-9]{6}$'),
+    form_type VARCHAR(16),
+    filed_date DATE,
+    entry_file TEXT,
+    -- textual ingest manifest: only 'stored' filings are skipped on later runs
+    ingest_state VARCHAR(8) NOT NULL DEFAULT 'pending'
+      CHECK (ingest_state IN ('pending', 'parsing', 'stored', 'failed')),
+    fact_count INTEGER,
+    failed_count INTEGER,
+    byte_size BIGINT,
+    parse_ms INTEGER,
+    store_ms INTEGER,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
     CONSTRAINT filing_key PRIMARY KEY (cik, accession_number)
 );
 
+-- numerical and textual are hash-partitioned on cik (partitions are created
+-- below the migrations), so every per-company query touches one partition.
+-- unique keys must therefore include cik.
 CREATE TABLE IF NOT EXISTS textual (
-    id BIGSERIAL PRIMARY KEY,
-    fact_hash VARCHAR(64) NOT NULL UNIQUE,
+    id BIGSERIAL,
+    fact_key BYTEA NOT NULL,  -- 16-byte digest, see store.compute_textual_fact_key
     cik VARCHAR(10) NOT NULL,
     accession_number VARCHAR(20) NOT NULL,
     qname VARCHAR(300) NOT NULL,
@@ -26,21 +43,30 @@ CREATE TABLE IF NOT EXISTS textual (
     start_date DATE,
     end_date DATE,
     dimensions JSONB NOT NULL DEFAULT '{}',
+    CONSTRAINT textual_pkey PRIMARY KEY (cik, id),
+    CONSTRAINT textual_fact_key UNIQUE (cik, fact_key),
     CONSTRAINT fk_textual_filing
       FOREIGN KEY (cik, accession_number)
       REFERENCES filings(cik, accession_number)
       ON DELETE CASCADE
+) PARTITION BY HASH (cik);
+
+-- dictionary of Company Facts concepts; numerical rows reference it by id
+CREATE TABLE IF NOT EXISTS concepts (
+    id SERIAL PRIMARY KEY,
+    taxonomy VARCHAR(64) NOT NULL,
+    fname VARCHAR(256) NOT NULL,
+    qname VARCHAR(321) GENERATED ALWAYS AS (taxonomy || ':' || fname) STORED,
+    CONSTRAINT concept_key UNIQUE (taxonomy, fname)
 );
 
 CREATE TABLE IF NOT EXISTS numerical (
-    id BIGSERIAL PRIMARY KEY,
-    fact_hash VARCHAR(64) NOT NULL UNIQUE,
+    id BIGSERIAL,
     cik VARCHAR(10) NOT NULL,
     accession_number VARCHAR(20) NOT NULL,
-    taxonomy VARCHAR(64) NOT NULL,
-    fname VARCHAR(256) NOT NULL,
+    concept_id INTEGER NOT NULL REFERENCES concepts(id),
     unit VARCHAR(100) NOT NULL,
-    value TEXT,
+    value DOUBLE PRECISION,
     period_type VARCHAR(10) NOT NULL,
     instant_date DATE,
     start_date DATE,
@@ -49,11 +75,15 @@ CREATE TABLE IF NOT EXISTS numerical (
     fiscal_period VARCHAR(2),
     form VARCHAR(20),
     filed_date DATE,
+    CONSTRAINT numerical_pkey PRIMARY KEY (cik, id),
+    -- one row per reported fact; unset dates still compare equal
+    CONSTRAINT numerical_fact_key UNIQUE NULLS NOT DISTINCT
+      (cik, concept_id, unit, period_type, instant_date, start_date, end_date),
     CONSTRAINT fk_numerical_filing
       FOREIGN KEY (cik, accession_number)
       REFERENCES filings(cik, accession_number)
       ON DELETE CASCADE
-);
+) PARTITION BY HASH (cik);
 
 CREATE TABLE IF NOT EXISTS metrics (
     key VARCHAR(64) PRIMARY KEY,
@@ -72,20 +102,293 @@ CREATE TABLE IF NOT EXISTS metric_mappings (
     CONSTRAINT metric_mapping_key PRIMARY KEY (cik, metric_key, qname)
 );
 
+-- per-filing stock-split factor onto the latest filing's basis (see splits.py);
+-- filings without a row are on that basis already (factor 1.0)
+CREATE TABLE IF NOT EXISTS split_factors (
+    cik VARCHAR(10) NOT NULL,
+    accession_number VARCHAR(20) NOT NULL,
+    factor DOUBLE PRECISION NOT NULL,
+    CONSTRAINT split_factor_key PRIMARY KEY (cik, accession_number),
+    CONSTRAINT fk_split_factor_filing
+      FOREIGN KEY (cik, accession_number)
+      REFERENCES filings(cik, accession_number)
+      ON DELETE CASCADE
+);
+
+-- numeric metric series exactly as query.resolve() ranks them, one per
+-- query_type and in its row order (see resolved.py). split factors are
+-- joined at read time, so rebuilding split_factors never stales these.
+CREATE TABLE IF NOT EXISTS resolved_metrics (
+    cik VARCHAR(10) NOT NULL,
+    metric_key VARCHAR(64) NOT NULL REFERENCES metrics(key) ON DELETE CASCADE,
+    query_type VARCHAR(10) NOT NULL
+      CHECK (query_type IN ('annual', 'quarterly', 'all')),
+    ordinal INTEGER NOT NULL,
+    local_name VARCHAR(256) NOT NULL,
+    period_type VARCHAR(10) NOT NULL,
+    value DOUBLE PRECISION,
+    instant_date DATE,
+    start_date DATE,
+    end_date DATE,
+    unit VARCHAR(100),
+    accession_number VARCHAR(20) NOT NULL,
+    CONSTRAINT resolved_metric_key PRIMARY KEY (cik, metric_key, query_type, ordinal),
+    CONSTRAINT fk_resolved_metric_filing
+      FOREIGN KEY (cik, accession_number)
+      REFERENCES filings(cik, accession_number)
+      ON DELETE CASCADE
+);
+
+-- a row means (cik, metric_key)'s series is materialized for every
+-- query_type, even if it is empty; without one, readers compute it live
+CREATE TABLE IF NOT EXISTS resolved_metric_state (
+    cik VARCHAR(10) NOT NULL REFERENCES companies(cik) ON DELETE CASCADE,
+    metric_key VARCHAR(64) NOT NULL REFERENCES metrics(key) ON DELETE CASCADE,
+    built_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    CONSTRAINT resolved_metric_state_key PRIMARY KEY (cik, metric_key)
+);
+
+-- persisted copy of SEC's company_tickers.json; rank is its position in the file
+CREATE TABLE IF NOT EXISTS sec_tickers (
+    ticker VARCHAR(16) PRIMARY KEY,
+    cik VARCHAR(10) NOT NULL
+      CHECK (cik ~ '^[0-9]{10}$'),
+    rank INTEGER NOT NULL,
+    fetched_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- CRC of each nightly bulk archive member as of its last successful ingest
+CREATE TABLE IF NOT EXISTS bulk_archive_members (
+    archive VARCHAR(32) NOT NULL,
+    member VARCHAR(64) NOT NULL,
+    crc BIGINT NOT NULL,
+    ingested_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    CONSTRAINT bulk_archive_member_key PRIMARY KEY (archive, member)
+);
+
+-- one row per universe refresh; finished_at stays NULL until every ticker was attempted
+CREATE TABLE IF NOT EXISTS refresh_runs (
+    id BIGSERIAL PRIMARY KEY,
+    universe VARCHAR(64) NOT NULL,
+    tickers TEXT[] NOT NULL,
+    started_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    finished_at TIMESTAMPTZ
+);
+
+-- latest refresh outcome per ticker; attempts counts consecutive failures
+CREATE TABLE IF NOT EXISTS refresh_checkpoints (
+    ticker VARCHAR(16) PRIMARY KEY,
+    last_success TIMESTAMPTZ,
+    last_error TEXT,
+    last_error_at TIMESTAMPTZ,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    run_id BIGINT REFERENCES refresh_runs(id) ON DELETE SET NULL
+);
+
+-- Migrations for databases created before a column existed
+ALTER TABLE companies ADD COLUMN IF NOT EXISTS facts_filed_through DATE;
+ALTER TABLE companies ADD COLUMN IF NOT EXISTS split_ref_digest TEXT;
+ALTER TABLE filings ADD COLUMN IF NOT EXISTS entry_file TEXT;
+ALTER TABLE filings ADD COLUMN IF NOT EXISTS form_type VARCHAR(16);
+ALTER TABLE filings ADD COLUMN IF NOT EXISTS filed_date DATE;
+ALTER TABLE filings ADD COLUMN IF NOT EXISTS fact_count INTEGER;
+ALTER TABLE filings ADD COLUMN IF NOT EXISTS failed_count INTEGER;
+ALTER TABLE filings ADD COLUMN IF NOT EXISTS byte_size BIGINT;
+ALTER TABLE filings ADD COLUMN IF NOT EXISTS parse_ms INTEGER;
+ALTER TABLE filings ADD COLUMN IF NOT EXISTS store_ms INTEGER;
+ALTER TABLE filings ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now();
+
+-- filings that already have textual facts were ingested before the manifest
+-- existed; everything else (e.g. rows created by the numerical ingest) is pending
+DO $$
+BEGIN
+  IF NOT EXISTS (
+    SELECT 1 FROM information_schema.columns
+     WHERE table_schema = current_schema()
+       AND table_name = 'filings' AND column_name = 'ingest_state'
+  ) THEN
+    ALTER TABLE filings ADD COLUMN ingest_state VARCHAR(8) NOT NULL DEFAULT 'pending'
+      CHECK (ingest_state IN ('pending', 'parsing', 'stored', 'failed'));
+    UPDATE filings f SET ingest_state = 'stored'
+     WHERE EXISTS (
+       SELECT 1 FROM textual t
+        WHERE t.cik = f.cik AND t.accession_number = f.accession_number
+     );
+  END IF;
+END $$;
+
+-- numerical rows used to carry taxonomy/fname strings and a TEXT value. move
+-- the names into concepts first, then drop them, so the value retype that
+-- follows rewrites the table once without the old columns.
+DO $$
+BEGIN
+  IF EXISTS (
+    SELECT 1 FROM information_schema.columns
+     WHERE table_schema = current_schema()
+       AND table_name = 'numerical' AND column_name = 'fname'
+  ) THEN
+    INSERT INTO concepts (taxonomy, fname)
+      SELECT DISTINCT taxonomy, fname FROM numerical
+      ON CONFLICT (taxonomy, fname) DO NOTHING;
+    ALTER TABLE numerical ADD COLUMN concept_id INTEGER;
+    UPDATE numerical n SET concept_id = k.id
+      FROM concepts k
+     WHERE k.taxonomy = n.taxonomy AND k.fname = n.fname;
+    ALTER TABLE numerical
+      ALTER COLUMN concept_id SET NOT NULL,
+      ADD CONSTRAINT numerical_concept_id_fkey
+        FOREIGN KEY (concept_id) REFERENCES concepts(id),
+      DROP COLUMN taxonomy,
+      DROP COLUMN fname;
+  END IF;
+
+  IF EXISTS (
+    SELECT 1 FROM information_schema.columns
+     WHERE table_schema = current_schema()
+       AND table_name = 'numerical' AND column_name = 'value' AND data_type = 'text'
+  ) THEN
+    ALTER TABLE numerical ALTER COLUMN value TYPE DOUBLE PRECISION
+      USING CASE WHEN value ~ '^[-+]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][-+]?[0-9]+)?$'
+                 THEN value::double precision END;
+  END IF;
+END $$;
+
+-- both fact tables used to dedupe on a 64-char hex SHA-256 (fact_hash).
+-- numerical now dedupes on the natural key that hash was computed from;
+-- textual keeps the digest's first 16 bytes as bytea, so existing keys map
+-- over unchanged.
+DO $$
+BEGIN
+  IF EXISTS (
+    SELECT 1 FROM information_schema.columns
+     WHERE table_schema = current_schema()
+       AND table_name = 'numerical' AND column_name = 'fact_hash'
+  ) THEN
+    ALTER TABLE numerical
+      ADD CONSTRAINT numerical_fact_key UNIQUE NULLS NOT DISTINCT
+        (cik, concept_id, unit, period_type, instant_date, start_date, end_date),
+      DROP COLUMN fact_hash;
+  END IF;
+
+  IF EXISTS (
+    SELECT 1 FROM information_schema.columns
+     WHERE table_schema = current_schema()
+       AND table_name = 'textual' AND column_name = 'fact_hash'
+  ) THEN
+    ALTER TABLE textual ADD COLUMN fact_key BYTEA;
+    UPDATE textual SET fact_key = decode(left(fact_hash, 32), 'hex');
+    ALTER TABLE textual
+      ALTER COLUMN fact_key SET NOT NULL,
+      ADD CONSTRAINT textual_fact_key_key UNIQUE (fact_key),
+      DROP COLUMN fact_hash;
+  END IF;
+END $$;
+
+-- convert numerical/textual from plain tables into the partitioned layout
+-- above: the old heap is set aside (its index names freed for the new
+-- table), an empty partitioned copy takes its place, and its rows are moved
+-- over once the partitions exist. partitions are created IF NOT EXISTS, so
+-- fresh databases get theirs here too.
+DO $$
+DECLARE
+  tbl TEXT;
+  idx TEXT;
+  con RECORD;
+BEGIN
+  FOREACH tbl IN ARRAY ARRAY['numerical', 'textual'] LOOP
+    IF (SELECT relkind FROM pg_class WHERE oid = to_regclass(tbl)) = 'r' THEN
+      EXECUTE format('ALTER TABLE %I RENAME TO %I', tbl, tbl || '_unpartitioned');
+      FOR con IN
+        SELECT conname FROM pg_constraint
+         WHERE conrelid = to_regclass(tbl || '_unpartitioned') AND contype IN ('p', 'u')
+      LOOP
+        EXECUTE format('ALTER TABLE %I RENAME CONSTRAINT %I TO %I',
+                       tbl || '_unpartitioned', con.conname, con.conname || '_unpartitioned');
+      END LOOP;
+      FOR idx IN
+        SELECT indexname FROM pg_indexes
+         WHERE schemaname = current_schema()
+           AND tablename = tbl || '_unpartitioned' AND indexname LIKE 'idx\_%'
+      LOOP
+        EXECUTE format('DROP INDEX %I', idx);
+      END LOOP;
+      EXECUTE format('ALTER SEQUENCE %I OWNED BY NONE', tbl || '_id_seq');
+      EXECUTE format(
+        'CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS) PARTITION BY HASH (cik)',
+        tbl, tbl || '_unpartitioned'
+      );
+    END IF;
+  END LOOP;
+
+  IF to_regclass('numerical_unpartitioned') IS NOT NULL THEN
+    ALTER TABLE numerical
+      ADD CONSTRAINT numerical_pkey PRIMARY KEY (cik, id),
+      ADD CONSTRAINT numerical_fact_key UNIQUE NULLS NOT DISTINCT
+        (cik, concept_id, unit, period_type, instant_date, start_date, end_date),
+      ADD CONSTRAINT fk_numerical_filing
+        FOREIGN KEY (cik, accession_number)
+        REFERENCES filings(cik, accession_number)
+        ON DELETE CASCADE,
+      ADD CONSTRAINT numerical_concept_id_fkey
+        FOREIGN KEY (concept_id) REFERENCES concepts(id);
+  END IF;
+  IF to_regclass('textual_unpartitioned') IS NOT NULL THEN
+    ALTER TABLE textual
+      ADD CONSTRAINT textual_pkey PRIMARY KEY (cik, id),
+      ADD CONSTRAINT textual_fact_key UNIQUE (cik, fact_key),
+      ADD CONSTRAINT fk_textual_filing
+        FOREIGN KEY (cik, accession_number)
+        REFERENCES filings(cik, accession_number)
+        ON DELETE CASCADE;
+  END IF;
+
+  FOREACH tbl IN ARRAY ARRAY['numerical', 'textual'] LOOP
+    FOR i IN 0..7 LOOP
+      EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES WITH (MODULUS 8, REMAINDER %s)',
+        tbl || '_p' || i, tbl, i
+      );
+    END LOOP;
+
+    IF to_regclass(tbl || '_unpartitioned') IS NOT NULL THEN
+      EXECUTE format('INSERT INTO %I SELECT * FROM %I', tbl, tbl || '_unpartitioned');
+      EXECUTE format('DROP TABLE %I', tbl || '_unpartitioned');
+      EXECUTE format('ALTER SEQUENCE %I OWNED BY %I.id', tbl || '_id_seq', tbl);
+    END IF;
+  END LOOP;
+END $$;
+
 -- Indexes
-CREATE INDEX IF NOT EXISTS idx_textual_by_company ON textual(cik);
-CREATE INDEX IF NOT EXISTS idx_textual_by_accession ON textual(accession_number);
-CREATE INDEX IF NOT EXISTS idx_textual_qname ON textual(qname);
-CREATE INDEX IF NOT EXISTS idx_textual_end_date ON textual(end_date DESC) WHERE end_date IS NOT NULL;
-CREATE INDEX IF NOT EXISTS idx_textual_instant_date ON textual(instant_date DESC) WHERE instant_date IS NOT NULL;
+-- fact indexes match the query shapes: every read is one company's rows for
+-- a set of concepts (query, screener, splits), and the numerical index
+-- includes every column those reads need so they can be index-only scans.
+-- (cik, accession_number) backs the ON DELETE CASCADE from filings. the
+-- single-column indexes of earlier schemas served no query.
+DROP INDEX IF EXISTS idx_textual_by_company;
+DROP INDEX IF EXISTS idx_textual_by_accession;
+DROP INDEX IF EXISTS idx_textual_qname;
+DROP INDEX IF EXISTS idx_textual_end_date;
+DROP INDEX IF EXISTS idx_textual_instant_date;
+DROP INDEX IF EXISTS idx_numerical_by_company;
+DROP INDEX IF EXISTS idx_numerical_by_accession;
+DROP INDEX IF EXISTS idx_numerical_concept;
+DROP INDEX IF EXISTS idx_numerical_end_date;
+DROP INDEX IF EXISTS idx_numerical_instant_date;
+
+CREATE INDEX IF NOT EXISTS idx_textual_company_qname ON textual(cik, qname);
 CREATE INDEX IF NOT EXISTS idx_textual_filing ON textual(cik, accession_number);
 
-CREATE INDEX IF NOT EXISTS idx_numerical_by_company ON numerical(cik);
-CREATE INDEX IF NOT EXISTS idx_numerical_by_accession ON numerical(accession_number);
-CREATE INDEX IF NOT EXISTS idx_numerical_qname ON numerical ((taxonomy || ':' || fname));
-CREATE INDEX IF NOT EXISTS idx_numerical_end_date ON numerical(end_date DESC) WHERE end_date IS NOT NULL;
-CREATE INDEX IF NOT EXISTS idx_numerical_instant_date ON numerical(instant_date DESC) WHERE instant_date IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_numerical_company_concept
+  ON numerical(cik, concept_id, end_date)
+  INCLUDE (value, unit, period_type, start_date, instant_date, accession_number, filed_date);
+CREATE INDEX IF NOT EXISTS idx_numerical_company_filed ON numerical(cik, filed_date);
 CREATE INDEX IF NOT EXISTS idx_numerical_filing ON numerical(cik, accession_number);
+CREATE INDEX IF NOT EXISTS idx_concepts_qname ON concepts(qname);
+
+CREATE INDEX IF NOT EXISTS idx_sec_tickers_by_cik ON sec_tickers(cik, rank);
 
 CREATE INDEX IF NOT EXISTS idx_metric_mappings_lookup
   ON metric_mappings(cik, metric_key, priority);
+
+CREATE INDEX IF NOT EXISTS idx_refresh_runs_open
+  ON refresh_runs(universe, started_at DESC) WHERE finished_at IS NULL;
@@ -0,0 +1,90 @@
+"""EXPLAIN ANALYZE the per-company query helpers and check they touch one fact partition"""
+import argparse
+import json
+import logging
+import re
+import sys
+from collections.abc import Iterator, Sequence
+
+import query
+import splits
+from db_setup import get_cursor
+
+logger = logging.getLogger(__name__)
+
+_PARTITION = re.compile(r"^(numerical|textual)_p\d+$")
+
+
+def helper_queries(ticker: str, cik: str) -> dict[str, tuple[str, Sequence]]:
+    """helper name -> (sql, params) as each helper would run it for `ticker`."""
+    qnames = list(splits.SPLIT_REF_QNAMES)
+    ranked = (ticker, "all", "all", "all")
+    return {
+        "query_facts/numerical": (query._NUMERICAL_FETCH_SQL, (qnames, *ranked)),
+        "query_facts/textual": (query._TEXTUAL_FETCH_SQL, (qnames, *ranked)),
+        "resolve/numerical": (query._NUMERICAL_RESOLVE_SQL, (ticker, "revenue", False, *ranked)),
+        "resolve/textual": (query._TEXTUAL_RESOLVE_SQL, (ticker, "revenue", True, *ranked)),
+        "get_company_concepts": query._company_concepts_query(ticker, "Revenue"),
+        "refresh_split_factors": (splits.SPLIT_REF_SQL, (qnames, cik, qnames)),
+    }
+
+
+def plan_nodes(node: dict) -> Iterator[dict]:
+    """`node` and every node below it."""
+    yield node
+    for child in node.get("Plans", ()):
+        yield from plan_nodes(child)
+
+
+def scanned_partitions(plan: dict) -> dict[str, set[str]]:
+    """parent table -> fact partitions the executed plan actually read."""
+    out: dict[str, set[str]] = {}
+    for node in plan_nodes(plan["Plan"]):
+        rel = node.get("Relation Name", "")
+        m = _PARTITION.match(rel)
+        if m and node.get("Actual Loops", 0) > 0:
+            out.setdefault(m.group(1), set()).add(rel)
+    return out
+
+
+def explain(ticker: str) -> dict[str, dict[str, set[str]]]:
+    """helper name -> partitions scanned, per fact table, for `ticker`."""
+    ticker = ticker.upper()
+    results: dict[str, dict[str, set[str]]] = {}
+    with get_cursor(write=False) as cursor:
+        cursor.execute("SELECT cik FROM companies WHERE ticker = %s", (ticker,))
+        row = cursor.fetchone()
+        if row is None:
+            raise ValueError(f"{ticker} is not in the database")
+        for name, (sql, params) in helper_queries(ticker, row[0]).items():
+            cursor.execute(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            results[name] = scanned_partitions(plan[0])
+    return results
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    logging.basicConfig(level=logging.INFO)
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument("ticker", help="A ticker already in the database.")
+    args = ap.parse_args(argv)
+
+    try:
+        results = explain(args.ticker)
+    except ValueError as e:
+        ap.error(str(e))  # exits with status 2
+
+    pruned = True
+    for name, tables in results.items():
+        touched = ", ".join(sorted(p for parts in tables.values() for p in parts)) or "-"
+        ok = all(len(parts) <= 1 for parts in tables.values())
+        pruned &= ok
+        print(f"{'ok  ' if ok else 'FAIL'} {name:<24} {touched}")
+    return 0 if pruned else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
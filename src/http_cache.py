@@ -0,0 +1,141 @@
+"""on-disk conditional-request (ETag / Last-Modified) cache for SEC JSON endpoints"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+class ResponseCache:
+    """
+    response bodies keyed by URL, stored alongside the validators needed to
+    revalidate them. a revalidation answered with 304 counts as a hit, a full
+    200 as a miss. once the cache grows past `max_bytes` the least recently
+    used entries (by file mtime, bumped on every hit) are evicted.
+
+    a response stored with `pending` set stays in memory until confirm()
+    writes it out, so its validators can't vouch for data that never landed.
+    """
+    def __init__(self, directory: str, max_bytes: int):
+        self._dir = Path(directory)
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._pending: dict[str, tuple[bytes, str]] = {}
+        # body path -> size, least recently used first; the directory is only
+        # scanned once, here
+        entries = sorted(
+            (st.st_mtime, p, st.st_size)
+            for p in self._dir.glob("*.body")
+            for st in (p.stat(),)
+        )
+        self._sizes: OrderedDict[Path, int] = OrderedDict((p, size) for _, p, size in entries)
+        self._bytes = sum(self._sizes.values())
+
+    def _paths(self, url: str) -> tuple[Path, Path]:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self._dir / f"{key}.body", self._dir / f"{key}.meta"
+
+    def validators(self, url: str) -> dict[str, str]:
+        """conditional request headers for `url`, or {} when nothing is cached."""
+        body, meta = self._paths(url)
+        try:
+            validators = json.loads(meta.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if not body.exists():
+            return {}
+
+        headers: dict[str, str] = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        return headers
+
+    def hit(self, url: str) -> bytes | None:
+        """
+        record a 304 for `url` and return its cached body, or None when the
+        entry was evicted after its validators were read, in which case it
+        is dropped and the caller has to download it in full.
+        """
+        body, meta = self._paths(url)
+        try:
+            data = body.read_bytes()
+            os.utime(body)
+            os.utime(meta)
+        except OSError:
+            self.discard(url)
+            return None
+        with self._lock:
+            self.hits += 1
+            if body in self._sizes:
+                self._sizes.move_to_end(body)
+        return data
+
+    def store(self, url: str, r: httpx.Response, pending: bool = False) -> None:
+        """
+        record a 200 for `url`, caching it when the server sent validators.
+        with `pending` set nothing is written until confirm(url).
+        """
+        etag = r.headers.get("ETag")
+        last_modified = r.headers.get("Last-Modified")
+        with self._lock:
+            self.misses += 1
+            self._pending.pop(url, None)
+            if not (etag or last_modified):
+                return
+            meta = json.dumps({"url": url, "etag": etag, "last_modified": last_modified})
+            if pending:
+                self._pending[url] = (r.content, meta)
+                return
+        self._write(url, r.content, meta)
+
+    def confirm(self, url: str) -> None:
+        """write out a pending response for `url`, if there is one."""
+        with self._lock:
+            entry = self._pending.pop(url, None)
+        if entry is not None:
+            self._write(url, *entry)
+
+    def discard(self, url: str) -> None:
+        """forget `url` so the next request downloads it in full."""
+        body, meta = self._paths(url)
+        with self._lock:
+            self._pending.pop(url, None)
+            self._bytes -= self._sizes.pop(body, 0)
+            body.unlink(missing_ok=True)
+            meta.unlink(missing_ok=True)
+
+    def _write(self, url: str, content: bytes, meta_json: str) -> None:
+        body, meta = self._paths(url)
+        with self._lock:
+            body.write_bytes(content)
+            meta.write_text(meta_json, encoding="utf-8")
+            self._bytes += len(content) - self._sizes.pop(body, 0)
+            self._sizes[body] = len(content)
+            self._evict()
+
+    def _evict(self) -> None:
+        """drop least recently used entries until under max_bytes. caller holds the lock."""
+        while self._bytes > self._max_bytes and self._sizes:
+            body, size = self._sizes.popitem(last=False)
+            body.unlink(missing_ok=True)
+            body.with_suffix(".meta").unlink(missing_ok=True)
+            self._bytes -= size
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._sizes),
+                "bytes": self._bytes,
+            }
@@ -0,0 +1,369 @@
+"""native inline XBRL fact extraction: streams an iXBRL primary document
+without loading its DTS through Arelle."""
+import logging
+import re
+from collections.abc import Iterable
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from urllib.parse import urljoin
+
+from arelle.FunctionIxt import ixtNamespaceFunctions
+from lxml import etree
+
+from models import PeriodType, TextualFact
+
+logger = logging.getLogger(__name__)
+
+_IX_NAMESPACES = (
+    "http://www.xbrl.org/2013/inlineXBRL",
+    "http://www.xbrl.org/2008/inlineXBRL",
+)
+_IX11 = _IX_NAMESPACES[0]
+_XBRLI = "http://www.xbrl.org/2003/instance"
+_XBRLDI = "http://xbrl.org/2006/xbrldi"
+_XHTML = "http://www.w3.org/1999/xhtml"
+_XSI_NIL = "{http://www.w3.org/2001/XMLSchema-instance}nil"
+
+_FACT_TAGS = {f"{{{ns}}}{name}" for ns in _IX_NAMESPACES for name in ("nonNumeric", "nonFraction")}
+_CONTINUATION_TAG = f"{{{_IX11}}}continuation"
+_CONTEXT_TAG = f"{{{_XBRLI}}}context"
+_UNIT_TAG = f"{{{_XBRLI}}}unit"
+_MEASURE_TAG = f"{{{_XBRLI}}}measure"
+_BASE_TAG = f"{{{_XHTML}}}base"
+# elements whose whole subtree is read when they end
+_SUBTREE_TAGS = _FACT_TAGS | {_CONTINUATION_TAG, _CONTEXT_TAG, _UNIT_TAG}
+
+# html attributes holding URIs, resolved against <base> in escaped output
+_URI_ATTRS = {
+    "a": {"href"}, "area": {"href"}, "blockquote": {"cite"}, "del": {"cite"},
+    "form": {"action"}, "img": {"src", "longdesc", "usemap"}, "input": {"src", "usemap"},
+    "ins": {"cite"}, "link": {"href"}, "object": {"classid", "codebase", "data", "archive", "usemap"},
+    "q": {"cite"}, "script": {"src"},
+}
+_SELF_CLOSING = frozenset({
+    "area", "base", "basefont", "br", "col", "frame", "hr", "img",
+    "input", "isindex", "link", "meta", "param",
+})
+_ESCAPE_TEXT = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+_WHITESPACE = re.compile(r"[ \t\r\n]+")
+
+
+class _Context:
+    __slots__ = ("period_type", "instant_date", "start_date", "end_date", "dimensions")
+
+    def __init__(self, elem: etree._Element):
+        self.period_type = PeriodType.INSTANT
+        self.instant_date = self.start_date = self.end_date = None
+        period = elem.find(f"{{{_XBRLI}}}period")
+        if period is not None:
+            instant = period.find(f"{{{_XBRLI}}}instant")
+            start = period.find(f"{{{_XBRLI}}}startDate")
+            end = period.find(f"{{{_XBRLI}}}endDate")
+            if instant is not None:
+                self.instant_date = _period_date(instant.text, end_of_day=True)
+            elif start is not None or end is not None:
+                self.period_type = PeriodType.DURATION
+                self.start_date = _period_date(start.text if start is not None else None)
+                self.end_date = _period_date(end.text if end is not None else None, end_of_day=True)
+
+        self.dimensions: dict[str, str] = {}
+        for member in elem.iter(f"{{{_XBRLDI}}}explicitMember", f"{{{_XBRLDI}}}typedMember"):
+            dim = (member.get("dimension") or "").strip()
+            if not dim or dim in self.dimensions:
+                continue
+            if member.tag.endswith("explicitMember"):
+                self.dimensions[dim] = (member.text or "").strip()
+            else:
+                typed = next(iter(member), None)
+                self.dimensions[dim] = str(typed.text) if typed is not None else ""
+
+
+def _period_date(text: str | None, end_of_day: bool = False) -> date | None:
+    """
+    xbrl period text as a date, the way Arelle reports it: a date-only
+    instant/endDate means the end of that day, i.e. midnight of the next one.
+    """
+    if not text:
+        return None
+    text = text.strip()
+    try:
+        if "T" in text:
+            dt = datetime.fromisoformat(text[:19])
+            return dt.date()
+        d = date.fromisoformat(text[:10])
+    except ValueError:
+        return None
+    return d + timedelta(days=1) if end_of_day else d
+
+
+def _unit_string(elem: etree._Element) -> str | None:
+    def measures(parent: etree._Element | None) -> list[str]:
+        if parent is None:
+            return []
+        qnames = []
+        for m in parent.iter(_MEASURE_TAG):
+            prefixed = (m.text or "").strip()
+            prefix, _, local = prefixed.rpartition(":")
+            qnames.append((m.nsmap.get(prefix or None, ""), local, prefixed))
+        return [q[2] for q in sorted(qnames)]
+
+    divide = elem.find(f"{{{_XBRLI}}}divide")
+    if divide is not None:
+        nums = measures(divide.find(f"{{{_XBRLI}}}unitNumerator"))
+        dens = measures(divide.find(f"{{{_XBRLI}}}unitDenominator"))
+    else:
+        nums, dens = measures(elem), []
+    num_s = "*".join(nums)
+    den_s = "*".join(dens)
+    return f"{num_s}/{den_s}" if den_s else (num_s or None)
+
+
+def _resolve_qname(elem: etree._Element, prefixed: str) -> tuple[str, str, str]:
+    prefix, _, local = prefixed.strip().rpartition(":")
+    return prefixed.strip(), elem.nsmap.get(prefix or None, ""), local
+
+
+def _tag_name(elem: etree._Element) -> str:
+    local = etree.QName(elem).localname
+    return f"{elem.prefix}:{local}" if elem.prefix else local
+
+
+def _attr_name(elem: etree._Element, name: str) -> str:
+    if not name.startswith("{"):
+        return name
+    qn = etree.QName(name)
+    if qn.namespace == "http://www.w3.org/XML/1998/namespace":
+        return f"xml:{qn.localname}"
+    prefix = next((p for p, ns in elem.nsmap.items() if ns == qn.namespace and p), None)
+    return f"{prefix}:{qn.localname}" if prefix else qn.localname
+
+
+def _escaped_node(elem: etree._Element, start: bool, empty: bool, base: str) -> str:
+    """start/end tag of a nested html element in escaped (text block) output."""
+    if etree.QName(elem).namespace in _IX_NAMESPACES:
+        return ""
+    local = etree.QName(elem).localname
+    tag = _tag_name(elem)
+    s = ["<"]
+    if not start and not empty:
+        s.append("/")
+    s.append(tag)
+    if start or empty:
+        uri_attrs = _URI_ATTRS.get(local, ())
+        for name, value in sorted(elem.items()):
+            if name in uri_attrs:
+                value = urljoin(base, value).replace(" ", "%20")
+            value = value.replace("&", "&amp;").replace('"', "&quot;")
+            s.append(f' {_attr_name(elem, name)}="{value}"')
+    if not start and empty:
+        s.append("/" if local in _SELF_CLOSING else f"></{tag}")
+    s.append(">")
+    return "".join(s)
+
+
+def _inner_text(elem: etree._Element, escape: bool, base: str) -> Iterable[str]:
+    """inner text of an inline element, skipping ix:exclude subtrees."""
+    if elem.text:
+        yield elem.text.translate(_ESCAPE_TEXT) if escape else elem.text
+    for child in elem:
+        if not isinstance(child.tag, str):
+            pass  # entities etc.; comments and PIs are dropped by the parser
+        elif child.tag.endswith("}exclude") and etree.QName(child).namespace in _IX_NAMESPACES:
+            pass
+        else:
+            first = True
+            for nested in _inner_text(child, escape, base):
+                if first and escape:
+                    yield _escaped_node(child, True, False, base)
+                    first = False
+                yield nested
+            if escape:
+                yield _escaped_node(child, False, first, base)
+        if child.tail:
+            yield child.tail.translate(_ESCAPE_TEXT) if escape else child.tail
+
+
+class _PendingFact:
+    __slots__ = (
+        "kind", "qname", "namespace", "local_name", "context_ref", "unit_ref",
+        "format", "scale", "sign", "nil", "escape", "text", "continued_at",
+    )
+
+
+class _UnsupportedTransform(ValueError):
+    """a format outside Arelle's built-in registries, e.g. SEC's ixt-sec."""
+
+
+def _transform(fmt: tuple[str, str], value: str) -> str:
+    namespace, local = fmt
+    functions = ixtNamespaceFunctions.get(namespace)
+    if functions is None or local not in functions:
+        raise _UnsupportedTransform(f"{{{namespace}}}{local}")
+    return functions[local](value)
+
+
+def _fact_value(fact: _PendingFact, text: str) -> str | None:
+    """the transformed, scaled value of a fact, matching Arelle's ModelInlineFact.value."""
+    if fact.nil:
+        return None
+    v = text
+    if fact.format is not None:
+        v = _WHITESPACE.sub(" ", v).strip(" ")
+        v = _transform(fact.format, v)
+    if fact.kind == "nonNumeric":
+        return v
+
+    num = Decimal(v)
+    if fact.scale is not None:
+        num *= 10 ** Decimal(fact.scale)
+    if fact.sign:
+        num *= -1
+    if num.is_infinite():
+        return "-INF" if num < 0 else "INF"
+    if num.is_nan():
+        return "NaN"
+    if num == num.to_integral() and ".0" not in v:
+        num = num.quantize(Decimal(1))
+    return f"{num:f}"
+
+
+def extract_inline_facts(
+    chunks: Iterable[bytes],
+    ticker: str,
+    cik: str,
+    accession_number: str,
+    skipped: list[int] | None = None,
+) -> list[TextualFact]:
+    """
+    stream an inline XBRL document and return its ix:nonNumeric/ix:nonFraction
+    facts, with contexts and units resolved from ix:resources. html outside
+    facts is discarded as it is parsed, so memory stays bounded by the
+    largest single fact. facts in a format Arelle has no transform for are
+    dropped with a warning and counted in skipped[0].
+    """
+    pull = etree.XMLPullParser(
+        events=("start", "end"), huge_tree=True, remove_comments=True, remove_pis=True,
+    )
+    contexts: dict[str, _Context] = {}
+    units: dict[str, str | None] = {}
+    pending: list[_PendingFact] = []
+    continuations: dict[str, tuple[str, str, str | None]] = {}
+    base = ""
+    depth = 0  # open elements in _SUBTREE_TAGS
+
+    def handle(event: str, elem: etree._Element) -> None:
+        nonlocal base, depth
+        tag = elem.tag
+        if event == "start":
+            if tag in _SUBTREE_TAGS:
+                depth += 1
+            return
+
+        if tag in _SUBTREE_TAGS:
+            depth -= 1
+        if tag in _FACT_TAGS:
+            if not elem.get("target"):
+                pending.append(_pending_fact(elem, base))
+        elif tag == _CONTINUATION_TAG:
+            continuations[elem.get("id", "")] = (
+                "".join(_inner_text(elem, False, base)),
+                "".join(_inner_text(elem, True, base)),
+                elem.get("continuedAt"),
+            )
+        elif tag == _CONTEXT_TAG:
+            contexts[elem.get("id", "")] = _Context(elem)
+        elif tag == _UNIT_TAG:
+            units[elem.get("id", "")] = _unit_string(elem)
+        elif tag == _BASE_TAG:
+            base = elem.get("href") or ""
+
+        if depth == 0:
+            # nothing above this element still needs its text
+            elem.clear(keep_tail=False)
+            parent = elem.getparent()
+            if parent is not None:
+                while elem.getprevious() is not None:
+                    del parent[0]
+
+    for chunk in chunks:
+        pull.feed(chunk)
+        for event, elem in pull.read_events():
+            handle(event, elem)
+    pull.close()
+    for event, elem in pull.read_events():
+        handle(event, elem)
+
+    facts: list[TextualFact] = []
+    unsupported: dict[str, int] = {}
+    for fact in pending:
+        text = fact.text
+        seen = set()
+        next_id = fact.continued_at
+        while next_id and next_id in continuations and next_id not in seen:
+            seen.add(next_id)
+            plain, escaped, next_id = continuations[next_id]
+            text += escaped if fact.escape else plain
+
+        context = contexts.get(fact.context_ref)
+        if context is None:
+            logger.debug("skip fact %s: unknown context %s", fact.qname, fact.context_ref)
+            continue
+        try:
+            value = _fact_value(fact, text)
+        except _UnsupportedTransform as e:
+            unsupported[str(e)] = unsupported.get(str(e), 0) + 1
+            continue
+        except (ValueError, InvalidOperation, TypeError) as e:
+            logger.debug("skip fact %s: %s", fact.qname, e)
+            continue
+        if value is None:
+            continue
+
+        facts.append(TextualFact(
+            ticker=ticker,
+            cik=cik,
+            accession_number=accession_number,
+            qname=fact.qname,
+            namespace=fact.namespace,
+            local_name=fact.local_name,
+            value=value,
+            period_type=context.period_type,
+            instant_date=context.instant_date,
+            start_date=context.start_date,
+            end_date=context.end_date,
+            unit=units.get(fact.unit_ref) if fact.unit_ref else None,
+            dimensions=dict(context.dimensions),
+        ))
+
+    if unsupported:
+        count = sum(unsupported.values())
+        logger.warning(
+            " Skipped %d fact(s) in %s with unsupported transforms: %s",
+            count, accession_number,
+            ", ".join(f"{fmt} x{n}" for fmt, n in sorted(unsupported.items())),
+        )
+        if skipped is not None:
+            skipped[0] += count
+    return facts
+
+
+def _pending_fact(elem: etree._Element, base: str) -> _PendingFact:
+    fact = _PendingFact()
+    fact.kind = etree.QName(elem).localname
+    fact.qname, fact.namespace, fact.local_name = _resolve_qname(elem, elem.get("name", ""))
+    fact.context_ref = elem.get("contextRef", "")
+    fact.unit_ref = elem.get("unitRef")
+    fmt = (elem.get("format") or "").strip()
+    if fmt:
+        prefix, _, local = fmt.rpartition(":")
+        fact.format = (elem.nsmap.get(prefix or None, ""), local)
+    else:
+        fact.format = None
+    fact.scale = (elem.get("scale") or "").strip() or None
+    fact.sign = elem.get("sign")
+    fact.nil = elem.get(_XSI_NIL) in ("true", "1")
+    fact.escape = elem.get("escape") in ("true", "1")
+    fact.text = "".join(_inner_text(elem, fact.escape, base))
+    is_continued = fact.kind == "nonNumeric" and etree.QName(elem).namespace == _IX11
+    fact.continued_at = elem.get("continuedAt") if is_continued else None
+    return fact
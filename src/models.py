@@ -41,6 +41,27 @@ class Metric:
     display_name: str
     format_type: str
 
+@dataclass(frozen=True)
+class ScreenResult:
+    """
+    columnar screener output: row i is (tickers[i], periods[i]) and
+    columns[metric][i] is that metric's value for it (None if unreported).
+    """
+    metrics: tuple[str, ...]
+    tickers: list[str]
+    periods: list[date]
+    columns: dict[str, list[float | None]]
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def rows(self) -> list[tuple]:
+        """row-wise view: [(ticker, period, value per metric...), ...]."""
+        return [
+            (t, p, *(self.columns[m][i] for m in self.metrics))
+            for i, (t, p) in enumerate(zip(self.tickers, self.periods))
+        ]
+
 @dataclass(frozen=True)
 class TextualFact:
     ticker: str
@@ -63,6 +84,8 @@ class Filing:
     accession_number: str
     entry_file: str
     filing_type: str
+    filed_date: date | None = None
+    size: int | None = None  # bytes, as reported by the submissions API
 
 @dataclass(frozen=True)
 class NumericalFact:
@@ -73,7 +96,7 @@ class NumericalFact:
     fname: str
     unit: str
     period_type: PeriodType
-    value: str | None = None
+    value: float | None = None
     instant_date: date | None = None
     start_date: date | None = None
     end_date: date | None = None
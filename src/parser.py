@@ -1,5 +1,10 @@
 """parses filings for a given ticker"""
+import json
 import logging
+import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
 from datetime import date
 from typing import Any, cast
 
@@ -17,6 +22,11 @@ from models import (
     FilingFetchError,
     NumericalFetchError,
 )
+from http_cache import ResponseCache
+from store import NO_ENTRY_FILE, record_missing_entry_files
+from ixbrl import extract_inline_facts
+from sec_client import AsyncSECClient
+from db_setup import get_connection
 import config
 import rate_limiter
 
@@ -25,15 +35,40 @@ logging.getLogger("httpcore").setLevel(logging.WARNING)
 
 logger = logging.getLogger(__name__)
 
+# concurrent index.json + range-probe lookups for legacy (non-inline) filings;
+# all of them still share the process-wide SEC rate limit
+ENTRY_RESOLVE_THREADS = 4
+
+# linkbases that facts-only parsing never reads: labels, references,
+# presentation, calculation and definition. both filer-extension
+# (foo-20240928_lab.xml) and base-taxonomy (us-gaap-lab-2024.xml) names.
+_FACTS_ONLY_SKIP_LOADING = "|".join(
+    f"*{sep}{kind}{suffix}"
+    for kind in ("lab", "ref", "doc", "pre", "cal", "def")
+    for sep, suffix in (("_", ".xml"), ("-", "-*.xml"))
+)
+
+# held until the surrounding transaction ends
+_TICKER_MAP_LOCK_SQL = "SELECT pg_advisory_xact_lock(hashtext('sec_tickers'))"
+
 class SECFilingParser:
     """parses xbrl facts from sec edgar filings (defaults to 10-ks)."""
     def __init__(
         self,
-        conn: Connection,
+        conn: Connection | None,
         max_retries: int = 3,
         timeout: float = 30.0,
         headers: dict[str, str] | None = None,
+        facts_only: bool = False,
+        extractor: str = "arelle",
     ):
+        """
+        `facts_only` runs Arelle without validation or formula processing and
+        skips loading the linkbases fact extraction never reads. the
+        extracted facts are the same, only cheaper to produce.
+        `extractor="native"` streams inline XBRL documents through ixbrl.py
+        instead of Arelle; non-inline filings still go through Arelle.
+        """
         self._conn = conn
         self._ticker_to_cik: dict[str, str] | None = None
         self._client = httpx.Client(
@@ -42,13 +77,29 @@ class SECFilingParser:
             follow_redirects=True,
             transport=httpx.HTTPTransport(retries=max_retries),
         )
+        self._cache: ResponseCache | None = None
+        if config.SEC_HTTP_CACHE_DIR:
+            self._cache = ResponseCache(
+                config.SEC_HTTP_CACHE_DIR, config.SEC_HTTP_CACHE_MAX_MB * 1024 * 1024
+            )
         self._options: RuntimeOptions = RuntimeOptions(
             entrypointFile=None,
             internetConnectivity="online",
             keepOpen=True,
             logLevel="WARNING",
             plugins=f"{config.ARELLE_PLUGINS_PATH}|rate_limiter.py",
+            cacheDirectory=config.ARELLE_CACHE_DIR or None,
+            # only a dedicated cache is trusted forever; Arelle's per-user
+            # default keeps its own recheck interval
+            internetRecheck="never" if config.ARELLE_CACHE_DIR else None,
+            packages=config.ARELLE_TAXONOMY_PACKAGES or None,
         )
+        if facts_only:
+            self._options.validate = False
+            self._options.formulaAction = "none"
+            self._options.skipLoading = _FACTS_ONLY_SKIP_LOADING
+        self._extractor = extractor
+        self._parse_stats = {"filings": 0, "load_s": 0.0, "extract_s": 0.0, "skipped_facts": 0}
 
     @property
     def conn(self) -> Connection:
@@ -58,6 +109,17 @@ class SECFilingParser:
 
     def close(self) -> None:
         self._client.close()
+        if self._cache is not None:
+            logger.info(" HTTP cache: %s", self._cache.stats())
+        if self._parse_stats["filings"]:
+            logger.info(" Parse timings: %s", self.parse_stats())
+
+    def parse_stats(self) -> dict[str, float]:
+        """
+        cumulative seconds spent loading filings (DTS + instance) vs extracting
+        facts, plus facts the native extractor dropped for unsupported transforms.
+        """
+        return {k: round(v, 3) for k, v in self._parse_stats.items()}
     
     # needed for the 'with SECFilingParser() as parser'
     def __enter__(self) -> "SECFilingParser":
@@ -67,43 +129,144 @@ class SECFilingParser:
     def __exit__(self, *exc) -> None:
         self.close()
 
-    def _get_json(self, url: str) -> Any:
-        """get json from a url with rate limiting."""
+    def _get_json(self, url: str, if_changed: bool = False) -> Any:
+        """
+        get json from a url with rate limiting. with the response cache
+        enabled the request is conditional: an unchanged body is served from
+        disk, or, when `if_changed` is set, None is returned instead so the
+        caller can skip parsing and storing it altogether. an `if_changed`
+        body is only cached once the caller confirms it was stored.
+        """
         rate_limiter.wait(url)
+        validators = self._cache.validators(url) if self._cache else {}
         try:
-            r = self._client.get(url)
+            r = self._client.get(url, headers=validators)
+            if r.status_code == httpx.codes.NOT_MODIFIED and self._cache and validators:
+                body = self._cache.hit(url)
+                if body is not None:
+                    return None if if_changed else json.loads(body)
+                # evicted since its validators were sent: fetch it unconditionally
+                rate_limiter.wait(url)
+                r = self._client.get(url)
             r.raise_for_status()
+            if self._cache:
+                self._cache.store(url, r, pending=if_changed)
             return r.json()
         except httpx.HTTPError as e:
             raise FilingFetchError(f"Request failed for {url}: {e}") from e
 
+    def forget_company_facts(self, cik: str) -> None:
+        """drop a cached Company Facts body, e.g. after it failed to store."""
+        if self._cache:
+            self._cache.discard(config.SEC_COMPANY_FACTS_URL.format(cik=cik))
+
+    def remember_company_facts(self, cik: str) -> None:
+        """cache the Company Facts body fetched for `cik` once its facts are committed."""
+        if self._cache:
+            self._cache.confirm(config.SEC_COMPANY_FACTS_URL.format(cik=cik))
+
+    def _load_ticker_map(self) -> dict[str, str]:
+        """the persisted ticker-to-cik map in rank order, or {} if missing or stale."""
+        if self._conn is None:
+            return {}
+        with self._conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT ticker, cik FROM sec_tickers
+                WHERE fetched_at > now() - %s * interval '1 hour'
+                ORDER BY rank
+                """,
+                (config.SEC_TICKER_MAP_TTL_HOURS,),
+            )
+            return dict(cur.fetchall())
+
+    def _save_ticker_map(self, mapping: dict[str, str]) -> None:
+        """
+        persist the map on a pooled connection of its own, committed on exit:
+        on self._conn the transaction would only be a savepoint in whatever
+        the caller has open, holding the lock and hiding the map until then.
+        """
+        if self._conn is None:
+            return
+        with get_connection() as conn, conn.cursor() as cur:
+            # processes refreshing an expired map at once take turns, so
+            # one's COPY can't collide with rows another just wrote
+            cur.execute(_TICKER_MAP_LOCK_SQL)
+            cur.execute("DELETE FROM sec_tickers")
+            with cur.copy("COPY sec_tickers (ticker, cik, rank) FROM STDIN") as copy:
+                for rank, (ticker, cik) in enumerate(mapping.items()):
+                    copy.write_row((ticker, cik, rank))
+
     def _get_ticker_to_cik( self) -> dict[str, str]:
-        """fetch and cache ticker-to-cik mapping."""
+        """
+        ticker-to-cik mapping, loaded lazily: from memory, else from the
+        sec_tickers table while younger than SEC_TICKER_MAP_TTL_HOURS, else
+        downloaded from SEC and persisted for the next process.
+        """
         if self._ticker_to_cik is not None:
             return self._ticker_to_cik
 
+        mapping = self._load_ticker_map()
+        if mapping:
+            self._ticker_to_cik = mapping
+            return mapping
+
         data = self._get_json(config.SEC_COMPANY_TICKERS_URL)
         if not isinstance(data, dict):
             raise SECFilingParserError("Unexpected ticker-to-cik payload.")
 
-        self._ticker_to_cik = {
-            e["ticker"].upper(): str(e["cik_str"]).zfill(10)
-            for e in data.values()
-            if isinstance(e, dict) and "ticker" in e and "cik_str" in e
-        }
+        # entries are in SEC's rank order, so the first ticker seen for a CIK
+        # is its primary listing; setdefault keeps that rank on duplicates.
+        mapping = {}
+        for e in data.values():
+            if isinstance(e, dict) and "ticker" in e and "cik_str" in e:
+                mapping.setdefault(e["ticker"].upper(), str(e["cik_str"]).zfill(10))
+        self._save_ticker_map(mapping)
+        self._ticker_to_cik = mapping
         return self._ticker_to_cik
 
+    def _get_cik_to_ticker(self) -> dict[str, str]:
+        """reverse mapping: each cik to its primary (highest-ranked) ticker."""
+        reverse: dict[str, str] = {}
+        for ticker, cik in self._get_ticker_to_cik().items():
+            reverse.setdefault(cik, ticker)
+        return reverse
+
+    def _get_known_cik(self, ticker: str) -> str | None:
+        """fast path: a company already in the database needs no ticker map."""
+        if self._conn is None:
+            return None
+        with self._conn.cursor() as cur:
+            cur.execute("SELECT cik FROM companies WHERE ticker = %s", (ticker,))
+            row = cur.fetchone()
+            return row[0] if row else None
+
     def _get_cik(self, ticker: str) -> str:
         """get cik for a ticker."""
-        mapping = self._get_ticker_to_cik()
         t = ticker.upper()
+        if self._ticker_to_cik is None and (cik := self._get_known_cik(t)):
+            return cik
+        mapping = self._get_ticker_to_cik()
         if t not in mapping:
             raise TickerNotFoundError(f"Ticker '{ticker}' not found")
         return mapping[t]
-    
-    def _get_entry_url(self, cik: str, accession_number: str) -> str:
-        base = f"https://www.sec.gov/Archives/edgar/data/{cik.lstrip("0")}/{accession_number.replace("-", "")}/"
-        idx = self._get_json(base + "index.json")
+
+    def _get_ticker(self, cik: str) -> str:
+        """get the primary ticker for a cik."""
+        reverse = self._get_cik_to_ticker()
+        if cik not in reverse:
+            raise TickerNotFoundError(f"CIK '{cik}' not found")
+        return reverse[cik]
+
+    @staticmethod
+    def _archive_base(cik: str, accession_number: str) -> str:
+        return config.SEC_ARCHIVES_URL.format(
+            cik=cik.lstrip("0"), accession=accession_number.replace("-", "")
+        )
+
+    @staticmethod
+    def _entry_candidates(idx: Any) -> list[str]:
+        """instance-document candidates from a filing's index.json listing."""
         items = idx.get("directory", {}).get("item", [])
         names = [it.get("name") for it in items if isinstance(it, dict) and it.get("name")]
         names = cast(list[str], names)
@@ -115,24 +278,38 @@ class SECFilingParser:
             if any(s in nl for s in ("_cal", "_def", "_lab", "_pre", "schema", "summary")):
                 continue
             candidates.append(n)
+        return candidates
+
+    def _get_entry_url(self, cik: str, accession_number: str) -> str:
+        base = self._archive_base(cik, accession_number)
+        idx = self._get_json(base + "index.json")
 
-        for n in candidates:
+        for n in self._entry_candidates(idx):
             url = base + n
+            rate_limiter.wait(url)
             r = self._client.get(url, headers={"Range": "bytes=0-65535"})
+            if r.status_code == httpx.codes.TOO_MANY_REQUESTS or r.is_server_error:
+                # transient: don't let it pass for a filing without an instance
+                raise FilingFetchError(f"Request failed for {url}: HTTP {r.status_code}")
             t = r.text.lower()
             if "<xbrl" in t:
                 return n
 
         return ""
-    
+
     def _get_filings(
         self,
         cik: str,
         filing_types: set[str],
         max_filings: int | None = None,
+        ticker: str | None = None,
     ) -> list[Filing]:
-        """get list of filings for specified filing types, excluding already-scanned ones."""
-        meta = self._get_json(f"https://data.sec.gov/submissions/CIK{cik}.json")
+        """
+        get list of filings for specified filing types, excluding already-scanned
+        ones and legacy filings known to have no xbrl instance. with `ticker`,
+        newly found instance-less filings are recorded in the manifest.
+        """
+        meta = self._get_json(config.SEC_SUBMISSIONS_URL.format(cik=cik))
 
         try:
             recent = meta["filings"]["recent"]
@@ -142,28 +319,32 @@ class SECFilingParser:
         acc = recent["accessionNumber"]
         docs = recent["primaryDocument"]
         is_ixbrl = recent["isInlineXBRL"]
-
-        for i in range(len(docs)):
-            if is_ixbrl[i] != 1 and forms[i] in filing_types:
-                docs[i] = self._get_entry_url(cik=cik, accession_number=acc[i])
+        filed = recent.get("filingDate") or [None] * len(acc)
+        sizes = recent.get("size") or [None] * len(acc)
 
         if not (isinstance(acc, list) and isinstance(docs, list) and isinstance(forms, list)):
             raise SECFilingParserError("Unexpected metadata structure: filings.recent fields are not lists")
 
-        if not (len(acc) == len(docs) == len(forms)):
+        if not (len(acc) == len(docs) == len(forms) == len(is_ixbrl)):
             raise SECFilingParserError(
-                f"mismatched array lengths: acc={len(acc)}, docs={len(docs)}, forms={len(forms)}"
+                f"mismatched array lengths: acc={len(acc)}, docs={len(docs)}, "
+                f"forms={len(forms)}, isInlineXBRL={len(is_ixbrl)}"
             )
-        
+
+        # legacy filings' primaryDocument is the html, not the xbrl instance.
+        # their entry file is resolved later, only if they still need parsing.
+        legacy = {a for a, f, ix in zip(acc, forms, is_ixbrl) if ix != 1 and f in filing_types}
         filings = [Filing
                     (
                         cik=cik, 
                         accession_number=a, 
-                        entry_file=d, 
+                        entry_file="" if a in legacy else d, 
                         filing_type=f, 
+                        filed_date=self._parse_date(fd),
+                        size=sz,
                     ) 
-                    for a, d, f in zip(acc, docs, forms)
-                    if d != "" and f in filing_types]
+                    for a, d, f, fd, sz in zip(acc, docs, forms, filed, sizes)
+                    if (d != "" or a in legacy) and f in filing_types]
         
         matching_count = len(filings)
         types_str = ", ".join(sorted(filing_types))
@@ -175,11 +356,16 @@ class SECFilingParser:
         
         with self._conn.cursor() as cur:
             cur.execute(
-                "SELECT accession_number FROM filings WHERE cik = %s AND accession_number = ANY(%s)",
+                "SELECT accession_number, ingest_state, entry_file FROM filings "
+                "WHERE cik = %s AND accession_number = ANY(%s)",
                 (cik, acc),
             )
-            already_exists = {row[0] for row in cur.fetchall()}
-            filings = [f for f in filings if f.accession_number not in already_exists]
+            manifest = {a: (state, entry) for a, state, entry in cur.fetchall()}
+        done = {a for a, (state, entry) in manifest.items() if state == "stored" or entry == NO_ENTRY_FILE}
+        filings = [f for f in filings if f.accession_number not in done]
+        known = {a: entry for a, (_, entry) in manifest.items() if entry}
+
+        filings = self._resolve_entry_files(cik, filings, legacy, known, ticker)
 
         unprocessed_count = len(filings)
         if unprocessed_count == 0:
@@ -195,6 +381,42 @@ class SECFilingParser:
 
         return filings[:max_filings] if max_filings and max_filings < len(filings) else filings
 
+    def _resolve_entry_files(
+        self,
+        cik: str,
+        filings: list[Filing],
+        legacy: set[str],
+        known: dict[str, str],
+        ticker: str | None = None,
+    ) -> list[Filing]:
+        """
+        fill in the xbrl instance file of each legacy filing: from the
+        manifest (`known`) when an earlier run recorded it, otherwise looked
+        up concurrently. filings without one are dropped, and with `ticker`
+        recorded as such so later runs skip them.
+        """
+        entries = {a: known[a] for a in legacy if a in known}
+        pending = [
+            f.accession_number for f in filings
+            if f.accession_number in legacy and f.accession_number not in entries
+        ]
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(ENTRY_RESOLVE_THREADS, len(pending))) as pool:
+                entries.update(zip(
+                    pending, pool.map(lambda a: self._get_entry_url(cik=cik, accession_number=a), pending)
+                ))
+            logger.info(" Resolved %d legacy entry file(s) for CIK %s", len(pending), cik)
+
+        resolved = [
+            replace(f, entry_file=entries[f.accession_number]) if f.accession_number in entries else f
+            for f in filings
+        ]
+        missing = [f for f in resolved if not f.entry_file]
+        if missing and ticker:
+            record_missing_entry_files(self._conn, cik, ticker, missing)
+            logger.info(" %d legacy filing(s) for CIK %s have no xbrl instance", len(missing), cik)
+        return [f for f in resolved if f.entry_file]
+
     def _parse_date(self, value: str | None) -> date | None:
         return date.fromisoformat(value) if value else None
 
@@ -216,6 +438,10 @@ class SECFilingParser:
         accn = entry.get("accn")
         if end is None or val is None or not accn:
             return None
+        try:
+            value = float(val)
+        except (TypeError, ValueError):
+            return None
 
         start = entry.get("start")
         period_type = PeriodType.DURATION if start else PeriodType.INSTANT
@@ -228,7 +454,7 @@ class SECFilingParser:
             fname=tag,
             unit=unit,
             period_type=period_type,
-            value=str(val),
+            value=value,
             instant_date=self._parse_date(end) if period_type is PeriodType.INSTANT else None,
             start_date=self._parse_date(start),
             end_date=self._parse_date(end),
@@ -238,18 +464,35 @@ class SECFilingParser:
             filed_date=self._parse_date(entry.get("filed")),
         )
 
-    def get_numerical_facts(self, ticker: str) -> list[NumericalFact]:
+    def fetch_company_facts(
+        self, ticker: str, if_changed: bool = False
+    ) -> tuple[str, dict | None]:
         """
-        fetch every numeric fact SEC's Company Facts API has compiled for `ticker`,
-        across every filing the company has ever submitted.
+        fetch the raw Company Facts document for `ticker`. returns (cik, payload);
+        with `if_changed` the payload is None when it is unchanged since the
+        cached copy.
         """
-        ticker = ticker.upper()
-        cik = self._get_cik(ticker)
-        raw = self._get_json(config.SEC_COMPANY_FACTS_URL.format(cik=cik))
+        cik = self._get_cik(ticker.upper())
+        raw = self._get_json(config.SEC_COMPANY_FACTS_URL.format(cik=cik), if_changed=if_changed)
+        if raw is None:
+            return cik, None
+
+        if not isinstance(raw, dict) or not isinstance(raw.get("facts"), dict):
+            raise NumericalFetchError(f"Unexpected company facts payload for CIK {cik}.")
+        return cik, raw
+
+    async def afetch_company_facts(self, client: AsyncSECClient, ticker: str) -> tuple[str, dict]:
+        """async fetch_company_facts() through a shared AsyncSECClient."""
+        cik = self._get_cik(ticker.upper())
+        raw = await client.get_company_facts(cik)
 
         if not isinstance(raw, dict) or not isinstance(raw.get("facts"), dict):
             raise NumericalFetchError(f"Unexpected company facts payload for CIK {cik}.")
+        return cik, raw
 
+    def build_numerical_facts(self, ticker: str, cik: str, raw: dict) -> list[NumericalFact]:
+        """turn a fetched Company Facts document into NumericalFacts."""
+        ticker = ticker.upper()
         facts: list[NumericalFact] = []
         for taxonomy, concepts in raw["facts"].items():
             if not isinstance(concepts, dict):
@@ -268,6 +511,70 @@ class SECFilingParser:
 
         return facts
 
+    def get_numerical_facts(self, ticker: str) -> list[NumericalFact]:
+        """
+        fetch every numeric fact SEC's Company Facts API has compiled for `ticker`,
+        across every filing the company has ever submitted.
+        """
+        cik, raw = self.fetch_company_facts(ticker)
+        return self.build_numerical_facts(ticker, cik, raw)
+
+    def iter_numerical_facts(self, ticker: str) -> Iterator[NumericalFact]:
+        """
+        streaming get_numerical_facts(): parses the Company Facts response
+        incrementally as it downloads and yields one NumericalFact per unit
+        entry, so only the current entry is ever materialised. needs the
+        optional `ijson` package.
+        """
+        import ijson
+
+        ticker = ticker.upper()
+        cik = self._get_cik(ticker)
+        url = config.SEC_COMPANY_FACTS_URL.format(cik=cik)
+
+        events = ijson.sendable_list()
+        coro = ijson.parse_coro(events, use_float=True)
+        builder: ijson.ObjectBuilder | None = None
+        depth = 0
+        key: tuple[str, str, str] = ("", "", "")
+
+        rate_limiter.wait(url)
+        try:
+            with self._client.stream("GET", url) as r:
+                r.raise_for_status()
+                for chunk in r.iter_bytes():
+                    coro.send(chunk)
+                    for prefix, event, value in events:
+                        if builder is None:
+                            # unit entries live at facts.<taxonomy>.<tag>.units.<unit>.item
+                            if event != "start_map" or not prefix.endswith(".item"):
+                                continue
+                            parts = prefix.split(".")
+                            if len(parts) != 6 or parts[0] != "facts" or parts[3] != "units":
+                                continue
+                            key = (parts[1], parts[2], parts[4])
+                            builder = ijson.ObjectBuilder()
+
+                        builder.event(event, value)
+                        if event in ("start_map", "start_array"):
+                            depth += 1
+                        elif event in ("end_map", "end_array"):
+                            depth -= 1
+                        if depth == 0:
+                            taxonomy, tag, unit = key
+                            fact = self._build_numerical_fact(
+                                ticker, cik, taxonomy, tag, unit, builder.value
+                            )
+                            builder = None
+                            if fact is not None:
+                                yield fact
+                    del events[:]
+                coro.close()
+        except httpx.HTTPError as e:
+            raise NumericalFetchError(f"Request failed for {url}: {e}") from e
+        except ijson.JSONError as e:
+            raise NumericalFetchError(f"Unexpected company facts payload for CIK {cik}: {e}") from e
+
     def _extract_qname(self, fact) -> tuple[str, str, str]:
         concept = getattr(fact, "concept", None)
         qname = getattr(fact, "qname", None) or (concept.qname if concept else None)
@@ -375,7 +682,7 @@ class SECFilingParser:
 
         ticker = ticker.upper()
         cik = self._get_cik(ticker)
-        filings = self._get_filings(cik, filing_types, max_filings)
+        filings = self._get_filings(cik, filing_types, max_filings, ticker)
         return cik, filings
 
     def parse_filing(
@@ -387,17 +694,24 @@ class SECFilingParser:
         """parse a filing and return all facts, both numeric and textual."""
         accession_number = filing.accession_number
         filename = filing.entry_file
-        accession_number_nd = accession_number.replace("-", "")
-        url = f"https://www.sec.gov/Archives/edgar/data/{cik}/{accession_number_nd}/{filename}"
+        url = self._archive_base(cik, accession_number) + filename
+
+        if self._extractor == "native" and filename.lower().endswith((".htm", ".html", ".xhtml")):
+            return self._parse_inline_native(url, ticker, cik, accession_number)
 
         self._options.entrypointFile = url
 
+        # a fresh Session per filing: Arelle's plugin state can't be re-run on
+        # a reused session. repeat DTS loads are instead served from Arelle's
+        # taxonomy cache, without rechecking it when ARELLE_CACHE_DIR is set.
         try:
+            started = time.perf_counter()
             with Session() as session:
                 session.run(self._options)
                 models = session.get_models()
                 if not models:
                     raise SECFilingParserError(f"No models loaded from {url}")
+            loaded = time.perf_counter()
 
             parsed_facts: list[TextualFact] = []
             for fact in models[0].factsInInstance:
@@ -407,10 +721,68 @@ class SECFilingParser:
                         parsed_facts.append(parsed)
                 except SECFilingParserError as e:
                     logger.debug("skip fact: %s", e)
+            extracted = time.perf_counter()
 
+            taxonomy = _taxonomy_year(models[0])
+            self._parse_stats["filings"] += 1
+            self._parse_stats["load_s"] += loaded - started
+            self._parse_stats["extract_s"] += extracted - loaded
+            logger.info(
+                " Parsed %s (%s): load %.2fs, extract %.2fs, %d facts",
+                accession_number, taxonomy,
+                loaded - started, extracted - loaded, len(parsed_facts),
+            )
             return parsed_facts
 
         except SECFilingParserError:
             raise
         except Exception as e:
             raise SECFilingParserError(f"Error parsing {url}: {e}") from e
+
+
+    def _parse_inline_native(
+        self,
+        url: str,
+        ticker: str,
+        cik: str,
+        accession_number: str,
+    ) -> list[TextualFact]:
+        """stream an inline XBRL primary document through ixbrl.py; no DTS is loaded."""
+        started = time.perf_counter()
+        skipped = [0]
+        rate_limiter.wait(url)
+        try:
+            with self._client.stream("GET", url) as r:
+                r.raise_for_status()
+                facts = extract_inline_facts(
+                    r.iter_bytes(), ticker, cik, accession_number, skipped
+                )
+        except httpx.HTTPError as e:
+            raise FilingFetchError(f"Request failed for {url}: {e}") from e
+        except Exception as e:
+            raise SECFilingParserError(f"Error parsing {url}: {e}") from e
+        elapsed = time.perf_counter() - started
+
+        self._parse_stats["filings"] += 1
+        self._parse_stats["extract_s"] += elapsed
+        self._parse_stats["skipped_facts"] += skipped[0]
+        logger.info(
+            " Parsed %s (native): extract %.2fs, %d facts",
+            accession_number, elapsed, len(facts),
+        )
+        return facts
+
+
+_BASE_TAXONOMIES = (
+    ("http://fasb.org/us-gaap/", "us-gaap"),
+    ("https://xbrl.ifrs.org/taxonomy/", "ifrs"),
+)
+
+
+def _taxonomy_year(model: Any) -> str:
+    """the base taxonomy a loaded filing's DTS was built on, e.g. "us-gaap/2024"."""
+    for ns in model.namespaceDocs:
+        for prefix, name in _BASE_TAXONOMIES:
+            if ns.startswith(prefix):
+                return f"{name}/{ns[len(prefix):].split('/')[0]}"
+    return "unknown"
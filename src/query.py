@@ -1,30 +1,67 @@
 from __future__ import annotations
 
-from collections import defaultdict
 from dataclasses import replace
-from datetime import date
-from statistics import median
 
-from db_setup import get_cursor
+from db_setup import get_connection, get_cursor
 from models import Fact, Metric
+from splits import split_adjust_value
+
+# qnames supplied by the caller, already in priority order
+_GIVEN_QNAMES_SQL = "SELECT %s::text[] AS q"
+
+# a company's mapped qnames for a metric, in priority order. NULL (so the
+# ranked query matches nothing) unless the metric's format selects this table.
+_MAPPED_QNAMES_SQL = """
+    SELECT array_agg(mm.qname ORDER BY mm.priority, mm.qname)::text[] AS q
+    FROM metric_mappings mm
+    JOIN companies c ON c.cik = mm.cik
+    JOIN metrics m ON m.key = mm.metric_key
+    WHERE c.ticker = %s AND mm.metric_key = %s AND (m.format_type = 'text') = %s
+"""
+
+# newest period first. deduped rows are unique on their three dates, so the
+# trailing columns make the order total (and resolved_metrics ordinals stable).
+_RANKED_FACT_ORDER = (
+    "COALESCE(end_date, instant_date, start_date) DESC NULLS LAST, "
+    "instant_date, start_date, end_date"
+)
 
-def _ranked_fact_sql(table: str, qname_expr: str, name_col: str, extra_where: str = "") -> str:
+def _ranked_fact_sql(
+    table: str, extra_where: str = "", qnames_sql: str = _GIVEN_QNAMES_SQL,
+) -> str:
     """
     shared shape for both numerical and textual: rank qnames by
     caller-supplied priority, keep the highest-priority qname per filing,
     filter by period type, dedupe, and sort by date. `table` selects which
-    table to read from; `qname_expr` is how to compute a fully-qualified
-    concept name for that table (numerical has no stored qname -- it's
-    always just `taxonomy || ':' || fname`); `name_col` is the bare display
-    name column; `extra_where` adds any table-specific predicate (e.g.
-    numerical has no `dimensions` column to filter on).
+    table to read from; numerical has no stored qname, so its rows are
+    matched on the concept ids the qnames map to and named through the
+    concepts dictionary. `extra_where` adds any table-specific predicate
+    (e.g. numerical has no `dimensions` column to filter on). `qnames_sql`
+    produces the priority-ordered qname array (column `q`). every row ends
+    with the filing's materialized split factor (always 1.0 for textual).
+    the ticker resolves to a cik in a subquery rather than a join, so the
+    executor can prune every other cik partition.
     """
-    unit_col = "f.unit" if table == "numerical" else "NULL::varchar AS unit"
+    if table == "numerical":
+        source = "numerical f JOIN concepts k ON k.id = f.concept_id"
+        name_expr, qname_expr = "k.fname", "k.qname"
+        match = "f.concept_id = ANY(ARRAY(SELECT id FROM concepts WHERE qname = ANY((SELECT q FROM qnames)::text[])))"
+        unit_col = "f.unit"
+        split_col = "COALESCE(sf.factor, 1.0) AS split_factor"
+        split_join = "LEFT JOIN split_factors sf ON sf.cik = f.cik AND sf.accession_number = f.accession_number"
+    else:
+        source = f"{table} f"
+        name_expr, qname_expr = "f.local_name", "f.qname"
+        match = "f.qname = ANY((SELECT q FROM qnames)::text[])"
+        unit_col = "NULL::varchar AS unit"
+        split_col = "1.0::double precision AS split_factor"
+        split_join = ""
     return f"""
 WITH
+qnames AS ({qnames_sql}),
 ranked_facts AS (
     SELECT
-        f.{name_col} AS local_name,
+        {name_expr} AS local_name,
         f.period_type,
         f.value,
         f.instant_date,
@@ -32,11 +69,12 @@ ranked_facts AS (
         f.end_date,
         {unit_col},
         f.accession_number,
-        array_position(%s::text[], {qname_expr}) AS qname_rank
-    FROM {table} f
-    JOIN companies c ON c.cik = f.cik
-    WHERE c.ticker = %s
-        AND {qname_expr} = ANY(%s::text[])
+        {split_col},
+        array_position((SELECT q FROM qnames), {qname_expr}) AS qname_rank
+    FROM {source}
+    {split_join}
+    WHERE f.cik = (SELECT cik FROM companies WHERE ticker = %s)
+        AND {match}
         {extra_where}
 ),
 best_qname_per_filing AS (
@@ -47,7 +85,7 @@ best_qname_per_filing AS (
 filtered_facts AS (
     SELECT rf.local_name, rf.period_type, rf.value,
             rf.instant_date, rf.start_date, rf.end_date,
-            rf.unit, rf.accession_number
+            rf.unit, rf.accession_number, rf.split_factor
     FROM ranked_facts rf
     JOIN best_qname_per_filing bq
         ON rf.accession_number = bq.accession_number
@@ -65,131 +103,56 @@ deduped AS (
     SELECT DISTINCT ON (instant_date, start_date, end_date)
         local_name, period_type, value,
         instant_date, start_date, end_date,
-        unit, accession_number
+        unit, accession_number, split_factor
     FROM filtered_facts
     ORDER BY instant_date, start_date, end_date, accession_number
 )
 SELECT *
 FROM deduped
-ORDER BY COALESCE(end_date, instant_date, start_date) DESC NULLS LAST
+ORDER BY {_RANKED_FACT_ORDER}
 """
 
-_NUMERICAL_FETCH_SQL = _ranked_fact_sql("numerical", "(f.taxonomy || ':' || f.fname)", "fname")
-_TEXTUAL_FETCH_SQL = _ranked_fact_sql("textual", "f.qname", "local_name", "AND f.dimensions = '{}'::jsonb")
+_NUMERICAL_FETCH_SQL = _ranked_fact_sql("numerical")
+_TEXTUAL_FETCH_SQL = _ranked_fact_sql("textual", "AND f.dimensions = '{}'::jsonb")
+_NUMERICAL_RESOLVE_SQL = _ranked_fact_sql("numerical", qnames_sql=_MAPPED_QNAMES_SQL)
+_TEXTUAL_RESOLVE_SQL = _ranked_fact_sql(
+    "textual", "AND f.dimensions = '{}'::jsonb", qnames_sql=_MAPPED_QNAMES_SQL
+)
 
+_METRIC_SQL = "SELECT key, display_name, format_type FROM metrics WHERE key = %s"
 
-SPLIT_REF_QNAMES = (
-    "us-gaap:WeightedAverageNumberOfDilutedSharesOutstanding",
-    "us-gaap:WeightedAverageNumberOfSharesOutstandingBasic",
-    "us-gaap:WeightedAverageNumberOfShareOutstandingBasicAndDiluted",
-)
+# materialized numeric series (see resolved.py); a state row marks a hit
+_RESOLVED_STATE_SQL = """
+SELECT 1 FROM resolved_metric_state
+WHERE cik = (SELECT cik FROM companies WHERE ticker = %s) AND metric_key = %s
+"""
 
-SPLIT_REF_SQL = """
-    SELECT f.accession_number, f.filed_date, f.start_date, f.end_date, f.value
-    FROM numerical f
-    JOIN companies c ON c.cik = f.cik
-    WHERE c.ticker = %s
-      AND (f.taxonomy || ':' || f.fname) = %s
-      AND f.start_date IS NOT NULL
-      AND f.end_date IS NOT NULL
-      AND f.filed_date IS NOT NULL
+_RESOLVED_FETCH_SQL = """
+SELECT r.local_name, r.period_type, r.value,
+       r.instant_date, r.start_date, r.end_date,
+       r.unit, r.accession_number, COALESCE(sf.factor, 1.0) AS split_factor
+FROM resolved_metrics r
+LEFT JOIN split_factors sf ON sf.cik = r.cik AND sf.accession_number = r.accession_number
+WHERE r.cik = (SELECT cik FROM companies WHERE ticker = %s)
+    AND r.metric_key = %s
+    AND r.query_type = %s
+ORDER BY r.ordinal
 """
 
 
-def get_split_factors(ticker: str) -> dict[str, float]:
+def _facts_from_rows(rows: list[tuple], adjust_splits: bool) -> list[Fact]:
     """
-    per-filing split-adjustment factors that normalize every filing's per-share
-    basis onto the *latest* filing's basis, derived purely from overlapping
-    share-count facts (no external split data needed).
-
-    the same historical period reported in two filings differs only by the
-    stock splits that happened between them, so the ratio of its share counts
-    is exactly that cumulative split factor. we chain those ratios across
-    overlapping filings back to the newest one (factor 1.0).
-
-    returns {accession_number: factor}. for a SHARE COUNT multiply the value by
-    the factor; for a PER-SHARE value divide by it. accessions absent from the
-    map should be treated as 1.0 (unadjusted).
+    build Facts from ranked-fact rows, normalizing per-share and share-count
+    values onto the latest split basis via each row's trailing split_factor.
     """
-    ticker = ticker.upper()
-    rows: list[tuple] = []
-    with get_cursor(write=False) as cursor:
-        for qname in SPLIT_REF_QNAMES:
-            cursor.execute(SPLIT_REF_SQL, (ticker, qname))
-            rows = cursor.fetchall()
-            if rows:
-                break
-    if not rows:
-        return {}
-
-    filed: dict[str, date] = {}
-    raw: dict[str, dict[tuple, list[float]]] = defaultdict(lambda: defaultdict(list))
-    for accn, filed_date, start, end, value in rows:
-        try:
-            v = float(value)
-        except (TypeError, ValueError):
-            continue
-        if v <= 0:
-            continue
-        filed[accn] = filed_date
-        raw[accn][(start, end)].append(v)
-
-    series: dict[str, dict[tuple, float]] = {
-        accn: {period: median(vals) for period, vals in periods.items()}
-        for accn, periods in raw.items()
-    }
-    if not series:
-        return {}
-
-    # process newest-filed first; anchor it at 1.0 and chain older ones onto it.
-    accns = sorted(series, key=lambda a: (filed[a], a), reverse=True)
-    factor: dict[str, float] = {accns[0]: 1.0}
-    processed: list[str] = [accns[0]]
-
-    for a in accns[1:]:
-        implied: list[float] = []
-        for b in processed:
-            shared = set(series[a]) & set(series[b])
-            ratios = [series[b][p] / series[a][p] for p in shared if series[a][p] > 0]
-            if ratios:
-                implied.append(factor[b] * median(ratios))
-        # fall back to the nearest newer filing's basis when nothing overlaps
-        # (e.g. a lone quarterly period): assume no split in the gap.
-        factor[a] = median(implied) if implied else factor[processed[-1]]
-        processed.append(a)
-
-    return factor
-
-
-def _split_adjust_value(value, unit: str | None, factor: float):
-    """re-express one value on the latest split basis, by unit type."""
-    if factor == 1.0 or value is None:
-        return value
-    try:
-        v = float(value)
-    except (TypeError, ValueError):
-        return value
-    u = (unit or "").lower()
-    if u == "shares":
-        return v * factor           # more shares outstanding post-split
-    if u.endswith("/shares"):
-        return v / factor           # e.g. USD/shares (EPS) shrinks post-split
-    return value                    # dollars, ratios, pure numbers: unaffected
-
-
-def _apply_split_factors(ticker: str, facts: list[Fact]) -> list[Fact]:
-    """normalize per-share and share-count facts onto the latest split basis."""
-    if not facts:
-        return facts
-    factors = get_split_factors(ticker)
-    if not factors:
-        return facts
-
     out: list[Fact] = []
-    for f in facts:
-        factor = factors.get(f.accession_number, 1.0)
-        new_val = _split_adjust_value(f.value, f.unit, factor)
-        out.append(f if new_val is f.value else replace(f, value=new_val))
+    for *cols, factor in rows:
+        f = Fact(*cols)
+        if adjust_splits:
+            new_val = split_adjust_value(f.value, f.unit, factor)
+            if new_val is not f.value:
+                f = replace(f, value=new_val)
+        out.append(f)
     return out
 
 
@@ -211,26 +174,43 @@ def query_facts(
     with get_cursor(write=False) as cursor:
         cursor.execute(
             sql,
-            (qnames, ticker.upper(), qnames, query_type, query_type, query_type),
+            (qnames, ticker.upper(), query_type, query_type, query_type),
         )
-        facts = [Fact(*row) for row in cursor.fetchall()]
-
-    if adjust_splits and fact_kind == "numerical":
-        facts = _apply_split_factors(ticker, facts)
-    return facts
+        return _facts_from_rows(cursor.fetchall(), adjust_splits)
 
 def resolve(ticker: str, key: str, query_type: str, adjust_splits: bool = True) -> list[Fact]:
-    """resolve a metric to Fact objects using a specific company's configured mappings."""
-    metric = get_metric(key)
-    if metric is None:
-        raise ValueError(f"Unknown metric: {key!r}")
-
-    qnames = get_metric_mappings(ticker, key)
-    if not qnames:
-        return []
-
-    fact_kind = "textual" if metric.format_type == "text" else "numerical"
-    return query_facts(ticker, qnames, query_type, fact_kind=fact_kind, adjust_splits=adjust_splits)
+    """
+    resolve a metric to Fact objects using a specific company's configured
+    mappings. numeric metrics are read from their materialized series in
+    resolved_metrics; the metric, that series and the live textual query go
+    out as one pipeline on a single connection, so a lookup costs one round
+    trip. a series that isn't materialized yet is computed live instead.
+    """
+    ticker = ticker.upper()
+    with get_connection() as conn:
+        with conn.pipeline():
+            metric_cur = conn.execute(_METRIC_SQL, (key,))
+            state_cur = conn.execute(_RESOLVED_STATE_SQL, (ticker, key))
+            cached_cur = conn.execute(_RESOLVED_FETCH_SQL, (ticker, key, query_type))
+            # only returns rows for text metrics
+            textual_cur = conn.execute(
+                _TEXTUAL_RESOLVE_SQL,
+                (ticker, key, True, ticker, query_type, query_type, query_type),
+            )
+
+            row = metric_cur.fetchone()
+            if row is None:
+                raise ValueError(f"Unknown metric: {key!r}")
+            if Metric(*row).format_type == "text":
+                return _facts_from_rows(textual_cur.fetchall(), adjust_splits)
+            if state_cur.fetchone() is not None:
+                return _facts_from_rows(cached_cur.fetchall(), adjust_splits)
+
+        rows = conn.execute(
+            _NUMERICAL_RESOLVE_SQL,
+            (ticker, key, False, ticker, query_type, query_type, query_type),
+        ).fetchall()
+        return _facts_from_rows(rows, adjust_splits)
 
 
 def get_cik_for_ticker(ticker: str) -> str | None:
@@ -255,10 +235,7 @@ def get_metrics() -> list[Metric]:
 def get_metric(key: str) -> Metric | None:
     """return a single catalog metric by key, or None if unknown."""
     with get_cursor(write=False) as cursor:
-        cursor.execute(
-            "SELECT key, display_name, format_type FROM metrics WHERE key = %s",
-            (key,),
-        )
+        cursor.execute(_METRIC_SQL, (key,))
         row = cursor.fetchone()
         return Metric(*row) if row else None
 
@@ -294,29 +271,37 @@ def get_metric_mappings(ticker: str, metric_key: str) -> list[str]:
 
 
 def _company_concepts_sql(
-    table: str, qname_expr: str, name_col: str, has_search: bool, extra_where: str = ""
+    source: str, qname_expr: str, name_expr: str, value_expr: str,
+    has_search: bool, extra_where: str = "",
 ) -> str:
     """shared per-table aggregate used by get_company_concepts()'s UNION ALL."""
-    where = "c.ticker = %s"
+    where = "f.cik = (SELECT cik FROM companies WHERE ticker = %s)"
     if has_search:
-        where += f" AND ({qname_expr} ILIKE %s OR f.{name_col} ILIKE %s)"
+        where += f" AND ({qname_expr} ILIKE %s OR {name_expr} ILIKE %s)"
     where += extra_where
     return f"""
         SELECT
             {qname_expr} AS qname,
-            MIN(f.{name_col}) AS local_name,
+            MIN({name_expr}) AS local_name,
             COUNT(*) AS fact_count,
-            (ARRAY_AGG(f.value ORDER BY
+            (ARRAY_AGG({value_expr} ORDER BY
                 COALESCE(f.end_date, f.instant_date, f.start_date) DESC NULLS LAST
             ))[1] AS latest_value
-        FROM {table} f
-        JOIN companies c ON c.cik = f.cik
+        FROM {source}
         WHERE {where}
         GROUP BY {qname_expr}
     """
 
 def get_company_concepts(ticker: str, search: str | None = None) -> list[tuple]:
     """distinct concepts a company actually reported, for the mapping UI."""
+    sql, params = _company_concepts_query(ticker, search)
+    with get_cursor(write=False) as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _company_concepts_query(ticker: str, search: str | None = None) -> tuple[str, list]:
+    """get_company_concepts()'s (sql, params)."""
     has_search = bool(search)
     params: list = [ticker.upper()]
     if has_search:
@@ -324,10 +309,12 @@ def get_company_concepts(ticker: str, search: str | None = None) -> list[tuple]:
         params.extend([like, like])
 
     numeric_sql = _company_concepts_sql(
-        "numerical", "(f.taxonomy || ':' || f.fname)", "fname", has_search
+        "numerical f JOIN concepts k ON k.id = f.concept_id",
+        "k.qname", "k.fname", "f.value::text", has_search,
     )
     textual_sql = _company_concepts_sql(
-        "textual", "f.qname", "local_name", has_search, " AND f.dimensions = '{}'::jsonb"
+        "textual f", "f.qname", "f.local_name", "f.value", has_search,
+        " AND f.dimensions = '{}'::jsonb",
     )
     sql = f"""
         SELECT * FROM (
@@ -337,10 +324,7 @@ def get_company_concepts(ticker: str, search: str | None = None) -> list[tuple]:
         ) concepts
         ORDER BY fact_count DESC, qname
     """
-
-    with get_cursor(write=False) as cursor:
-        cursor.execute(sql, params + params)
-        return cursor.fetchall()
+    return sql, params + params
 
 
 def get_mappings_for_ticker(ticker: str) -> list[tuple]:
@@ -363,6 +347,13 @@ def get_mappings_for_ticker(ticker: str) -> list[tuple]:
         return cursor.fetchall()
 
 
+def _rebuild_resolved(cursor, cik: str, metric_key: str) -> None:
+    """refresh the materialized series a mapping edit just changed, in its transaction."""
+    from resolved import rebuild_resolved_metrics  # resolved imports this module
+
+    rebuild_resolved_metrics(cursor.connection, cik, [metric_key])
+
+
 def add_metric_mapping(cik: str, metric_key: str, qname: str, priority: int = 0) -> None:
     """map a company's qname onto a catalog metric (upserts the priority)."""
     with get_cursor() as cursor:
@@ -374,6 +365,7 @@ def add_metric_mapping(cik: str, metric_key: str, qname: str, priority: int = 0)
             """,
             (cik, metric_key, qname, priority),
         )
+        _rebuild_resolved(cursor, cik, metric_key)
 
 
 def remove_metric_mapping(cik: str, metric_key: str, qname: str) -> bool:
@@ -383,4 +375,7 @@ def remove_metric_mapping(cik: str, metric_key: str, qname: str) -> bool:
             "DELETE FROM metric_mappings WHERE cik = %s AND metric_key = %s AND qname = %s",
             (cik, metric_key, qname),
         )
-        return cursor.rowcount > 0
+        removed = cursor.rowcount > 0
+        if removed:
+            _rebuild_resolved(cursor, cik, metric_key)
+        return removed
@@ -2,6 +2,8 @@
 from typing import Any
 from time import sleep, monotonic
 from urllib.parse import urlparse
+import asyncio
+import os
 import threading
 
 SEC_HOSTS = {"www.sec.gov", "data.sec.gov"}
@@ -9,7 +11,11 @@ SEC_HOSTS = {"www.sec.gov", "data.sec.gov"}
 _lock = threading.Lock()
 _NEXT_ALLOWED = 0.0
 
-MIN_INTERVAL = .125 # 8 requests/sec
+# 8 requests/sec. read from the environment because Arelle re-executes this
+# file as a fresh module on every run, and parse-pool workers use it to take
+# their fair share of the budget.
+MIN_INTERVAL = float(os.getenv("SEC_MIN_INTERVAL", ".125"))
+SEC_MAX_RATE = 10.0 # SEC's published ceiling, requests/sec
 _COUNT = 0
 
 def call_count():
@@ -27,19 +33,44 @@ def _is_sec_http_url(url: str) -> bool:
         return False
     return host in SEC_HOSTS
 
+def _reserve(interval: float) -> float:
+    """claim the next free send slot; returns how long to wait for it."""
+    global _NEXT_ALLOWED
+    global _COUNT
+    with _lock:
+        _COUNT += 1
+        now = monotonic()
+        slot = max(now, _NEXT_ALLOWED)
+        _NEXT_ALLOWED = slot + interval
+        return slot - now
+
 def wait(url: str):
+    # the lock is only held to book a slot, so concurrent callers sleep in
+    # parallel instead of queueing behind whoever is currently sleeping.
     if _is_sec_http_url(url):
-        global _NEXT_ALLOWED
-        global _COUNT
-        with _lock:
-            _COUNT += 1
-            now = monotonic()
-            if now < _NEXT_ALLOWED:
-                sleep(_NEXT_ALLOWED - now)
-            _NEXT_ALLOWED = monotonic() + MIN_INTERVAL
+        delay = _reserve(MIN_INTERVAL)
+        if delay > 0:
+            sleep(delay)
 
     return True
 
+class AsyncTokenBucket:
+    """
+    asyncio limiter for SEC hosts. books slots on the same schedule as wait(),
+    so sync and async callers in one process share a single request budget;
+    requests themselves stay in flight concurrently.
+    """
+    def __init__(self, rate: float = 1 / MIN_INTERVAL):
+        if not 0 < rate <= SEC_MAX_RATE:
+            raise ValueError(f"rate must be in (0, {SEC_MAX_RATE}] requests/sec, got {rate}")
+        self.interval = 1 / rate
+
+    async def acquire(self, url: str) -> None:
+        if _is_sec_http_url(url):
+            delay = _reserve(self.interval)
+            if delay > 0:
+                await asyncio.sleep(delay)
+
 class RateLimiter:
     @staticmethod
     def TransformURLOptions(
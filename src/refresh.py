@@ -0,0 +1,304 @@
+"""Checkpointed, resumable numerical refresh over a ticker universe."""
+import argparse
+import heapq
+import logging
+import sys
+import time
+from collections.abc import Sequence
+from datetime import timedelta
+
+from db_setup import get_connection
+from models import TickerNotFoundError
+from scrape_textual import open_parser
+from ticker_loader import TickerLoadError, load_tickers_from_file
+from update_numerical import ingest_numerical_ticker
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_AGE_HOURS = 24.0
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_BACKOFF = 30.0  # seconds before the first retry; doubles per attempt
+
+_OPEN_RUN_SQL = """
+SELECT id, tickers, started_at FROM refresh_runs
+ WHERE universe = %s AND finished_at IS NULL
+ ORDER BY started_at DESC
+ LIMIT 1
+"""
+
+_NEW_RUN_SQL = """
+INSERT INTO refresh_runs (universe, tickers) VALUES (%s, %s)
+RETURNING id, started_at
+"""
+
+_FINISH_RUN_SQL = "UPDATE refresh_runs SET finished_at = now() WHERE id = %s"
+
+_CHECKPOINTS_SQL = """
+SELECT ticker, last_success, last_error_at, attempts
+  FROM refresh_checkpoints
+ WHERE ticker = ANY(%s)
+"""
+
+_SUCCESS_SQL = """
+INSERT INTO refresh_checkpoints (ticker, last_success, attempts, run_id)
+VALUES (%s, now(), 0, %s)
+ON CONFLICT (ticker) DO UPDATE SET
+    last_success = now(),
+    attempts = 0,
+    run_id = EXCLUDED.run_id
+"""
+
+_FAILURE_SQL = """
+INSERT INTO refresh_checkpoints (ticker, last_error, last_error_at, attempts, run_id)
+VALUES (%s, %s, now(), 1, %s)
+ON CONFLICT (ticker) DO UPDATE SET
+    last_error = EXCLUDED.last_error,
+    last_error_at = now(),
+    attempts = refresh_checkpoints.attempts + 1,
+    run_id = EXCLUDED.run_id
+"""
+
+# unknown tickers aren't worth retrying: record them as already given up
+_GIVE_UP_SQL = """
+INSERT INTO refresh_checkpoints (ticker, last_error, last_error_at, attempts, run_id)
+VALUES (%s, %s, now(), %s, %s)
+ON CONFLICT (ticker) DO UPDATE SET
+    last_error = EXCLUDED.last_error,
+    last_error_at = now(),
+    attempts = GREATEST(refresh_checkpoints.attempts, EXCLUDED.attempts),
+    run_id = EXCLUDED.run_id
+"""
+
+
+def _backoff_delay(backoff: float, attempts: int) -> float:
+    """seconds to wait after the `attempts`-th consecutive failure."""
+    return backoff * 2 ** max(attempts - 1, 0)
+
+
+def _open_run(conn, universe: str, tickers: Sequence[str], resume: bool):
+    """(run_id, tickers, started_at) of the run to work on, creating one unless resuming."""
+    with conn.cursor() as cur:
+        if resume:
+            cur.execute(_OPEN_RUN_SQL, (universe,))
+            row = cur.fetchone()
+            if row:
+                logger.info(" Resuming refresh run %d started %s", row[0], row[2])
+                return row[0], list(row[1]), row[2]
+            logger.info(" No unfinished %s run to resume; starting a new one", universe)
+        cur.execute(_NEW_RUN_SQL, (universe, list(tickers)))
+        run_id, started_at = cur.fetchone()
+    conn.commit()
+    return run_id, list(tickers), started_at
+
+
+def _due_tickers(
+    conn, tickers, started_at, max_age: timedelta, backoff: float, max_attempts: int,
+):
+    """
+    (due, skipped) for a run. a ticker is skipped when it succeeded during
+    this run or within `max_age`; a ticker still cooling off from earlier
+    failures is queued no sooner than its backoff allows. a ticker that has
+    failed `max_attempts` times in a row is given up on, and only tried once
+    more after `max_age` has passed since its last failure.
+    """
+    with conn.cursor() as cur:
+        cur.execute("SELECT now()")
+        now = cur.fetchone()[0]
+        cur.execute(_CHECKPOINTS_SQL, (list(tickers),))
+        checkpoints = {row[0]: row[1:] for row in cur.fetchall()}
+
+    due: list[tuple[float, str, int]] = []
+    skipped: list[str] = []
+    for ticker in tickers:
+        last_success, last_error_at, attempts = checkpoints.get(ticker, (None, None, 0))
+        if last_success is not None and (last_success >= started_at or now - last_success < max_age):
+            skipped.append(ticker)
+            continue
+        if attempts >= max_attempts:
+            if last_error_at is not None and now - last_error_at < max_age:
+                skipped.append(ticker)
+                continue
+            # one attempt, no in-run retries
+            due.append((0.0, ticker, max_attempts - 1))
+            continue
+        wait = 0.0
+        if attempts and last_error_at is not None:
+            retry_at = last_error_at + timedelta(seconds=_backoff_delay(backoff, attempts))
+            wait = max((retry_at - now).total_seconds(), 0.0)
+        due.append((wait, ticker, attempts))
+    return due, skipped
+
+
+def _checkpoint(
+    conn, run_id: int, ticker: str, error: str | None, give_up_after: int | None = None,
+) -> None:
+    """record a ticker's outcome; `give_up_after` marks it as out of attempts."""
+    with conn.cursor() as cur:
+        if error is None:
+            cur.execute(_SUCCESS_SQL, (ticker, run_id))
+        elif give_up_after is not None:
+            cur.execute(_GIVE_UP_SQL, (ticker, error, give_up_after, run_id))
+        else:
+            cur.execute(_FAILURE_SQL, (ticker, error, run_id))
+    conn.commit()
+
+
+def run_refresh(
+    tickers: Sequence[str],
+    universe: str = "default",
+    resume: bool = False,
+    max_age_hours: float = DEFAULT_MAX_AGE_HOURS,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    backoff: float = DEFAULT_BACKOFF,
+    max_retries: int = 3,
+    timeout: float = 30.0,
+    bulk: bool = False,
+) -> tuple[int, int]:
+    """
+    refresh the numerical facts of every ticker in `tickers` that is older
+    than `max_age_hours`, checkpointing each outcome in refresh_checkpoints.
+
+    a failed ticker (an exception, or facts that did not store) is requeued
+    with exponential `backoff` until it has failed `max_attempts` times in a
+    row, after which later runs try it once per `max_age_hours`; unknown
+    tickers are given up on straight away. the run is marked finished once
+    every ticker was attempted, so an interrupted run can be continued with
+    `resume`, which reuses that run's ticker list and skips tickers already
+    refreshed since it started. returns (upserted, failed).
+    """
+    total_upserted = total_failed = 0
+    with get_connection() as conn:
+        run_id, tickers, started_at = _open_run(conn, universe, tickers, resume)
+        due, skipped = _due_tickers(
+            conn, tickers, started_at, timedelta(hours=max_age_hours), backoff, max_attempts
+        )
+        if skipped:
+            logger.info(" Skipping %d fresh ticker(s): %s", len(skipped), ", ".join(skipped))
+        logger.info(" Refreshing %d ticker(s) in run %d", len(due), run_id)
+
+        # (ready_at, order, ticker, consecutive failures so far)
+        clock = time.monotonic()
+        queue = [(clock + wait, i, t, attempts) for i, (wait, t, attempts) in enumerate(due)]
+        heapq.heapify(queue)
+        seq = len(queue)
+
+        with open_parser(conn, max_retries=max_retries, timeout=timeout) as parser:
+            while queue:
+                ready_at, _, ticker, attempts = heapq.heappop(queue)
+                pause = ready_at - time.monotonic()
+                if pause > 0:
+                    time.sleep(pause)
+
+                error = None
+                retry = True
+                try:
+                    upserted, failed, skipped_facts = ingest_numerical_ticker(
+                        parser, ticker, bulk=bulk
+                    )
+                    total_upserted += upserted
+                    total_failed += failed
+                    print(f"[{ticker}] upserted={upserted} failed={failed} skipped={skipped_facts}")
+                    if failed:
+                        error = f"{failed} fact(s) failed to store"
+                except TickerNotFoundError as e:
+                    print(f"[{ticker}] not found in SEC EDGAR. skipping.")
+                    error, retry = str(e), False
+                except Exception as e:
+                    logger.warning(" [%s] refresh failed: %s", ticker, e)
+                    error = f"{type(e).__name__}: {e}"
+
+                if error is None:
+                    conn.commit()
+                else:
+                    conn.rollback()
+                _checkpoint(conn, run_id, ticker, error, None if retry else max_attempts)
+
+                attempts = 0 if error is None else attempts + 1
+                if error is not None and retry and attempts < max_attempts:
+                    delay = _backoff_delay(backoff, attempts)
+                    logger.info(" [%s] retrying in %.0fs (attempt %d of %d)",
+                                ticker, delay, attempts + 1, max_attempts)
+                    heapq.heappush(queue, (time.monotonic() + delay, seq, ticker, attempts))
+                    seq += 1
+
+        with conn.cursor() as cur:
+            cur.execute(_FINISH_RUN_SQL, (run_id,))
+        conn.commit()
+    return total_upserted, total_failed
+
+
+def add_refresh_arguments(ap: argparse.ArgumentParser) -> None:
+    """refresh policy flags shared by every CLI that drives run_refresh()."""
+    ap.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue the latest unfinished run instead of starting a new one.",
+    )
+    ap.add_argument(
+        "--max-age-hours",
+        type=float,
+        default=DEFAULT_MAX_AGE_HOURS,
+        help=f"Skip tickers refreshed within this many hours. Default = {DEFAULT_MAX_AGE_HOURS:g}",
+    )
+    ap.add_argument(
+        "--max-attempts",
+        type=int,
+        default=DEFAULT_MAX_ATTEMPTS,
+        help=f"Consecutive failures before a ticker is given up on. Default = {DEFAULT_MAX_ATTEMPTS}",
+    )
+    ap.add_argument(
+        "--backoff",
+        type=float,
+        default=DEFAULT_BACKOFF,
+        help=f"Seconds before the first retry, doubled on each further failure. Default = {DEFAULT_BACKOFF:g}s",
+    )
+    ap.add_argument(
+        "--bulk",
+        action="store_true",
+        help="Load facts with COPY into a staging table and one set-based merge.",
+    )
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    logging.basicConfig(level=logging.INFO)
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument("tickers", nargs="*", help="Ticker symbols passed inline.")
+    ap.add_argument(
+        "-f", "--file",
+        action="append",
+        dest="files",
+        metavar="PATH",
+        default=[],
+        help="Path to a text file with one ticker per line. May be repeated.",
+    )
+    ap.add_argument(
+        "--universe",
+        default="default",
+        help="Name the run is recorded under; --resume only continues runs of the same name.",
+    )
+    add_refresh_arguments(ap)
+    args = ap.parse_args(argv)
+
+    try:
+        results: list[str] = [t.strip().upper() for t in args.tickers if t]
+        for fp in args.files:
+            results.extend(load_tickers_from_file(fp))
+        tickers = sorted(set(results))
+    except TickerLoadError as e:
+        ap.error(str(e))  # exits with status 2
+
+    if not tickers and not args.resume:
+        ap.error("No tickers supplied. Pass symbols inline, use --file, or --resume.")
+
+    total_upserted, total_failed = run_refresh(
+        tickers, universe=args.universe, resume=args.resume,
+        max_age_hours=args.max_age_hours, max_attempts=args.max_attempts,
+        backoff=args.backoff, bulk=args.bulk,
+    )
+    print(f"\nDone. Total upserted: {total_upserted}, total failed: {total_failed}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""materialized per-company metric series behind query.resolve() and the screener"""
+import logging
+import sys
+from collections.abc import Sequence
+
+from psycopg import Connection
+
+from query import _NUMERICAL_RESOLVE_SQL, _RANKED_FACT_ORDER
+
+logger = logging.getLogger(__name__)
+
+QUERY_TYPES = ("annual", "quarterly", "all")
+
+# numeric metrics `cik` has mappings for, optionally limited to some keys
+_MAPPED_METRICS_SQL = """
+    SELECT DISTINCT mm.metric_key
+    FROM metric_mappings mm
+    JOIN metrics m ON m.key = mm.metric_key
+    WHERE mm.cik = %s
+      AND m.format_type <> 'text'
+      AND (%s::text[] IS NULL OR mm.metric_key = ANY(%s::text[]))
+"""
+
+# the live resolve query, stored in its own (total) row order. the split
+# factor it ends with is dropped; readers join split_factors instead.
+_BUILD_SQL = f"""
+INSERT INTO resolved_metrics (
+    cik, metric_key, query_type, ordinal, local_name, period_type, value,
+    instant_date, start_date, end_date, unit, accession_number
+)
+SELECT %s, %s, %s, row_number() OVER (ORDER BY {_RANKED_FACT_ORDER}),
+       r.local_name, r.period_type, r.value,
+       r.instant_date, r.start_date, r.end_date, r.unit, r.accession_number
+FROM ({_NUMERICAL_RESOLVE_SQL}) r
+"""
+
+_CLEAR_SQL = """
+DELETE FROM {table}
+ WHERE cik = %s AND (%s::text[] IS NULL OR metric_key = ANY(%s::text[]))
+"""
+
+_STATE_SQL = """
+INSERT INTO resolved_metric_state (cik, metric_key) VALUES (%s, %s)
+ON CONFLICT (cik, metric_key) DO UPDATE SET built_at = now()
+"""
+
+
+def rebuild_resolved_metrics(
+    conn: Connection, cik: str, metric_keys: Sequence[str] | None = None,
+) -> int:
+    """
+    recompute `cik`'s materialized series for `metric_keys` (default: every
+    metric), for each query type. call it whenever the company's numerical
+    facts or metric_mappings change. series for metrics that are no longer
+    mapped, or are text, are dropped. runs in the caller's transaction.
+    returns the number of metrics rebuilt.
+    """
+    keys = list(metric_keys) if metric_keys is not None else None
+    with conn.cursor() as cur:
+        cur.execute("SELECT ticker FROM companies WHERE cik = %s", (cik,))
+        row = cur.fetchone()
+        if row is None:
+            return 0
+        ticker = row[0]
+
+        for table in ("resolved_metrics", "resolved_metric_state"):
+            cur.execute(_CLEAR_SQL.format(table=table), (cik, keys, keys))
+        cur.execute(_MAPPED_METRICS_SQL, (cik, keys, keys))
+        mapped = [r[0] for r in cur.fetchall()]
+        if not mapped:
+            return 0
+
+        cur.executemany(_BUILD_SQL, [
+            (cik, key, qt, ticker, key, False, ticker, qt, qt, qt)
+            for key in mapped
+            for qt in QUERY_TYPES
+        ])
+        cur.executemany(_STATE_SQL, [(cik, key) for key in mapped])
+    logger.info(" Rebuilt %d resolved metric(s) for %s", len(mapped), cik)
+    return len(mapped)
+
+
+def main() -> int:
+    """backfill resolved_metrics for every company."""
+    from db_setup import get_connection
+
+    logging.basicConfig(level=logging.INFO)
+    with get_connection() as conn:
+        ciks = [r[0] for r in conn.execute("SELECT cik FROM companies ORDER BY cik")]
+        rebuilt = 0
+        for cik in ciks:
+            rebuilt += rebuild_resolved_metrics(conn, cik)
+            conn.commit()
+    print(f"Rebuilt {rebuilt} resolved metric(s) across {len(ciks)} company(ies).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
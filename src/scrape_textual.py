@@ -1,17 +1,142 @@
 """CLI entry point for scraping SEC filings into the database THROUGH ARELLE."""
 import argparse
 import logging
+import multiprocessing
+import os
 import sys
+import time
 from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 from db_setup import get_connection
 from parser import SECFilingParser
-from models import SECFilingParserError
-from store import store_textual_facts
+from models import Filing, PeriodType, SECFilingParserError, TextualFact
+from store import (
+    register_filings,
+    set_filing_state,
+    store_textual_facts,
+    store_textual_facts_bulk,
+)
 from ticker_loader import TickerLoadError, load_tickers_from_file
 from config import DEFAULT_FILING_TYPES
+import rate_limiter
 logger = logging.getLogger(__name__)
 
+# per-process parser for parse-pool workers, created by _init_parse_worker()
+_worker_parser: SECFilingParser | None = None
+
+
+def _init_parse_worker(
+    min_interval: float,
+    facts_only: bool = False,
+    extractor: str = "arelle",
+) -> None:
+    """process-pool initializer: one long-lived parser per worker process."""
+    global _worker_parser
+    os.environ["SEC_MIN_INTERVAL"] = str(min_interval)
+    rate_limiter.MIN_INTERVAL = min_interval
+    _worker_parser = SECFilingParser(
+        None, facts_only=facts_only, extractor=extractor
+    ).__enter__()
+
+
+def _pack_fact(f: TextualFact) -> tuple:
+    """compact picklable form of a TextualFact; ticker/cik/accession are implied."""
+    return (
+        f.qname, f.namespace, f.local_name, f.period_type.value, f.value,
+        f.instant_date, f.start_date, f.end_date, f.unit, f.dimensions,
+    )
+
+
+def _unpack_fact(row: tuple, ticker: str, cik: str, accession_number: str) -> TextualFact:
+    qname, namespace, local_name, period_type, value, instant, start, end, unit, dims = row
+    return TextualFact(
+        ticker=ticker,
+        cik=cik,
+        accession_number=accession_number,
+        qname=qname,
+        namespace=namespace,
+        local_name=local_name,
+        period_type=PeriodType(period_type),
+        value=value,
+        instant_date=instant,
+        start_date=start,
+        end_date=end,
+        unit=unit,
+        dimensions=dims,
+    )
+
+
+def _elapsed_ms(started: float) -> int:
+    return int((time.perf_counter() - started) * 1000)
+
+
+def _parse_in_worker(filing: Filing, ticker: str, cik: str) -> tuple[list[tuple], int]:
+    """parse in a pool worker; returns (packed facts, parse_ms)."""
+    assert _worker_parser is not None
+    started = time.perf_counter()
+    facts = _worker_parser.parse_filing(filing, ticker, cik)
+    return [_pack_fact(f) for f in facts], _elapsed_ms(started)
+
+
+def open_parse_pool(
+    parse_workers: int,
+    facts_only: bool = False,
+    extractor: str = "arelle",
+    base_interval: float | None = None,
+) -> ProcessPoolExecutor:
+    """
+    process pool of `parse_workers` Arelle parsers. the SEC request budget is
+    split evenly between the workers and this process, so the pool as a whole
+    stays within the single-process rate. spawned rather than forked so
+    workers never inherit the parent's DB connection. this process keeps its
+    reduced share until the caller restores `base_interval` after shutdown.
+    """
+    if base_interval is None:
+        base_interval = rate_limiter.MIN_INTERVAL
+    share = base_interval * (parse_workers + 1)
+    rate_limiter.MIN_INTERVAL = share
+    return ProcessPoolExecutor(
+        max_workers=parse_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_parse_worker,
+        initargs=(share, facts_only, extractor),
+    )
+
+
+def _store_filing(
+    parser: SECFilingParser,
+    filing: Filing,
+    facts: list[TextualFact],
+    parse_ms: int | None = None,
+    batch_size: int = 500,
+    bulk: bool = False,
+) -> tuple[int, int]:
+    """
+    store one filing's facts and record the outcome in its manifest row.
+    a filing only counts as stored once every one of its facts landed.
+    """
+    started = time.perf_counter()
+    # savepoint: a failed store must leave the connection usable for the
+    # manifest update that records it
+    with parser.conn.transaction():
+        if bulk:
+            upserted, failed = store_textual_facts_bulk(parser.conn, [filing], facts)
+        else:
+            upserted, failed = store_textual_facts(
+                parser.conn, [filing], facts, batch_size=batch_size
+            )
+    set_filing_state(
+        parser.conn, filing, "stored" if failed == 0 else "failed",
+        fact_count=upserted, failed_count=failed,
+        parse_ms=parse_ms, store_ms=_elapsed_ms(started),
+    )
+    logger.info(
+        " Filing %s: %d facts upserted, %d failed",
+        filing.accession_number, upserted, failed,
+    )
+    return upserted, failed
+
 
 def _ingest_textual_filing_type(
     parser: SECFilingParser,
@@ -19,11 +144,17 @@ def _ingest_textual_filing_type(
     filing_types: str | set[str] = "10-K",
     max_filings: int | None = None,
     batch_size: int = 500,
+    bulk: bool = False,
+    pool: ProcessPoolExecutor | None = None,
 ) -> tuple[int, int]:
     """
     parse all un-stored filings of a single requested type for `ticker` and
-    persist their facts. reuses `parser.conn` for storage so all writes
-    participate in one transactional context.
+    persist their facts. reuses `parser.conn` for storage, committing after
+    each filing so its manifest state survives later failures. `bulk`
+    stores each filing through binary COPY + one set-based merge instead of
+    batched upserts.
+    with a `pool` the filings are parsed concurrently in worker processes
+    and stored here as each one finishes.
     """
     cik, filings_to_parse = parser.get_filings_to_parse(
         ticker,
@@ -36,6 +167,43 @@ def _ingest_textual_filing_type(
 
     total_upserted = total_failed = 0
     ticker_upper = ticker.upper()
+    register_filings(parser.conn, cik, ticker_upper, filings_to_parse)
+
+    # each filing commits on its own, so one bad filing can't take the
+    # others stored alongside it down with it
+    if pool is not None:
+        futures = {}
+        for filing in filings_to_parse:
+            set_filing_state(parser.conn, filing, "parsing")
+            futures[pool.submit(_parse_in_worker, filing, ticker_upper, cik)] = filing
+        parser.conn.commit()
+        for i, future in enumerate(as_completed(futures), start=1):
+            filing = futures[future]
+            logger.info(
+                " Parsed filing %d/%d: %s",
+                i, len(filings_to_parse), filing.accession_number,
+            )
+            try:
+                rows, parse_ms = future.result()
+                facts = [
+                    _unpack_fact(row, ticker_upper, cik, filing.accession_number)
+                    for row in rows
+                ]
+                with parser.conn.transaction():
+                    upserted, failed = _store_filing(
+                        parser, filing, facts, parse_ms, batch_size, bulk
+                    )
+                total_upserted += upserted
+                total_failed += failed
+            except Exception as e:
+                logger.error(
+                    " Failed to process filing %s: %s",
+                    filing.accession_number, e, exc_info=True,
+                )
+                set_filing_state(parser.conn, filing, "failed")
+                total_failed += 1
+            parser.conn.commit()
+        return total_upserted, total_failed
 
     for i, filing in enumerate(filings_to_parse, start=1):
         logger.info(
@@ -43,24 +211,28 @@ def _ingest_textual_filing_type(
             i, len(filings_to_parse), filing.accession_number,
         )
 
+        # committed up front so the filing shows as in flight while it parses
+        set_filing_state(parser.conn, filing, "parsing")
+        parser.conn.commit()
         try:
-            facts = parser.parse_filing(filing, ticker_upper, cik)
-            upserted, failed = store_textual_facts(
-                parser.conn, [filing], facts, batch_size=batch_size
-            )
+            # on an error the parse and store roll back as one, leaving the
+            # connection usable for the "failed" update
+            with parser.conn.transaction():
+                started = time.perf_counter()
+                facts = parser.parse_filing(filing, ticker_upper, cik)
+                upserted, failed = _store_filing(
+                    parser, filing, facts, _elapsed_ms(started), batch_size, bulk
+                )
             total_upserted += upserted
             total_failed += failed
-            logger.info(
-                " Filing %s: %d facts upserted, %d failed",
-                filing.accession_number, upserted, failed,
-            )
         except Exception as e:
             logger.error(
                 " Failed to process filing %s: %s",
                 filing.accession_number, e, exc_info=True,
             )
+            set_filing_state(parser.conn, filing, "failed")
             total_failed += 1
-            continue
+        parser.conn.commit()
 
     return total_upserted, total_failed
 
@@ -69,6 +241,8 @@ def ingest_textual_ticker(
     ticker: str,
     filing_types: Sequence[str],
     max_filings: int | None = None,
+    bulk: bool = False,
+    pool: ProcessPoolExecutor | None = None,
 ) -> tuple[int, int]:
     """
     run the textual (Arelle) ingest for one ticker across every requested
@@ -81,6 +255,8 @@ def ingest_textual_ticker(
             ticker=ticker,
             filing_types=ftype,
             max_filings=max_filings,
+            bulk=bulk,
+            pool=pool,
         )
         total_upserted += up
         total_failed += fail
@@ -91,28 +267,54 @@ def ingest_textual_tickers(
     filing_types: Sequence[str] = ("10-K", "10-Q"),
     max_retries: int = 3,
     timeout: float = 30.0,
+    bulk: bool = False,
+    parse_workers: int = 1,
+    facts_only: bool = False,
+    extractor: str = "arelle",
 ) -> tuple[int, int]:
     """
     run the textual (Arelle) ingest for each ticker in `tickers`.
     opens its own DB connection and parser session. callable directly from
-    another program, not just via main()'s CLI.
+    another program, not just via main()'s CLI. `parse_workers` > 1 parses
+    filings in that many worker processes. `facts_only` parses without
+    Arelle validation, formulas or unused linkbases. `extractor="native"`
+    reads inline XBRL filings without Arelle.
     """
     total_upserted = total_failed = 0
-    with get_connection() as conn:
-        with open_parser(conn, max_retries=max_retries, timeout=timeout) as parser:
-            for ticker in tickers:
-                try:
-                    upserted, failed = ingest_textual_ticker(parser, ticker, filing_types)
-                    total_upserted += upserted
-                    total_failed += failed
-                    print(f"[{ticker}] upserted={upserted} failed={failed}")
-                except SECFilingParserError:
-                    print(f"[{ticker}] not found in SEC EDGAR. Skipping.")
-                conn.commit()
+    pool = None
+    base_interval = rate_limiter.MIN_INTERVAL
+    if parse_workers > 1:
+        pool = open_parse_pool(parse_workers, facts_only, extractor, base_interval)
+    try:
+        with get_connection() as conn:
+            with open_parser(
+                conn, max_retries=max_retries, timeout=timeout,
+                facts_only=facts_only, extractor=extractor,
+            ) as parser:
+                for ticker in tickers:
+                    try:
+                        upserted, failed = ingest_textual_ticker(
+                            parser, ticker, filing_types, bulk=bulk, pool=pool
+                        )
+                        total_upserted += upserted
+                        total_failed += failed
+                        print(f"[{ticker}] upserted={upserted} failed={failed}")
+                    except SECFilingParserError:
+                        print(f"[{ticker}] not found in SEC EDGAR. Skipping.")
+                    conn.commit()
+    finally:
+        if pool is not None:
+            pool.shutdown()
+            rate_limiter.MIN_INTERVAL = base_interval
     return total_upserted, total_failed
 
-def open_parser(conn, max_retries=3, timeout=30.0) -> SECFilingParser:
-    return SECFilingParser(conn, max_retries=max_retries, timeout=timeout)
+def open_parser(
+    conn, max_retries=3, timeout=30.0, facts_only=False, extractor="arelle",
+) -> SECFilingParser:
+    return SECFilingParser(
+        conn, max_retries=max_retries, timeout=timeout,
+        facts_only=facts_only, extractor=extractor,
+    )
 
 def main(argv: Sequence[str] | None = None) -> int:
     logging.basicConfig(level=logging.INFO)
@@ -155,6 +357,29 @@ def main(argv: Sequence[str] | None = None) -> int:
         default=30.0,
         help="HTTP timeout in seconds. Default = 30s",
     )
+    ap.add_argument(
+        "--bulk",
+        action="store_true",
+        help="Store facts with binary COPY into a staging table and one set-based merge.",
+    )
+    ap.add_argument(
+        "--parse-workers",
+        type=int,
+        default=1,
+        help="Worker processes parsing filings concurrently. Default = 1 (in-process)",
+    )
+    ap.add_argument(
+        "--facts-only",
+        action="store_true",
+        help="Skip Arelle validation, formulas and label/presentation/calculation/definition linkbases.",
+    )
+    ap.add_argument(
+        "--extractor",
+        choices=("arelle", "native"),
+        default="arelle",
+        help="Fact extractor. 'native' streams inline XBRL without Arelle "
+             "(non-inline filings still use Arelle). Default = arelle",
+    )
     args = ap.parse_args(argv)
 
     # resolve ticker set from all sources.
@@ -183,6 +408,10 @@ def main(argv: Sequence[str] | None = None) -> int:
         filing_types=tuple(args.filing_types),
         max_retries=args.max_retries,
         timeout=args.timeout,
+        bulk=args.bulk,
+        parse_workers=args.parse_workers,
+        facts_only=args.facts_only,
+        extractor=args.extractor,
     )
     print(f"\nDone. Total upserted: {total_upserted}, total failed: {total_failed}")
 
@@ -0,0 +1,270 @@
+"""cross-sectional screens: resolve metrics for every company in one SQL pass"""
+import argparse
+import logging
+import operator
+import re
+import sys
+from collections.abc import Callable, Sequence
+from datetime import date
+
+from db_setup import get_cursor
+from models import ScreenResult
+from splits import split_adjust_value
+
+logger = logging.getLogger(__name__)
+
+# query.resolve()'s ranking and period rules, over every company and metric at
+# once: each company's mapped qnames are ranked per metric by priority, the
+# best-ranked qname per filing wins, and rows are deduped per period. series
+# already materialized in resolved_metrics are read from there and only the
+# rest are ranked live. the final DISTINCT ON keeps one value per (company,
+# metric, period end) -- the shortest period, which only matters for
+# query_type 'all' (quarter vs year-to-date).
+_SCREEN_SQL = """
+WITH
+mapped AS (
+    SELECT mm.cik, mm.metric_key, k.id AS concept_id,
+           rank() OVER (
+               PARTITION BY mm.cik, mm.metric_key ORDER BY mm.priority, mm.qname
+           ) AS qname_rank
+    FROM metric_mappings mm
+    JOIN metrics m ON m.key = mm.metric_key
+    JOIN companies c ON c.cik = mm.cik
+    JOIN concepts k ON k.qname = mm.qname
+    WHERE mm.metric_key = ANY(%(metrics)s::text[])
+        AND m.format_type <> 'text'
+        AND (%(tickers)s::text[] IS NULL OR c.ticker = ANY(%(tickers)s::text[]))
+        AND NOT EXISTS (
+            SELECT 1 FROM resolved_metric_state s
+            WHERE s.cik = mm.cik AND s.metric_key = mm.metric_key
+        )
+),
+ranked_facts AS (
+    SELECT
+        mp.cik,
+        mp.metric_key,
+        f.value,
+        f.instant_date,
+        f.start_date,
+        f.end_date,
+        f.unit,
+        f.accession_number,
+        COALESCE(sf.factor, 1.0) AS split_factor,
+        mp.qname_rank
+    FROM mapped mp
+    JOIN numerical f
+        ON f.cik = mp.cik AND f.concept_id = mp.concept_id
+    LEFT JOIN split_factors sf
+        ON sf.cik = f.cik AND sf.accession_number = f.accession_number
+),
+best_qname_per_filing AS (
+    SELECT cik, metric_key, accession_number, MIN(qname_rank) AS best_rank
+    FROM ranked_facts
+    GROUP BY cik, metric_key, accession_number
+),
+filtered_facts AS (
+    SELECT rf.*
+    FROM ranked_facts rf
+    JOIN best_qname_per_filing bq
+        ON rf.cik = bq.cik
+        AND rf.metric_key = bq.metric_key
+        AND rf.accession_number = bq.accession_number
+        AND rf.qname_rank = bq.best_rank
+    WHERE
+        rf.instant_date IS NOT NULL
+        OR (rf.start_date IS NOT NULL AND rf.end_date IS NOT NULL AND (
+            %(query_type)s = 'all'
+            OR (%(query_type)s = 'annual'    AND (rf.end_date - rf.start_date) > 350)
+            OR (%(query_type)s = 'quarterly' AND (rf.end_date - rf.start_date) < 100)
+        ))
+),
+deduped AS (
+    SELECT DISTINCT ON (cik, metric_key, instant_date, start_date, end_date)
+        cik, metric_key, value, unit, split_factor,
+        COALESCE(end_date, instant_date) AS period_end,
+        COALESCE(end_date - start_date, 0) AS span
+    FROM filtered_facts
+    ORDER BY cik, metric_key, instant_date, start_date, end_date, accession_number
+),
+resolved AS (
+    SELECT d.cik, d.metric_key, d.value, d.unit, d.split_factor, d.period_end, d.span
+    FROM deduped d
+    UNION ALL
+    SELECT r.cik, r.metric_key, r.value, r.unit, COALESCE(sf.factor, 1.0),
+           COALESCE(r.end_date, r.instant_date),
+           COALESCE(r.end_date - r.start_date, 0)
+    FROM resolved_metrics r
+    JOIN companies c ON c.cik = r.cik
+    LEFT JOIN split_factors sf
+        ON sf.cik = r.cik AND sf.accession_number = r.accession_number
+    WHERE r.metric_key = ANY(%(metrics)s::text[])
+        AND r.query_type = %(query_type)s
+        AND (%(tickers)s::text[] IS NULL OR c.ticker = ANY(%(tickers)s::text[]))
+        -- resolve() also keeps undated facts; a screen has no period for them
+        AND (r.instant_date IS NOT NULL OR r.end_date IS NOT NULL)
+)
+SELECT DISTINCT ON (c.ticker, d.period_end, d.metric_key)
+    c.ticker, d.period_end, d.metric_key, d.value, d.unit, d.split_factor
+FROM resolved d
+JOIN companies c ON c.cik = d.cik
+ORDER BY c.ticker, d.period_end DESC, d.metric_key, d.span
+"""
+
+_METRIC_FORMATS_SQL = "SELECT key, format_type FROM metrics WHERE key = ANY(%s::text[])"
+
+_OPERATORS: dict[str, Callable[[float, float], bool]] = {
+    ">=": operator.ge,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    "<": operator.lt,
+}
+
+_FILTER = re.compile(r"^\s*([A-Za-z_]\w*)\s*(>=|<=|==|!=|>|<)\s*(\S+)\s*$")
+
+
+class ScreenFilter:
+    """one `metric <op> number|metric` comparison, e.g. `revenue > 1e9`."""
+
+    def __init__(self, expr: str):
+        m = _FILTER.match(expr)
+        if not m:
+            raise ValueError(f"Invalid filter {expr!r}; expected e.g. 'revenue > 1e9'")
+        self.expr = expr.strip()
+        self.metric, op, rhs = m.groups()
+        self._op = _OPERATORS[op]
+        try:
+            self.value: float | None = float(rhs)
+            self.other: str | None = None
+        except ValueError:
+            if not re.fullmatch(r"[A-Za-z_]\w*", rhs):
+                raise ValueError(f"Invalid filter operand {rhs!r} in {expr!r}") from None
+            self.value, self.other = None, rhs
+
+    @property
+    def metrics(self) -> list[str]:
+        return [self.metric] + ([self.other] if self.other else [])
+
+    def matches(self, row: dict[str, float | None]) -> bool:
+        """unreported values never match."""
+        left = row.get(self.metric)
+        right = row.get(self.other) if self.other else self.value
+        if left is None or right is None:
+            return False
+        return self._op(left, right)
+
+
+def _numeric(value: float | None, unit: str | None, factor: float, adjust_splits: bool) -> float | None:
+    return split_adjust_value(value, unit, factor) if adjust_splits else value
+
+
+def screen(
+    metrics: Sequence[str],
+    query_type: str = "annual",
+    filters: Sequence[str] = (),
+    tickers: Sequence[str] | None = None,
+    latest: bool = False,
+    adjust_splits: bool = True,
+) -> ScreenResult:
+    """
+    resolve numeric `metrics` for every company (or just `tickers`) in one
+    query, using each company's metric_mappings exactly like query.resolve().
+    rows are (ticker, period end) pairs, newest period first per ticker;
+    `latest` keeps only each ticker's most recent period before filtering.
+    `filters` are `metric <op> number|metric` expressions that must all
+    hold; metrics they reference are fetched even if not listed.
+    """
+    parsed = [ScreenFilter(f) for f in filters]
+    wanted = list(dict.fromkeys([*metrics, *(m for f in parsed for m in f.metrics)]))
+    if not wanted:
+        raise ValueError("No metrics to screen")
+
+    with get_cursor(write=False) as cursor:
+        cursor.execute(_METRIC_FORMATS_SQL, (wanted,))
+        formats = dict(cursor.fetchall())
+        unknown = [m for m in wanted if m not in formats]
+        if unknown:
+            raise ValueError(f"Unknown metric(s): {', '.join(unknown)}")
+        text = [m for m in wanted if formats[m] == "text"]
+        if text:
+            raise ValueError(f"Text metrics can't be screened: {', '.join(text)}")
+
+        cursor.execute(_SCREEN_SQL, {
+            "metrics": wanted,
+            "tickers": [t.upper() for t in tickers] if tickers else None,
+            "query_type": query_type,
+        })
+        raw = cursor.fetchall()
+
+    # pivot (ticker, period, metric) rows into one row per (ticker, period)
+    grid: dict[tuple[str, date], dict[str, float | None]] = {}
+    for ticker, period, metric, value, unit, factor in raw:
+        grid.setdefault((ticker, period), {})[metric] = _numeric(value, unit, factor, adjust_splits)
+
+    keys = list(grid)
+    if latest:
+        seen: set[str] = set()
+        keys = [k for k in keys if not (k[0] in seen or seen.add(k[0]))]
+    keys = [k for k in keys if all(f.matches(grid[k]) for f in parsed)]
+
+    return ScreenResult(
+        metrics=tuple(wanted),
+        tickers=[t for t, _ in keys],
+        periods=[p for _, p in keys],
+        columns={m: [grid[k].get(m) for k in keys] for m in wanted},
+    )
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    logging.basicConfig(level=logging.INFO)
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument("metrics", nargs="+", help="Catalog metric keys to resolve, e.g. revenue net.")
+    ap.add_argument(
+        "--type",
+        dest="query_type",
+        choices=("annual", "quarterly", "all"),
+        default="annual",
+        help="Period filter. Default = annual",
+    )
+    ap.add_argument(
+        "-w", "--where",
+        action="append",
+        dest="filters",
+        metavar="EXPR",
+        default=[],
+        help="Filter such as 'revenue > 1e9' or 'net > operating'. May be repeated.",
+    )
+    ap.add_argument(
+        "-t", "--ticker",
+        action="append",
+        dest="tickers",
+        metavar="SYMBOL",
+        help="Restrict the screen to these tickers. May be repeated.",
+    )
+    ap.add_argument(
+        "--latest",
+        action="store_true",
+        help="Keep only each ticker's most recent period.",
+    )
+    args = ap.parse_args(argv)
+
+    try:
+        result = screen(
+            args.metrics, query_type=args.query_type, filters=args.filters,
+            tickers=args.tickers, latest=args.latest,
+        )
+    except ValueError as e:
+        ap.error(str(e))  # exits with status 2
+
+    print("\t".join(("ticker", "period", *result.metrics)))
+    for ticker, period, *values in result.rows():
+        cells = ["" if v is None else f"{v:g}" for v in values]
+        print("\t".join((ticker, period.isoformat(), *cells)))
+    print(f"\n{len(result)} row(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""asyncio client for SEC EDGAR endpoints"""
+import logging
+from typing import Any
+
+import httpx
+from models import FilingFetchError
+import config
+import rate_limiter
+
+try:  # HTTP/2 needs the optional `h2` package (pip install httpx[http2])
+    import h2  # noqa: F401
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
+
+logger = logging.getLogger(__name__)
+
+class AsyncSECClient:
+    """
+    httpx.AsyncClient wrapper for SEC EDGAR: HTTP/2 + keep-alive when
+    available, and every request paced by a shared AsyncTokenBucket so many
+    requests can be in flight without exceeding SEC's rate ceiling.
+    """
+    def __init__(
+        self,
+        max_retries: int = 3,
+        timeout: float = 30.0,
+        headers: dict[str, str] | None = None,
+        limiter: rate_limiter.AsyncTokenBucket | None = None,
+        max_connections: int = 20,
+    ):
+        self._limiter = limiter or rate_limiter.AsyncTokenBucket()
+        self._client = httpx.AsyncClient(
+            http2=HTTP2,
+            timeout=timeout,
+            headers=headers or config.sec_headers(),
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            transport=httpx.AsyncHTTPTransport(retries=max_retries, http2=HTTP2),
+        )
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def __aenter__(self) -> "AsyncSECClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def get(self, url: str, headers: dict[str, str] | None = None) -> httpx.Response:
+        """rate-limited GET; raises FilingFetchError on http issues."""
+        await self._limiter.acquire(url)
+        try:
+            r = await self._client.get(url, headers=headers)
+            r.raise_for_status()
+            return r
+        except httpx.HTTPError as e:
+            raise FilingFetchError(f"Request failed for {url}: {e}") from e
+
+    async def get_json(self, url: str) -> Any:
+        return (await self.get(url)).json()
+
+    async def get_company_facts(self, cik: str) -> Any:
+        return await self.get_json(config.SEC_COMPANY_FACTS_URL.format(cik=cik))
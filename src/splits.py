@@ -0,0 +1,175 @@
+"""materialized per-filing stock-split factors, maintained at numerical ingest time"""
+import logging
+import sys
+from collections import defaultdict
+from datetime import date
+from statistics import median
+
+from psycopg import Connection
+
+logger = logging.getLogger(__name__)
+
+SPLIT_REF_QNAMES = (
+    "us-gaap:WeightedAverageNumberOfDilutedSharesOutstanding",
+    "us-gaap:WeightedAverageNumberOfSharesOutstandingBasic",
+    "us-gaap:WeightedAverageNumberOfShareOutstandingBasicAndDiluted",
+)
+
+# rows of the first SPLIT_REF_QNAMES concept the company reports at all
+SPLIT_REF_SQL = """
+    WITH ref AS (
+        SELECT f.accession_number, f.filed_date, f.start_date, f.end_date, f.value,
+               array_position(%s::text[], k.qname::text) AS ref_rank
+        FROM numerical f
+        JOIN concepts k ON k.id = f.concept_id
+        WHERE f.cik = %s
+          AND k.qname = ANY(%s::text[])
+          AND f.start_date IS NOT NULL
+          AND f.end_date IS NOT NULL
+          AND f.filed_date IS NOT NULL
+    )
+    SELECT accession_number, filed_date, start_date, end_date, value
+    FROM ref
+    WHERE ref_rank = (SELECT MIN(ref_rank) FROM ref)
+"""
+
+# digest of the share-count rows now on file vs. the one the stored factors
+# were built from. it covers every column the factors depend on, so restated
+# values and moved accessions count as changes, not just added rows.
+_SPLIT_REF_STATE_SQL = """
+    SELECT c.split_ref_digest, (
+        SELECT md5(string_agg(
+                   concat_ws('|', k.qname, f.accession_number, f.filed_date,
+                             f.start_date, f.end_date, f.value),
+                   ',' ORDER BY k.qname, f.accession_number, f.filed_date,
+                                f.start_date, f.end_date, f.value))
+        FROM numerical f
+        JOIN concepts k ON k.id = f.concept_id
+        WHERE f.cik = c.cik AND k.qname = ANY(%s::text[])
+    )
+    FROM companies c
+    WHERE c.cik = %s
+"""
+
+_SPLIT_FACTOR_INSERT_SQL = """
+INSERT INTO split_factors (cik, accession_number, factor) VALUES (%s, %s, %s)
+"""
+
+
+def chain_split_factors(rows: list[tuple]) -> dict[str, float]:
+    """
+    per-filing split-adjustment factors that normalize every filing's per-share
+    basis onto the *latest* filing's basis, derived purely from overlapping
+    share-count facts (no external split data needed).
+
+    the same historical period reported in two filings differs only by the
+    stock splits that happened between them, so the ratio of its share counts
+    is exactly that cumulative split factor. we chain those ratios across
+    overlapping filings back to the newest one (factor 1.0).
+
+    `rows` are SPLIT_REF_SQL rows. returns {accession_number: factor}. for a
+    SHARE COUNT multiply the value by the factor; for a PER-SHARE value divide
+    by it. accessions absent from the map should be treated as 1.0.
+    """
+    if not rows:
+        return {}
+
+    filed: dict[str, date] = {}
+    raw: dict[str, dict[tuple, list[float]]] = defaultdict(lambda: defaultdict(list))
+    for accn, filed_date, start, end, value in rows:
+        if value is None or value <= 0:
+            continue
+        filed[accn] = filed_date
+        raw[accn][(start, end)].append(value)
+
+    series: dict[str, dict[tuple, float]] = {
+        accn: {period: median(vals) for period, vals in periods.items()}
+        for accn, periods in raw.items()
+    }
+    if not series:
+        return {}
+
+    # process newest-filed first; anchor it at 1.0 and chain older ones onto it.
+    accns = sorted(series, key=lambda a: (filed[a], a), reverse=True)
+    factor: dict[str, float] = {accns[0]: 1.0}
+    processed: list[str] = [accns[0]]
+
+    for a in accns[1:]:
+        implied: list[float] = []
+        for b in processed:
+            shared = set(series[a]) & set(series[b])
+            ratios = [series[b][p] / series[a][p] for p in shared if series[a][p] > 0]
+            if ratios:
+                implied.append(factor[b] * median(ratios))
+        # fall back to the nearest newer filing's basis when nothing overlaps
+        # (e.g. a lone quarterly period): assume no split in the gap.
+        factor[a] = median(implied) if implied else factor[processed[-1]]
+        processed.append(a)
+
+    return factor
+
+
+def split_adjust_value(value, unit: str | None, factor: float):
+    """
+    re-express one value on the latest split basis, by unit type. only
+    numerical facts carry a factor other than 1.0, so anything else passes
+    through untouched.
+    """
+    if factor == 1.0 or value is None:
+        return value
+    u = (unit or "").lower()
+    if u == "shares":
+        return value * factor       # more shares outstanding post-split
+    if u.endswith("/shares"):
+        return value / factor       # e.g. USD/shares (EPS) shrinks post-split
+    return value                    # dollars, ratios, pure numbers: unaffected
+
+
+def refresh_split_factors(conn: Connection, cik: str, force: bool = False) -> bool:
+    """
+    rebuild `cik`'s rows in split_factors when its share-count facts changed
+    since they were last computed (or always, with `force`). runs in the
+    caller's transaction. returns True if the factors were recomputed.
+    """
+    qnames = list(SPLIT_REF_QNAMES)
+    with conn.cursor() as cur:
+        cur.execute(_SPLIT_REF_STATE_SQL, (qnames, cik))
+        row = cur.fetchone()
+        if row is None:
+            return False
+        computed_from, ref_digest = row
+        if not force and computed_from == ref_digest:
+            return False
+
+        cur.execute(SPLIT_REF_SQL, (qnames, cik, qnames))
+        factors = chain_split_factors(cur.fetchall())
+        cur.execute("DELETE FROM split_factors WHERE cik = %s", (cik,))
+        # 1.0 is the implied default, so only adjusted filings are stored
+        params = [(cik, accn, f) for accn, f in factors.items() if f != 1.0]
+        if params:
+            cur.executemany(_SPLIT_FACTOR_INSERT_SQL, params)
+        cur.execute(
+            "UPDATE companies SET split_ref_digest = %s WHERE cik = %s", (ref_digest, cik)
+        )
+    logger.info(" Recomputed split factors for %s: %d adjusted filing(s)", cik, len(params))
+    return True
+
+
+def main() -> int:
+    """backfill split_factors for every company; pass --force to rebuild all."""
+    from db_setup import get_connection
+
+    logging.basicConfig(level=logging.INFO)
+    force = "--force" in sys.argv[1:]
+    with get_connection() as conn:
+        ciks = [r[0] for r in conn.execute("SELECT cik FROM companies ORDER BY cik")]
+        rebuilt = 0
+        for cik in ciks:
+            rebuilt += refresh_split_factors(conn, cik, force=force)
+            conn.commit()
+    print(f"Recomputed split factors for {rebuilt} of {len(ciks)} company(ies).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,14 +2,118 @@
 import hashlib
 import json
 import logging
+from collections.abc import Iterable
+from dataclasses import replace
+from itertools import islice
 from psycopg import Connection
 from models import Filing, TextualFact, NumericalFact
 
 logger = logging.getLogger(__name__)
 
-def compute_textual_fact_hash(f: TextualFact) -> str:
-    """unique identity for deduplication"""
-    dims = json.dumps(f.dimensions, sort_keys=True, separators=(",", ":"))
+# manifest entry_file of a legacy filing whose archive has no xbrl instance
+NO_ENTRY_FILE = "-"
+
+_FILING_UPSERT_SQL = """
+INSERT INTO filings (cik, accession_number, entry_file, form_type, filed_date, byte_size)
+VALUES (%s, %s, %s, %s, %s, %s)
+ON CONFLICT (cik, accession_number) DO UPDATE SET
+  entry_file = COALESCE(filings.entry_file, EXCLUDED.entry_file),
+  form_type = COALESCE(filings.form_type, EXCLUDED.form_type),
+  filed_date = COALESCE(filings.filed_date, EXCLUDED.filed_date),
+  byte_size = COALESCE(filings.byte_size, EXCLUDED.byte_size)
+WHERE (filings.entry_file IS NULL AND EXCLUDED.entry_file IS NOT NULL)
+   OR (filings.form_type IS NULL AND EXCLUDED.form_type IS NOT NULL)
+   OR (filings.filed_date IS NULL AND EXCLUDED.filed_date IS NOT NULL)
+   OR (filings.byte_size IS NULL AND EXCLUDED.byte_size IS NOT NULL)
+"""
+
+_FILING_STATE_SQL = """
+UPDATE filings SET
+  ingest_state = %s,
+  fact_count = %s,
+  failed_count = %s,
+  parse_ms = %s,
+  store_ms = %s,
+  updated_at = now()
+WHERE cik = %s AND accession_number = %s
+"""
+
+def _ensure_company_and_filings(
+    conn: Connection,
+    cik: str,
+    ticker: str,
+    filing_params: list[tuple],
+) -> None:
+    """
+    ensure the company + filings rows exist before we add facts pointing at
+    them. each param is (cik, accession_number, entry_file, form_type,
+    filed_date, byte_size); known manifest fields fill in missing ones.
+    """
+    with conn.cursor() as cur:
+        cur.execute("SELECT 1 FROM companies WHERE cik = %s", (cik,))
+        if not cur.fetchall():
+            cur.execute(
+                """
+                INSERT INTO companies (cik, ticker) VALUES (%s, %s)
+                  ON CONFLICT (cik) DO NOTHING
+                """,
+                (cik, ticker),
+            )
+        cur.executemany(_FILING_UPSERT_SQL, filing_params)
+
+def _filing_params(filings: Iterable[Filing]) -> list[tuple]:
+    return [
+        (f.cik, f.accession_number, f.entry_file or None, f.filing_type, f.filed_date, f.size)
+        for f in filings
+    ]
+
+def _numerical_filing_params(facts: Iterable[NumericalFact]) -> list[tuple]:
+    """one filings row per accession, with the form and filed date Company Facts reports."""
+    seen: dict[tuple[str, str], tuple] = {}
+    for f in facts:
+        key = (f.cik, f.accession_number)
+        if key not in seen:
+            seen[key] = (f.cik, f.accession_number, None, f.form, f.filed_date, None)
+    return [seen[k] for k in sorted(seen)]
+
+def register_filings(conn: Connection, cik: str, ticker: str, filings: list[Filing]) -> None:
+    """record filings about to be parsed in the manifest (ingest_state 'pending')."""
+    if filings:
+        _ensure_company_and_filings(conn, cik, ticker, _filing_params(filings))
+
+def record_missing_entry_files(conn: Connection, cik: str, ticker: str, filings: list[Filing]) -> None:
+    """record legacy filings with no xbrl instance so later runs don't probe them again."""
+    register_filings(conn, cik, ticker, [replace(f, entry_file=NO_ENTRY_FILE) for f in filings])
+
+def set_filing_state(
+    conn: Connection,
+    filing: Filing,
+    state: str,
+    fact_count: int | None = None,
+    failed_count: int | None = None,
+    parse_ms: int | None = None,
+    store_ms: int | None = None,
+) -> None:
+    """move a filing's manifest row to `state` (pending/parsing/stored/failed)."""
+    with conn.cursor() as cur:
+        cur.execute(
+            _FILING_STATE_SQL,
+            (state, fact_count, failed_count, parse_ms, store_ms,
+             filing.cik, filing.accession_number),
+        )
+
+def _dimensions_json(f: TextualFact) -> str:
+    """canonical JSON for a fact's dimensions (feeds both the fact key and the row)."""
+    return json.dumps(f.dimensions, sort_keys=True, separators=(",", ":"))
+
+def compute_textual_fact_key(f: TextualFact, dims: str | None = None) -> bytes:
+    """
+    16-byte identity for deduplication: the leading half of the SHA-256 the
+    old hex fact_hash spelled out, so migrated rows keep their keys. pass
+    `dims` if already serialised.
+    """
+    if dims is None:
+        dims = _dimensions_json(f)
 
     # excludes value
     data = (
@@ -19,7 +123,7 @@ def compute_textual_fact_hash(f: TextualFact) -> str:
         f"{f.instant_date}|{f.start_date}|{f.end_date}|"
         f"{dims}"
     )
-    return hashlib.sha256(data.encode("utf-8")).hexdigest()[:64]
+    return hashlib.sha256(data.encode("utf-8")).digest()[:16]
 
 def _build_textual_fact_params(facts: list[TextualFact]) -> tuple[list[tuple], int]:
     """
@@ -32,9 +136,10 @@ def _build_textual_fact_params(facts: list[TextualFact]) -> tuple[list[tuple], i
     failed = 0
     for fact in facts:
         try:
+            dims = _dimensions_json(fact)
             params.append(
                 (
-                    compute_textual_fact_hash(fact),
+                    compute_textual_fact_key(fact, dims),
                     fact.cik,
                     fact.accession_number,
                     fact.qname,
@@ -45,7 +150,7 @@ def _build_textual_fact_params(facts: list[TextualFact]) -> tuple[list[tuple], i
                     fact.instant_date,
                     fact.start_date,
                     fact.end_date,
-                    json.dumps(fact.dimensions, sort_keys=True, separators=(",", ":")),
+                    dims,
                 )
             )
         except Exception:
@@ -58,13 +163,15 @@ def _build_textual_fact_params(facts: list[TextualFact]) -> tuple[list[tuple], i
             )
     return params, failed
 
-_TEXTUAL_UPSERT_SQL = """
-INSERT INTO textual (
-  fact_hash, cik, accession_number, qname, namespace,
+# column order of the tuples built by _build_textual_fact_params()
+_TEXTUAL_COLUMNS = """
+  fact_key, cik, accession_number, qname, namespace,
   local_name, period_type, value, instant_date, start_date,
   end_date, dimensions
-) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-ON CONFLICT (fact_hash) DO UPDATE SET
+"""
+
+_TEXTUAL_CONFLICT_SQL = """
+ON CONFLICT (cik, fact_key) DO UPDATE SET
   accession_number = CASE
     WHEN EXCLUDED.accession_number > textual.accession_number
       THEN EXCLUDED.accession_number
@@ -77,6 +184,52 @@ ON CONFLICT (fact_hash) DO UPDATE SET
   END
 """
 
+_TEXTUAL_UPSERT_SQL = f"""
+INSERT INTO textual ({_TEXTUAL_COLUMNS})
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+{_TEXTUAL_CONFLICT_SQL}
+"""
+
+# dimensions stage as TEXT: the JSON is already serialised once in Python and
+# is cast to jsonb by the server during the merge.
+_TEXTUAL_STAGING_DDL = """
+CREATE TEMP TABLE IF NOT EXISTS textual_staging (
+    fact_key BYTEA NOT NULL,
+    cik VARCHAR(10) NOT NULL,
+    accession_number VARCHAR(20) NOT NULL,
+    qname VARCHAR(300) NOT NULL,
+    namespace VARCHAR(512) NOT NULL,
+    local_name VARCHAR(256) NOT NULL,
+    period_type VARCHAR(10) NOT NULL,
+    value TEXT,
+    instant_date DATE,
+    start_date DATE,
+    end_date DATE,
+    dimensions TEXT NOT NULL,
+    seq BIGSERIAL
+) ON COMMIT DELETE ROWS
+"""
+
+# binary COPY needs the wire type of every column up front
+_TEXTUAL_STAGING_TYPES = (
+    "bytea", "varchar", "varchar", "varchar", "varchar",
+    "varchar", "varchar", "text", "date", "date",
+    "date", "text",
+)
+
+# highest accession number wins within the load, matching the ON CONFLICT rule;
+# on a tie the first row copied wins, as it would under executemany.
+_TEXTUAL_MERGE_SQL = f"""
+INSERT INTO textual ({_TEXTUAL_COLUMNS})
+SELECT DISTINCT ON (fact_key)
+  fact_key, cik, accession_number, qname, namespace,
+  local_name, period_type, value, instant_date, start_date,
+  end_date, dimensions::jsonb
+FROM textual_staging
+ORDER BY fact_key, accession_number DESC, seq
+{_TEXTUAL_CONFLICT_SQL}
+"""
+
 def store_textual_facts(
     conn: Connection,
     filings: list[Filing],
@@ -92,24 +245,9 @@ def store_textual_facts(
     upserted = failed = 0
     cik = facts[0].cik
     ticker = facts[0].ticker
-    filing_params = [(filing.cik, filing.accession_number) for filing in filings]
+    filing_params = _filing_params(filings)
 
-    # Ensure the company + filings rows exist before we add facts pointing at them.
-    with conn.cursor() as cur:
-        cur.execute("SELECT 1 FROM companies WHERE cik = %s", (cik,))
-        if not cur.fetchall():
-            cur.execute(
-                """
-                INSERT INTO companies (cik, ticker) VALUES (%s, %s)
-                  ON CONFLICT (cik) DO NOTHING
-                """,
-                (cik, ticker),
-            )
-        cur.executemany(
-            "INSERT INTO filings (cik, accession_number) VALUES (%s, %s) "
-            "ON CONFLICT DO NOTHING",
-            filing_params,
-        )
+    _ensure_company_and_filings(conn, cik, ticker, filing_params)
 
     for i in range(0, len(facts), batch_size):
         batch = facts[i : i + batch_size]
@@ -132,18 +270,84 @@ def store_textual_facts(
             )
     return upserted, failed
 
-def compute_numerical_fact_hash(f: NumericalFact) -> str:
+def store_textual_facts_bulk(
+    conn: Connection,
+    filings: list[Filing],
+    facts: list[TextualFact],
+) -> tuple[int, int]:
     """
-    unique identity for deduplication.
+    bulk variant of store_textual_facts(): binary COPY into a temp staging
+    table, then one set-based merge with the same accession-number-wins
+    rules. all-or-nothing per call; returns `(upserted, failed)`.
     """
-    data = (
-        f"{f.cik}|{f.taxonomy}:{f.fname}|{f.unit}|"
-        f"{f.period_type.value}|"
-        f"{f.instant_date}|{f.start_date}|{f.end_date}"
-    )
-    return hashlib.sha256(data.encode("utf-8")).hexdigest()[:64]
+    if not facts:
+        return 0, 0
+
+    cik = facts[0].cik
+    ticker = facts[0].ticker
+    filing_params = _filing_params(filings)
+    _ensure_company_and_filings(conn, cik, ticker, filing_params)
+
+    params, failed = _build_textual_fact_params(facts)
+    if not params:
+        return 0, failed
+
+    try:
+        with conn.transaction():
+            with conn.cursor() as cur:
+                cur.execute(_TEXTUAL_STAGING_DDL)
+                cur.execute("TRUNCATE textual_staging")
+                with cur.copy(
+                    f"COPY textual_staging ({_TEXTUAL_COLUMNS}) FROM STDIN (FORMAT BINARY)"
+                ) as copy:
+                    copy.set_types(_TEXTUAL_STAGING_TYPES)
+                    for row in params:
+                        copy.write_row(row)
+                cur.execute(_TEXTUAL_MERGE_SQL)
+    except Exception:
+        logger.error(
+            "Failed to bulk load %d textual fact(s) for CIK %s — skipping",
+            len(params), cik,
+            exc_info=True,
+        )
+        return 0, failed + len(params)
+    return len(params), failed
+
+# every concept in `wanted` that already exists or was just inserted. rows a
+# concurrent writer committed while this statement ran are invisible to it, so
+# _concept_ids() repeats it for whatever came back missing.
+_CONCEPT_IDS_SQL = """
+WITH wanted AS (
+  SELECT * FROM unnest(%s::text[], %s::text[]) AS w(taxonomy, fname)
+),
+added AS (
+  INSERT INTO concepts (taxonomy, fname)
+  SELECT taxonomy, fname FROM wanted
+  ON CONFLICT (taxonomy, fname) DO NOTHING
+  RETURNING id, taxonomy, fname
+)
+SELECT id, taxonomy, fname FROM added
+UNION ALL
+SELECT k.id, k.taxonomy, k.fname FROM concepts k JOIN wanted w USING (taxonomy, fname)
+"""
+
+def _concept_ids(conn: Connection, facts: Iterable[NumericalFact]) -> dict[tuple[str, str], int]:
+    """(taxonomy, fname) -> concepts.id for every fact, adding unseen concepts."""
+    # sorted so concurrent writers take the unique-index locks in the same order
+    missing = sorted({(f.taxonomy, f.fname) for f in facts})
+    ids: dict[tuple[str, str], int] = {}
+    with conn.cursor() as cur:
+        for _ in range(3):
+            if not missing:
+                break
+            cur.execute(_CONCEPT_IDS_SQL, ([t for t, _ in missing], [n for _, n in missing]))
+            ids.update(((t, n), i) for i, t, n in cur.fetchall())
+            missing = [k for k in missing if k not in ids]
+    return ids
 
-def _build_numerical_fact_params(facts: list[NumericalFact]) -> tuple[list[tuple], int]:
+def _build_numerical_fact_params(
+    facts: list[NumericalFact], concept_ids: dict[tuple[str, str], int]
+) -> tuple[list[tuple], int]:
     """
     serialise company facts into executemany param tuples.
     """
@@ -153,11 +357,9 @@ def _build_numerical_fact_params(facts: list[NumericalFact]) -> tuple[list[tuple
         try:
             params.append(
                 (
-                    compute_numerical_fact_hash(fact),
                     fact.cik,
                     fact.accession_number,
-                    fact.taxonomy,
-                    fact.fname,
+                    concept_ids[(fact.taxonomy, fact.fname)],
                     fact.unit,
                     fact.value,
                     fact.period_type.value,
@@ -199,13 +401,59 @@ _numerical_set_clause = ",\n  ".join(
     for col in _NUMERICAL_LATEST_WINS_COLUMNS
 )
 
-_NUMERICAL_UPSERT_SQL = f"""
-INSERT INTO numerical (
-  fact_hash, cik, accession_number, taxonomy, fname,
+# column order of the tuples built by _build_numerical_fact_params()
+_NUMERICAL_COLUMNS = """
+  cik, accession_number, concept_id,
   unit, value, period_type, instant_date, start_date,
   end_date, fiscal_year, fiscal_period, form, filed_date
-) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-ON CONFLICT (fact_hash) DO UPDATE SET
+"""
+
+# a fact's identity (numerical_fact_key): everything but the filing it was
+# last reported in and the reported value itself
+_NUMERICAL_KEY = "cik, concept_id, unit, period_type, instant_date, start_date, end_date"
+
+_NUMERICAL_UPSERT_SQL = f"""
+INSERT INTO numerical ({_NUMERICAL_COLUMNS})
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+ON CONFLICT ON CONSTRAINT numerical_fact_key DO UPDATE SET
+  {_numerical_set_clause}
+"""
+
+# temp tables are never WAL-logged; ON COMMIT DELETE ROWS empties it between
+# transactions so the next load always starts from a clean slate.
+_NUMERICAL_STAGING_DDL = """
+CREATE TEMP TABLE IF NOT EXISTS numerical_staging (
+    cik VARCHAR(10) NOT NULL,
+    accession_number VARCHAR(20) NOT NULL,
+    concept_id INTEGER NOT NULL,
+    unit VARCHAR(100) NOT NULL,
+    value DOUBLE PRECISION,
+    period_type VARCHAR(10) NOT NULL,
+    instant_date DATE,
+    start_date DATE,
+    end_date DATE,
+    fiscal_year INTEGER,
+    fiscal_period VARCHAR(2),
+    form VARCHAR(20),
+    filed_date DATE,
+    seq BIGSERIAL
+) ON COMMIT DELETE ROWS
+"""
+
+# a single INSERT ... ON CONFLICT can't touch the same target row twice, and
+# Company Facts repeats a period in every filing that reports it, so collapse
+# the staging rows to one per fact key first using the same ordering as
+# PREFER_EXCLUDED (latest filed_date, then highest accession number, then
+# the first row copied, as under executemany).
+_NUMERICAL_MERGE_SQL = f"""
+INSERT INTO numerical ({_NUMERICAL_COLUMNS})
+SELECT DISTINCT ON ({_NUMERICAL_KEY}) {_NUMERICAL_COLUMNS}
+FROM numerical_staging
+ORDER BY {_NUMERICAL_KEY},
+  COALESCE(filed_date, '-infinity'::date) DESC,
+  accession_number DESC,
+  seq
+ON CONFLICT ON CONSTRAINT numerical_fact_key DO UPDATE SET
   {_numerical_set_clause}
 """
 
@@ -227,28 +475,14 @@ def store_numerical_facts(
     upserted = failed = 0
     cik = facts[0].cik
     ticker = facts[0].ticker
-    filing_params = sorted({(f.cik, f.accession_number) for f in facts})
+    filing_params = _numerical_filing_params(facts)
 
-    # Ensure the company + filings rows exist before we add facts pointing at them.
-    with conn.cursor() as cur:
-        cur.execute("SELECT 1 FROM companies WHERE cik = %s", (cik,))
-        if not cur.fetchall():
-            cur.execute(
-                """
-                INSERT INTO companies (cik, ticker) VALUES (%s, %s)
-                  ON CONFLICT (cik) DO NOTHING
-                """,
-                (cik, ticker),
-            )
-        cur.executemany(
-            "INSERT INTO filings (cik, accession_number) VALUES (%s, %s) "
-            "ON CONFLICT DO NOTHING",
-            filing_params,
-        )
+    _ensure_company_and_filings(conn, cik, ticker, filing_params)
+    concept_ids = _concept_ids(conn, facts)
 
     for i in range(0, len(facts), batch_size):
         batch = facts[i : i + batch_size]
-        params, batch_failed = _build_numerical_fact_params(batch)
+        params, batch_failed = _build_numerical_fact_params(batch, concept_ids)
         failed += batch_failed
         if not params:
             continue
@@ -266,3 +500,69 @@ def store_numerical_facts(
                 exc_info=True,
             )
     return upserted, failed
+
+def store_numerical_facts_bulk(
+    conn: Connection,
+    facts: list[NumericalFact],
+) -> tuple[int, int]:
+    """
+    bulk variant of store_numerical_facts(): streams every row into a temp
+    staging table with COPY, then merges it into `numerical` with one
+    set-based upsert. same latest-filed-wins rules and `(upserted, failed)`
+    contract, but the load is all-or-nothing rather than per batch.
+    """
+    if not facts:
+        return 0, 0
+
+    cik = facts[0].cik
+    ticker = facts[0].ticker
+    filing_params = _numerical_filing_params(facts)
+    _ensure_company_and_filings(conn, cik, ticker, filing_params)
+
+    params, failed = _build_numerical_fact_params(facts, _concept_ids(conn, facts))
+    if not params:
+        return 0, failed
+
+    try:
+        with conn.transaction():
+            with conn.cursor() as cur:
+                cur.execute(_NUMERICAL_STAGING_DDL)
+                cur.execute("TRUNCATE numerical_staging")
+                with cur.copy(f"COPY numerical_staging ({_NUMERICAL_COLUMNS}) FROM STDIN") as copy:
+                    for row in params:
+                        copy.write_row(row)
+                cur.execute(_NUMERICAL_MERGE_SQL)
+    except Exception:
+        logger.error(
+            "Failed to bulk load %d numeric fact(s) for CIK %s — skipping",
+            len(params), cik,
+            exc_info=True,
+        )
+        return 0, failed + len(params)
+    return len(params), failed
+
+def store_numerical_fact_stream(
+    conn: Connection,
+    facts: Iterable[NumericalFact],
+    chunk_size: int = 5000,
+    bulk: bool = False,
+) -> tuple[int, int]:
+    """
+    store an iterable of numeric facts `chunk_size` at a time, so peak memory
+    is bounded by the chunk rather than the whole company. upsert rules are
+    unchanged: a later chunk's rows merge against earlier ones through the
+    same ON CONFLICT handling. if `facts` raises part way (e.g. a truncated
+    payload) every chunk already stored is rolled back before it propagates,
+    so a caller that commits anyway can't keep half a company.
+    """
+    upserted = failed = 0
+    it = iter(facts)
+    with conn.transaction():
+        while chunk := list(islice(it, chunk_size)):
+            if bulk:
+                up, fail = store_numerical_facts_bulk(conn, chunk)
+            else:
+                up, fail = store_numerical_facts(conn, chunk)
+            upserted += up
+            failed += fail
+    return upserted, failed
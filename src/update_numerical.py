@@ -1,49 +1,358 @@
 """CLI entry point for scraping SEC filings into the database THROUGH COMPANYFACTS."""
 import argparse
+import asyncio
 import logging
+import queue
 import sys
-from collections.abc import Sequence
+import threading
+from collections.abc import Iterable, Iterator, Sequence
+from datetime import date
 
 from db_setup import get_connection, get_available_tickers
-from models import SECFilingParserError
-from store import store_numerical_facts
+from models import NumericalFact, SECFilingParserError, TickerNotFoundError
+from store import store_numerical_facts, store_numerical_facts_bulk, store_numerical_fact_stream
 from ticker_loader import TickerLoadError, load_tickers_from_file
 from scrape_textual import open_parser
+from splits import refresh_split_factors
+from resolved import rebuild_resolved_metrics
 from parser import SECFilingParser
+from sec_client import AsyncSECClient
 
 logger = logging.getLogger(__name__)
 
+# fetch threads only overlap network latency; the shared rate limiter still
+# caps them at its global request rate, so a couple is enough to saturate it.
+FETCH_THREADS = 2
+_DONE = object()  # end-of-stream marker passed between pipeline stages
+
+
+def _load_watermark(conn, cik: str) -> date | None:
+    """latest filed_date already fully stored for `cik`, or None if never synced."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT facts_filed_through FROM companies WHERE cik = %s", (cik,))
+        row = cur.fetchone()
+        return row[0] if row else None
+
+
+def _advance_watermark(conn, cik: str) -> None:
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE companies SET facts_filed_through = (
+                SELECT MAX(filed_date) FROM numerical WHERE cik = %s
+            ) WHERE cik = %s
+            """,
+            (cik, cik),
+        )
+
+
+def _only_new(
+    facts: Iterable[NumericalFact],
+    watermark: date | None,
+    skipped: list[int],
+) -> Iterator[NumericalFact]:
+    """
+    drop facts filed strictly before the watermark, counting them in
+    skipped[0]. facts filed on the watermark day itself are re-sent, since
+    that day's filings may not all have landed yet.
+    """
+    for f in facts:
+        if watermark and f.filed_date and f.filed_date < watermark:
+            skipped[0] += 1
+            continue
+        yield f
+
+
+def _store_facts(
+    conn,
+    cik: str,
+    facts: Iterable[NumericalFact],
+    batch_size: int = 500,
+    bulk: bool = False,
+    stream: bool = False,
+    full: bool = False,
+) -> tuple[int, int, int]:
+    """
+    store one company's facts, skipping those older than its watermark unless
+    `full` is set. returns (upserted, failed, skipped); the watermark only
+    advances when nothing failed. split factors are rebuilt if new
+    share-count facts landed, and resolved metric series whenever any did.
+    """
+    watermark = None if full else _load_watermark(conn, cik)
+    skipped = [0]
+    new_facts = _only_new(facts, watermark, skipped)
+
+    if stream:
+        upserted, failed = store_numerical_fact_stream(conn, new_facts, bulk=bulk)
+    elif bulk:
+        upserted, failed = store_numerical_facts_bulk(conn, list(new_facts))
+    else:
+        upserted, failed = store_numerical_facts(conn, list(new_facts), batch_size=batch_size)
+
+    if upserted and not failed:
+        _advance_watermark(conn, cik)
+    if upserted:
+        refresh_split_factors(conn, cik)
+        rebuild_resolved_metrics(conn, cik)
+    return upserted, failed, skipped[0]
+
 
 def ingest_numerical_ticker(
     parser: SECFilingParser,
     ticker: str,
     batch_size: int = 500,
+    bulk: bool = False,
+    stream: bool = False,
+    full: bool = False,
+) -> tuple[int, int, int]:
+    """
+    ingest one ticker's Company Facts. returns (upserted, failed, skipped).
+    commits when every fact stored; otherwise the caller decides whether to
+    keep the partial load.
+    """
+    if stream:
+        cik = parser._get_cik(ticker.upper())
+        facts: Iterable[NumericalFact] = parser.iter_numerical_facts(ticker)
+    else:
+        cik, raw = parser.fetch_company_facts(ticker, if_changed=not full)
+        if raw is None:
+            logger.info(" %s company facts unchanged since last fetch", ticker)
+            return 0, 0, 0
+    # a cached body that didn't fully land must not short-circuit the next run
+    try:
+        if not stream:
+            facts = parser.build_numerical_facts(ticker, cik, raw)
+        upserted, failed, skipped = _store_facts(
+            parser.conn, cik, facts, batch_size=batch_size, bulk=bulk, stream=stream, full=full
+        )
+    except Exception:
+        parser.forget_company_facts(cik)
+        raise
+    if failed:
+        parser.forget_company_facts(cik)
+    else:
+        parser.conn.commit()
+        parser.remember_company_facts(cik)
+    return upserted, failed, skipped
+
+
+def _ingest_numerical_pipelined(
+    parser: SECFilingParser,
+    tickers: Sequence[str],
+    workers: int,
+    bulk: bool = False,
+    full: bool = False,
+) -> tuple[int, int]:
+    """
+    three-stage pipeline: fetch threads keep the SEC rate budget busy, one
+    builder turns payloads into NumericalFacts, and `workers` writers each
+    store and commit on their own connection. bounded queues between the
+    stages cap how many payloads/fact lists are held in memory at once.
+    """
+    ticker_q: queue.Queue = queue.Queue()
+    raw_q: queue.Queue = queue.Queue(maxsize=workers)
+    facts_q: queue.Queue = queue.Queue(maxsize=workers)
+    for ticker in tickers:
+        ticker_q.put(ticker)
+
+    totals = [0, 0]
+    totals_lock = threading.Lock()
+
+    # warm the ticker map once so fetch threads don't all download it.
+    parser._get_ticker_to_cik()
+
+    def fetch() -> None:
+        try:
+            while True:
+                try:
+                    ticker = ticker_q.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    cik, raw = parser.fetch_company_facts(ticker, if_changed=not full)
+                except TickerNotFoundError:
+                    print(f"[{ticker}] not found in SEC EDGAR. skipping.")
+                    continue
+                except Exception:
+                    logger.error(" Failed to fetch company facts for %s", ticker, exc_info=True)
+                    with totals_lock:
+                        totals[1] += 1
+                    print(f"[{ticker}] upserted=0 failed=1 skipped=0")
+                    continue
+                if raw is None:
+                    print(f"[{ticker}] unchanged since last fetch. skipping.")
+                    continue
+                raw_q.put((ticker, cik, raw))
+        finally:
+            raw_q.put(_DONE)
+
+    def build() -> None:
+        remaining = FETCH_THREADS
+        try:
+            while remaining:
+                item = raw_q.get()
+                if item is _DONE:
+                    remaining -= 1
+                    continue
+                ticker, cik, raw = item
+                try:
+                    facts = parser.build_numerical_facts(ticker, cik, raw)
+                except Exception:
+                    # the payload never became facts; count the company as one failure
+                    logger.error(" Failed to build facts for %s", ticker, exc_info=True)
+                    parser.forget_company_facts(cik)
+                    with totals_lock:
+                        totals[1] += 1
+                    print(f"[{ticker}] upserted=0 failed=1 skipped=0")
+                    continue
+                facts_q.put((ticker, cik, facts))
+        finally:
+            # fetch threads block on the bounded raw_q until someone reads it
+            while remaining:
+                if raw_q.get() is _DONE:
+                    remaining -= 1
+            for _ in range(workers):
+                facts_q.put(_DONE)
+
+    def write() -> None:
+        with get_connection() as conn:
+            while (item := facts_q.get()) is not _DONE:
+                ticker, cik, facts = item
+                try:
+                    upserted, failed, skipped = _store_facts(conn, cik, facts, bulk=bulk, full=full)
+                    conn.commit()
+                except Exception:
+                    logger.error(" Failed to store facts for %s", ticker, exc_info=True)
+                    conn.rollback()
+                    upserted, failed, skipped = 0, len(facts), 0
+                if failed:
+                    parser.forget_company_facts(cik)
+                else:
+                    parser.remember_company_facts(cik)
+                with totals_lock:
+                    totals[0] += upserted
+                    totals[1] += failed
+                print(f"[{ticker}] upserted={upserted} failed={failed} skipped={skipped}")
+
+    threads = [threading.Thread(target=fetch, name=f"fetch-{i}") for i in range(FETCH_THREADS)]
+    threads.append(threading.Thread(target=build, name="build"))
+    threads += [threading.Thread(target=write, name=f"write-{i}") for i in range(workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return totals[0], totals[1]
+
+
+async def _ingest_numerical_async(
+    parser: SECFilingParser,
+    tickers: Sequence[str],
+    concurrency: int,
+    max_retries: int = 3,
+    timeout: float = 30.0,
+    bulk: bool = False,
+    full: bool = False,
 ) -> tuple[int, int]:
-    facts = parser.get_numerical_facts(ticker)
-    return store_numerical_facts(parser.conn, facts, batch_size=batch_size)
+    """
+    fetch up to `concurrency` Company Facts documents at once through an
+    AsyncSECClient. payloads are built into facts and stored one company at
+    a time in worker threads so the event loop keeps fetching meanwhile; at
+    most 2 * `concurrency` companies are in flight between fetch and store,
+    bounding how many built fact lists wait in memory. a failing ticker is
+    logged and counted without stopping the others.
+    """
+    totals = [0, 0]
+    fetch_slots = asyncio.Semaphore(concurrency)
+    in_flight = asyncio.Semaphore(2 * concurrency)
+    store_lock = asyncio.Lock()
+    conn = parser.conn
+
+    async def ingest(client: AsyncSECClient, ticker: str) -> None:
+        async with in_flight:
+            try:
+                async with fetch_slots:
+                    cik, raw = await parser.afetch_company_facts(client, ticker)
+            except TickerNotFoundError:
+                print(f"[{ticker}] not found in SEC EDGAR. skipping.")
+                return
+            except SECFilingParserError as e:
+                logger.error(" Failed to fetch facts for %s: %s", ticker, e)
+                totals[1] += 1
+                print(f"[{ticker}] upserted=0 failed=1 skipped=0")
+                return
+            facts: list[NumericalFact] = []
+            try:
+                facts = await asyncio.to_thread(parser.build_numerical_facts, ticker, cik, raw)
+                async with store_lock:
+                    try:
+                        upserted, failed, skipped = await asyncio.to_thread(
+                            _store_facts, conn, cik, facts, bulk=bulk, full=full
+                        )
+                        await asyncio.to_thread(conn.commit)
+                    except Exception:
+                        await asyncio.to_thread(conn.rollback)
+                        raise
+            except Exception:
+                logger.error(" Failed to ingest facts for %s", ticker, exc_info=True)
+                upserted, failed, skipped = 0, len(facts) or 1, 0
+        totals[0] += upserted
+        totals[1] += failed
+        print(f"[{ticker}] upserted={upserted} failed={failed} skipped={skipped}")
+
+    parser._get_ticker_to_cik()
+    async with AsyncSECClient(max_retries=max_retries, timeout=timeout) as client:
+        await asyncio.gather(*(ingest(client, t) for t in tickers))
+    return totals[0], totals[1]
 
 
 def ingest_numerical_tickers(
     tickers: Sequence[str],
     max_retries: int = 3,
     timeout: float = 30.0,
+    bulk: bool = False,
+    workers: int = 1,
+    concurrency: int = 0,
+    stream: bool = False,
+    full: bool = False,
 ) -> tuple[int, int]:
     """
     run the numerical (Company Facts) ingest for each ticker in `tickers`.
     opens its own DB connection and parser session. callable directly from
-    another program, not just via main()'s CLI.
+    another program, not just via main()'s CLI. `bulk` loads each ticker
+    through COPY + one set-based merge instead of batched upserts; `workers`
+    > 1 pipelines fetching, fact building and storing across that many DB
+    writer connections; `concurrency` > 0 instead fetches through the asyncio
+    client with that many requests in flight. `stream` (sequential mode only)
+    parses each payload incrementally and stores it in chunks.
+
+    facts filed before a company's last fully-synced filed_date are skipped
+    unless `full` is set.
     """
     total_upserted = total_failed = 0
     with get_connection() as conn:
         with open_parser(conn, max_retries=max_retries, timeout=timeout) as parser:
+            if concurrency > 0:
+                return asyncio.run(_ingest_numerical_async(
+                    parser, tickers, concurrency,
+                    max_retries=max_retries, timeout=timeout, bulk=bulk, full=full,
+                ))
+            if workers > 1:
+                return _ingest_numerical_pipelined(parser, tickers, workers, bulk=bulk, full=full)
             for ticker in tickers:
                 try:
-                    upserted, failed = ingest_numerical_ticker(parser, ticker)
+                    upserted, failed, skipped = ingest_numerical_ticker(
+                        parser, ticker, bulk=bulk, stream=stream, full=full
+                    )
                     total_upserted += upserted
                     total_failed += failed
-                    print(f"[{ticker}] upserted={upserted} failed={failed}")
-                except SECFilingParserError:
+                    print(f"[{ticker}] upserted={upserted} failed={failed} skipped={skipped}")
+                except TickerNotFoundError:
                     print(f"[{ticker}] not found in SEC EDGAR. skipping.")
+                except Exception:
+                    logger.error(" Failed to ingest company facts for %s", ticker, exc_info=True)
+                    conn.rollback()
+                    total_failed += 1
+                    print(f"[{ticker}] upserted=0 failed=1 skipped=0")
                 conn.commit()
     return total_upserted, total_failed
 
@@ -76,6 +385,35 @@ def main(argv: Sequence[str] | None = None) -> int:
         default=30.0,
         help="HTTP timeout in seconds. Default = 30s",
     )
+    ap.add_argument(
+        "--bulk",
+        action="store_true",
+        help="Load facts with COPY into a staging table and one set-based merge.",
+    )
+    ap.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="DB writer connections for the pipelined ingest. Default = 1 (sequential)",
+    )
+    ap.add_argument(
+        "--async",
+        type=int,
+        default=0,
+        dest="concurrency",
+        metavar="N",
+        help="Fetch through the asyncio SEC client with N requests in flight. Default = off",
+    )
+    ap.add_argument(
+        "--stream",
+        action="store_true",
+        help="Parse Company Facts incrementally and store in chunks (sequential mode only).",
+    )
+    ap.add_argument(
+        "--full",
+        action="store_true",
+        help="Re-send every fact instead of only those filed since the last sync.",
+    )
     args = ap.parse_args(argv)
 
     # resolve ticker set from all sources
@@ -102,7 +440,9 @@ def main(argv: Sequence[str] | None = None) -> int:
     logger.info(" Updating %d ticker(s): %s", len(tickers), ", ".join(tickers))
 
     total_upserted, total_failed = ingest_numerical_tickers(
-        tickers, max_retries=args.max_retries, timeout=args.timeout
+        tickers, max_retries=args.max_retries, timeout=args.timeout,
+        bulk=args.bulk, workers=args.workers, concurrency=args.concurrency,
+        stream=args.stream, full=args.full,
     )
     print(f"\nDone. Total upserted: {total_upserted}, total failed: {total_failed}")
 
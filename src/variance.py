@@ -6,34 +6,46 @@ variance in E/P and S/P among the S&P500 and NASDAQ 100
 4. analyze change over time
 """
 
+import argparse
+import logging
+import sys
+from collections.abc import Sequence
 from io import StringIO
 import pandas as pd
 import requests
-# from scrape_textual import open_parser, ingest_textual_ticker
-# from db_setup import get_connection
-# from models import SECFilingParserError
 from config import nonsec_headers
-from db_setup import get_available_tickers
-from update_numerical import ingest_numerical_tickers
+from refresh import add_refresh_arguments, run_refresh
+
+UNIVERSE = "sp500+ndx100"
 
-SKIP_UPDATED = True  # skip tickers that already have data in the DB
 
 def get_html(url):
     return requests.get(url, headers=nonsec_headers()).text
 
-spy = pd.read_html(StringIO(get_html("https://en.wikipedia.org/wiki/List_of_S%26P_500_companies")))[0]["Symbol"].to_list()
 
-qqq = pd.read_html(StringIO(get_html("https://en.wikipedia.org/wiki/List_of_NASDAQ-100_companies")))[0]["Ticker"].to_list()
+def get_universe() -> list[str]:
+    """S&P 500 and NASDAQ-100 constituents, in SEC ticker form (BRK.B -> BRK-B)."""
+    spy = pd.read_html(StringIO(get_html("https://en.wikipedia.org/wiki/List_of_S%26P_500_companies")))[0]["Symbol"].to_list()
+    qqq = pd.read_html(StringIO(get_html("https://en.wikipedia.org/wiki/List_of_NASDAQ-100_companies")))[0]["Ticker"].to_list()
+    return sorted({s.replace(".", "-") for s in spy + qqq})
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    logging.basicConfig(level=logging.INFO)
 
-tickers = sorted({s.replace(".", "-") for s in spy + qqq})
+    ap = argparse.ArgumentParser()
+    add_refresh_arguments(ap)
+    args = ap.parse_args(argv)
 
-if SKIP_UPDATED:
-    already_updated = {t for t, _ in get_available_tickers()}
-    skipped = [t for t in tickers if t in already_updated]
-    tickers = [t for t in tickers if t not in already_updated]
-    if skipped:
-        print(f"Skipping {len(skipped)} already-updated ticker(s): {', '.join(skipped)}")
+    # a resumed run keeps its stored ticker list; this one only seeds a new run
+    total_upserted, total_failed = run_refresh(
+        get_universe(), universe=UNIVERSE, resume=args.resume,
+        max_age_hours=args.max_age_hours, max_attempts=args.max_attempts,
+        backoff=args.backoff, bulk=args.bulk,
+    )
+    print(f"\nDone. Total upserted: {total_upserted}, total failed: {total_failed}")
+    return 0
 
-total_upserted, total_failed = ingest_numerical_tickers(tickers)
 
-print(f"\nDone. Total upserted: {total_upserted}, total failed: {total_failed}")
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,26 @@
+"""shared test setup: src/ on the import path and a live-database fixture"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+
+@pytest.fixture(scope="session")
+def db():
+    """the configured database with ddl.sql applied; skips when it can't be reached."""
+    import psycopg
+
+    import config
+    import db_setup
+
+    try:
+        psycopg.connect(**config.db_kwargs(), connect_timeout=3).close()
+    except psycopg.OperationalError as e:
+        pytest.skip(f"database unavailable: {e}")
+    status, message = db_setup.init_schema()
+    if status != 0:
+        pytest.fail(message)
+    yield
+    db_setup.close_pool()
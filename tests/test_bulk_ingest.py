@@ -0,0 +1,86 @@
+"""bulk_ingest: CRC-based skipping of unchanged companyfacts.zip members"""
+import json
+import zipfile
+
+import pytest
+
+import bulk_ingest
+from db_setup import get_connection
+
+CIKS = {"0009999901": "ZZBA", "0009999902": "ZZBB"}
+
+
+def _company_facts(cik: str, value: float, year: int) -> dict:
+    """one FY2020 revenue fact, as reported by a 10-K filed in `year`."""
+    entry = {
+        "start": "2020-01-01", "end": "2020-12-31", "val": value,
+        "accn": f"{cik}-{year % 100}-000001", "filed": f"{year}-02-01",
+        "fy": 2020, "fp": "FY", "form": "10-K",
+    }
+    return {"cik": int(cik), "facts": {"us-gaap": {"Revenues": {"units": {"USD": [entry]}}}}}
+
+
+def _write_archives(tmp_path, members: dict[str, tuple[float, int]]) -> tuple[str, str]:
+    """(companyfacts.zip, submissions.zip) paths; `members` maps cik -> (value, filed year)."""
+    facts_zip, subs_zip = tmp_path / "companyfacts.zip", tmp_path / "submissions.zip"
+    with zipfile.ZipFile(facts_zip, "w") as zf:
+        for cik, (value, year) in members.items():
+            zf.writestr(f"CIK{cik}.json", json.dumps(_company_facts(cik, value, year)))
+    with zipfile.ZipFile(subs_zip, "w") as zf:
+        for cik, ticker in CIKS.items():
+            zf.writestr(f"CIK{cik}.json", json.dumps({"tickers": [ticker]}))
+    return str(facts_zip), str(subs_zip)
+
+
+def _clear() -> None:
+    with get_connection() as conn:
+        conn.execute("DELETE FROM companies WHERE cik = ANY(%s)", (list(CIKS),))
+        conn.execute(
+            "DELETE FROM bulk_archive_members WHERE archive = %s AND member = ANY(%s)",
+            (bulk_ingest.COMPANYFACTS_ARCHIVE, [f"CIK{c}.json" for c in CIKS]),
+        )
+        conn.commit()
+
+
+def _values() -> dict[str, float]:
+    with get_connection() as conn:
+        rows = conn.execute(
+            "SELECT cik, value FROM numerical WHERE cik = ANY(%s)", (list(CIKS),)
+        ).fetchall()
+        conn.rollback()
+    return dict(rows)
+
+
+@pytest.fixture
+def clean_db(db):
+    _clear()
+    yield
+    _clear()
+
+
+def test_unchanged_members_are_skipped(clean_db, tmp_path):
+    facts_zip, subs_zip = _write_archives(
+        tmp_path, {"0009999901": (5.0, 2021), "0009999902": (7.0, 2021)}
+    )
+    assert bulk_ingest.ingest_companyfacts_archive(facts_zip, submissions_path=subs_zip) == (2, 0)
+    assert bulk_ingest.ingest_companyfacts_archive(facts_zip, submissions_path=subs_zip) == (0, 0)
+
+    # a later filing restates the second company; only its member is loaded again
+    facts_zip, _ = _write_archives(
+        tmp_path, {"0009999901": (5.0, 2021), "0009999902": (8.0, 2022)}
+    )
+    assert bulk_ingest.ingest_companyfacts_archive(facts_zip, submissions_path=subs_zip) == (1, 0)
+    assert _values() == {"0009999901": 5.0, "0009999902": 8.0}
+
+
+def test_force_reloads_unchanged_members(clean_db, tmp_path, capsys):
+    facts_zip, subs_zip = _write_archives(
+        tmp_path, {"0009999901": (5.0, 2021), "0009999902": (7.0, 2021)}
+    )
+    bulk_ingest.ingest_companyfacts_archive(facts_zip, submissions_path=subs_zip)
+    capsys.readouterr()
+
+    bulk_ingest.main([facts_zip, "--submissions", subs_zip, "--force"])
+    out = capsys.readouterr().out
+    assert "[ZZBA] upserted=1 failed=0" in out
+    assert "[ZZBB] upserted=1 failed=0" in out
@@ -0,0 +1,52 @@
+"""db_setup: pooled connections and schema setup against the configured database"""
+import pytest
+
+import config
+import db_setup
+from db_setup import get_connection, get_cursor, get_pool
+
+
+def _idle() -> int:
+    return get_pool().get_stats()["pool_available"]
+
+
+def test_with_block_returns_the_connection(db):
+    with get_connection() as conn:
+        conn.execute("SELECT 1")
+    idle = _idle()
+
+    # more round trips than the pool holds: each `with` must hand its connection back
+    for _ in range(config.DB_POOL_MAX + 2):
+        with get_connection() as conn:
+            assert conn.execute("SELECT 1").fetchone() == (1,)
+        assert _idle() == idle
+
+
+def test_connection_is_reset_and_returned_after_an_error(db):
+    with get_connection() as conn:
+        conn.execute("SELECT 1")
+    idle = _idle()
+
+    with pytest.raises(ZeroDivisionError):
+        with get_connection() as conn:
+            conn.autocommit = True
+            conn.read_only = True
+            1 / 0
+    assert _idle() == idle
+
+    with get_connection() as conn:
+        assert (conn.autocommit, conn.read_only) == (False, None)
+
+
+def test_get_cursor_ends_its_transaction(db):
+    with get_cursor(write=False) as cur:
+        cur.execute("SELECT 1")
+        conn = cur.connection
+    assert conn.info.transaction_status.name == "IDLE"
+
+
+def test_init_schema_refuses_old_servers(db, monkeypatch):
+    monkeypatch.setattr(db_setup, "MIN_SERVER_VERSION", 10_000_000)
+    status, message = db_setup.init_schema()
+    assert status == 1
+    assert "PostgreSQL 1000 or newer" in message
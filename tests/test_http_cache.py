@@ -0,0 +1,35 @@
+"""http_cache: conditional requests against an evicted entry"""
+import httpx
+
+from http_cache import ResponseCache
+from parser import SECFilingParser
+
+URL = "https://data.sec.gov/api/xbrl/companyfacts/CIK0009999904.json"
+
+
+def test_evicted_entry_is_refetched_in_full(tmp_path):
+    sent: list[dict[str, str]] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(dict(request.headers))
+        if "if-none-match" in request.headers:
+            return httpx.Response(304)
+        return httpx.Response(200, json={"facts": {}}, headers={"ETag": '"v1"'})
+
+    parser = SECFilingParser(None)
+    parser._client = httpx.Client(transport=httpx.MockTransport(handler))
+    parser._cache = ResponseCache(str(tmp_path), 1 << 20)
+
+    assert parser._get_json(URL) == {"facts": {}}
+    # eviction lands between validators() and hit()
+    validators = parser._cache.validators
+    def evict_after(url: str) -> dict[str, str]:
+        headers = validators(url)
+        for p in tmp_path.glob("*.body"):
+            p.unlink()
+        return headers
+    parser._cache.validators = evict_after
+
+    assert parser._get_json(URL) == {"facts": {}}
+    assert "if-none-match" in sent[1] and "if-none-match" not in sent[2]
+    assert parser._cache.stats()["hits"] == 0
@@ -0,0 +1,31 @@
+"""ixbrl: native inline XBRL extraction edge cases"""
+import logging
+
+from ixbrl import extract_inline_facts
+
+_DOC = """<?xml version="1.0" encoding="utf-8"?>
+<html xmlns="http://www.w3.org/1999/xhtml" xmlns:ix="http://www.xbrl.org/2013/inlineXBRL"
+      xmlns:ixt="http://www.xbrl.org/inlineXBRL/transformation/2020-02-12"
+      xmlns:ixt-sec="http://www.sec.gov/inlineXBRL/transformation/2015-08-31"
+      xmlns:xbrli="http://www.xbrl.org/2003/instance" xmlns:us-gaap="http://fasb.org/us-gaap/2024"
+      xmlns:iso4217="http://www.xbrl.org/2003/iso4217">
+<body>
+<div style="display:none"><ix:header><ix:resources>
+<xbrli:context id="d24"><xbrli:entity><xbrli:identifier scheme="http://www.sec.gov/CIK">0000000001</xbrli:identifier></xbrli:entity>
+<xbrli:period><xbrli:startDate>2024-01-01</xbrli:startDate><xbrli:endDate>2024-12-31</xbrli:endDate></xbrli:period></xbrli:context>
+<xbrli:unit id="usd"><xbrli:measure>iso4217:USD</xbrli:measure></xbrli:unit>
+</ix:resources></ix:header></div>
+<p><ix:nonFraction name="us-gaap:Revenues" contextRef="d24" unitRef="usd" decimals="0" format="ixt:num-dot-decimal">1,200</ix:nonFraction></p>
+<p><ix:nonFraction name="us-gaap:Employees" contextRef="d24" unitRef="usd" decimals="0" format="ixt-sec:numwordsen">twelve</ix:nonFraction></p>
+</body></html>
+""".encode()
+
+
+def test_unsupported_transforms_are_counted_and_logged(caplog):
+    skipped = [0]
+    with caplog.at_level(logging.WARNING, logger="ixbrl"):
+        facts = extract_inline_facts([_DOC], "TST", "0000000001", "0000000001-24-000001", skipped)
+
+    assert [(f.local_name, f.value) for f in facts] == [("Revenues", "1200")]
+    assert skipped == [1]
+    assert "numwordsen" in caplog.text
@@ -0,0 +1,70 @@
+"""
+SECFilingParser against local filing fixtures. no network requests: the base
+xbrl.org schemas come from the copies Arelle ships for its own cache.
+"""
+import shutil
+from pathlib import Path
+
+import arelle
+import pytest
+
+import config
+from ixbrl import extract_inline_facts
+from models import Filing
+from parser import SECFilingParser
+from store import compute_textual_fact_key
+
+FIXTURES = Path(__file__).parent / "fixtures" / "xbrl"
+CIK = "0000000001"
+ACCESSION = "0000000001-24-000001"
+
+
+@pytest.fixture(scope="session")
+def schema_cache(tmp_path_factory) -> str:
+    """a taxonomy cache seeded with Arelle's bundled base schemas."""
+    bundled = Path(arelle.__file__).parent / "resources" / "cache"
+    if not bundled.is_dir():
+        pytest.skip("this Arelle doesn't bundle the base xbrl.org schemas")
+    cache = tmp_path_factory.mktemp("arelle-cache")
+    shutil.copytree(bundled, cache, dirs_exist_ok=True)
+    return str(cache)
+
+
+@pytest.fixture(autouse=True)
+def local_archive(monkeypatch, schema_cache):
+    """serve every filing document from tests/fixtures/xbrl, and its DTS from the local cache."""
+    monkeypatch.setattr(config, "SEC_ARCHIVES_URL", f"{FIXTURES}/")
+    monkeypatch.setattr(config, "ARELLE_CACHE_DIR", schema_cache)
+    monkeypatch.setattr(config, "ARELLE_PLUGINS_PATH", config.ARELLE_PLUGINS_PATH or "inlineXbrlDocumentSet")
+
+
+def arelle_facts(entry_file: str, **parser_kwargs) -> dict[bytes, object]:
+    """fact key -> TextualFact for a fixture filing parsed through Arelle."""
+    parser = SECFilingParser(None, **parser_kwargs)
+    try:
+        facts = parser.parse_filing(Filing(CIK, ACCESSION, entry_file, "10-K"), "TST", CIK)
+    finally:
+        parser.close()
+    return {compute_textual_fact_key(f): f for f in facts}
+
+
+@pytest.mark.parametrize("entry_file", ["instance.xml", "inline_filing.htm"])
+def test_facts_only_matches_full_load(entry_file):
+    full = arelle_facts(entry_file)
+    facts_only = arelle_facts(entry_file, facts_only=True)
+    assert full
+    assert facts_only.keys() == full.keys()
+    assert {k: f.value for k, f in facts_only.items()} == {k: f.value for k, f in full.items()}
+
+
+def test_native_extractor_matches_arelle():
+    arelle = arelle_facts("inline_filing.htm", facts_only=True)
+    data = (FIXTURES / "inline_filing.htm").read_bytes()
+    # small chunks, so facts and continuations straddle feed() boundaries
+    chunks = [data[i:i + 97] for i in range(0, len(data), 97)]
+    native = {
+        compute_textual_fact_key(f): f
+        for f in extract_inline_facts(chunks, "TST", CIK, ACCESSION)
+    }
+    assert native.keys() == arelle.keys()
+    assert {k: f.value for k, f in native.items()} == {k: f.value for k, f in arelle.items()}
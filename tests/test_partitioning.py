@@ -0,0 +1,91 @@
+"""numerical/textual hash partitioning: the per-company helpers read one partition each"""
+import json
+from datetime import date
+
+import pytest
+
+from db_setup import get_connection
+from explain_pruning import helper_queries, scanned_partitions
+from models import Filing, NumericalFact, PeriodType, TextualFact
+from splits import SPLIT_REF_QNAMES
+from store import store_numerical_facts, store_textual_facts
+
+COMPANIES = {"0009999911": "ZZPA", "0009999912": "ZZPB"}
+SHARES_QNAME = SPLIT_REF_QNAMES[0]
+
+
+def _seed(conn, cik: str, ticker: str) -> None:
+    accession = f"{cik}-24-000001"
+    filing = Filing(cik, accession, "x.htm", "10-K", date(2024, 2, 1))
+    period = dict(start_date=date(2023, 1, 1), end_date=date(2023, 12, 31))
+    store_numerical_facts(conn, [
+        NumericalFact(
+            ticker=ticker, cik=cik, accession_number=accession, taxonomy="us-gaap",
+            fname=fname, unit=unit, period_type=PeriodType.DURATION, value=value,
+            form="10-K", filed_date=date(2024, 2, 1), **period,
+        )
+        for fname, unit, value in (("Revenues", "USD", 1e9), (SHARES_QNAME.split(":")[1], "shares", 5e6))
+    ])
+    store_textual_facts(conn, [filing], [
+        TextualFact(
+            ticker=ticker, cik=cik, accession_number=accession, qname=qname,
+            namespace="http://fasb.org/us-gaap/2024", local_name=qname.split(":")[1],
+            period_type=PeriodType.DURATION, value=value, **period,
+        )
+        for qname, value in (("us-gaap:Revenues", "1000000000"), (SHARES_QNAME, "5000000"))
+    ])
+    conn.execute(
+        "INSERT INTO metric_mappings (cik, metric_key, qname) VALUES (%s, 'revenue', 'us-gaap:Revenues')",
+        (cik,),
+    )
+
+
+def _clear(conn) -> None:
+    conn.execute("DELETE FROM companies WHERE cik = ANY(%s)", (list(COMPANIES),))
+    conn.commit()
+
+
+@pytest.fixture
+def conn(db):
+    with get_connection() as conn:
+        _clear(conn)
+        created_metric = conn.execute(
+            "INSERT INTO metrics (key, display_name, format_type) VALUES ('revenue', 'Revenue', 'currency') "
+            "ON CONFLICT DO NOTHING RETURNING key"
+        ).fetchone()
+        for cik, ticker in COMPANIES.items():
+            _seed(conn, cik, ticker)
+        conn.execute("ANALYZE numerical, textual")
+        conn.commit()
+        yield conn
+        conn.rollback()
+        _clear(conn)
+        if created_metric:
+            conn.execute("DELETE FROM metrics WHERE key = 'revenue'")
+            conn.commit()
+
+
+def _home_partitions(conn, cik: str) -> dict[str, set[str]]:
+    """parent table -> the partition holding `cik`'s rows."""
+    return {
+        table: {r[0] for r in conn.execute(f"SELECT DISTINCT tableoid::regclass::text FROM {table} WHERE cik = %s", (cik,))}
+        for table in ("numerical", "textual")
+    }
+
+
+@pytest.mark.parametrize("cik", sorted(COMPANIES))
+def test_helpers_scan_only_the_company_partition(conn, cik):
+    home = _home_partitions(conn, cik)
+    assert all(len(parts) == 1 for parts in home.values())
+
+    touched: dict[str, set[str]] = {"numerical": set(), "textual": set()}
+    for name, (sql, params) in helper_queries(COMPANIES[cik], cik).items():
+        plan = conn.execute(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}", params).fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        for table, parts in scanned_partitions(plan[0]).items():
+            assert parts <= home[table], f"{name} scanned {sorted(parts)} for {cik}"
+            touched[table] |= parts
+    conn.rollback()
+    # the helpers did read facts, so the checks above aren't vacuous
+    assert touched == home
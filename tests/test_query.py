@@ -0,0 +1,140 @@
+"""query: resolve(), live or materialized, agrees with querying a company's mapped qnames"""
+from datetime import date
+
+import pytest
+
+import query
+from db_setup import get_connection
+from models import Filing, NumericalFact, PeriodType, TextualFact
+from resolved import rebuild_resolved_metrics
+from store import store_numerical_facts, store_textual_facts
+
+CIK, TICKER = "0009999921", "ZZQA"
+METRICS = {"zz_revenue": "currency", "zz_eps": "ratio", "zz_doc": "text"}
+MAPPINGS = [
+    ("zz_revenue", "us-gaap:Revenues", 0),
+    ("zz_revenue", "us-gaap:SalesRevenueNet", 1),
+    ("zz_eps", "us-gaap:EarningsPerShareBasic", 0),
+    ("zz_doc", "dei:DocumentType", 0),
+]
+QUERY_TYPES = ("all", "annual", "quarterly")
+
+
+def _accession(year: int) -> str:
+    return f"{CIK}-{year % 100}-000001"
+
+
+def _numerical(fname: str, unit: str, value: float, start: date, end: date, filed_year: int) -> NumericalFact:
+    return NumericalFact(
+        ticker=TICKER, cik=CIK, accession_number=_accession(filed_year), taxonomy="us-gaap",
+        fname=fname, unit=unit, period_type=PeriodType.DURATION, value=value,
+        start_date=start, end_date=end, form="10-K", filed_date=date(filed_year, 2, 1),
+    )
+
+
+def _fy(year: int) -> tuple[date, date]:
+    return date(year, 1, 1), date(year, 12, 31)
+
+
+def _seed(conn) -> None:
+    store_numerical_facts(conn, [
+        _numerical("SalesRevenueNet", "USD", 90.0, *_fy(2021), 2022),
+        # the 2023 filing reports both revenue concepts; the mapped priority keeps Revenues
+        _numerical("Revenues", "USD", 100.0, *_fy(2022), 2023),
+        _numerical("SalesRevenueNet", "USD", 99.0, date(2022, 1, 1), date(2022, 3, 31), 2023),
+        _numerical("Revenues", "USD", 120.0, *_fy(2023), 2024),
+        _numerical("Revenues", "USD", 30.0, date(2023, 1, 1), date(2023, 3, 31), 2024),
+        _numerical("EarningsPerShareBasic", "USD/shares", 4.0, *_fy(2022), 2023),
+        _numerical("EarningsPerShareBasic", "USD/shares", 2.5, *_fy(2023), 2024),
+    ])
+    # a 2:1 split between the 2023 and 2024 filings
+    conn.execute(
+        "INSERT INTO split_factors (cik, accession_number, factor) VALUES (%s, %s, 2.0)",
+        (CIK, _accession(2023)),
+    )
+    store_textual_facts(conn, [Filing(CIK, _accession(2024), "x.htm", "10-K", date(2024, 2, 1))], [
+        TextualFact(
+            ticker=TICKER, cik=CIK, accession_number=_accession(2024), qname="dei:DocumentType",
+            namespace="http://xbrl.sec.gov/dei/2024", local_name="DocumentType",
+            period_type=PeriodType.DURATION, value="10-K", start_date=_fy(2023)[0], end_date=_fy(2023)[1],
+        )
+    ])
+    # raw inserts: add_metric_mapping() would materialize the series
+    with conn.cursor() as cur:
+        cur.executemany(
+            "INSERT INTO metric_mappings (cik, metric_key, qname, priority) VALUES (%s, %s, %s, %s)",
+            [(CIK, key, qname, priority) for key, qname, priority in MAPPINGS],
+        )
+
+
+def _clear(conn) -> None:
+    conn.execute("DELETE FROM companies WHERE cik = %s", (CIK,))
+    conn.execute("DELETE FROM metrics WHERE key = ANY(%s)", (list(METRICS),))
+    conn.commit()
+
+
+@pytest.fixture
+def conn(db):
+    with get_connection() as conn:
+        _clear(conn)
+        with conn.cursor() as cur:
+            cur.executemany(
+                "INSERT INTO metrics (key, display_name, format_type) VALUES (%s, %s, %s)",
+                [(key, key, fmt) for key, fmt in METRICS.items()],
+            )
+        _seed(conn)
+        conn.commit()
+        yield conn
+        conn.rollback()
+        _clear(conn)
+
+
+def _direct(key: str, query_type: str) -> list:
+    kind = "textual" if METRICS[key] == "text" else "numerical"
+    return query.query_facts(TICKER, query.get_metric_mappings(TICKER, key), query_type, kind)
+
+
+@pytest.mark.parametrize("query_type", QUERY_TYPES)
+@pytest.mark.parametrize("key", sorted(METRICS))
+def test_resolve_matches_mapped_query(conn, key, query_type):
+    assert query.resolve(TICKER, key, query_type) == _direct(key, query_type)
+
+
+def test_resolve_applies_priorities_and_splits(conn):
+    revenue = query.resolve(TICKER, "zz_revenue", "annual")
+    assert [(f.local_name, f.value) for f in revenue] == [
+        ("Revenues", 120.0), ("Revenues", 100.0), ("SalesRevenueNet", 90.0),
+    ]
+    eps = query.resolve(TICKER, "zz_eps", "annual")
+    assert [f.value for f in eps] == [2.5, 2.0]
+    assert [f.value for f in query.resolve(TICKER, "zz_eps", "annual", adjust_splits=False)] == [2.5, 4.0]
+
+
+def test_resolve_rejects_unknown_metrics(conn):
+    with pytest.raises(ValueError):
+        query.resolve(TICKER, "zz_missing", "all")
+
+
+def _materialized_rows(conn) -> int:
+    row = conn.execute("SELECT COUNT(*) FROM resolved_metrics WHERE cik = %s", (CIK,)).fetchone()
+    conn.rollback()
+    return row[0]
+
+
+def test_materialized_series_match_live_resolve(conn):
+    live = {(key, qt): query.resolve(TICKER, key, qt) for key in METRICS for qt in QUERY_TYPES}
+    assert _materialized_rows(conn) == 0
+
+    assert rebuild_resolved_metrics(conn, CIK) == 2  # the text metric stays live
+    conn.commit()
+    assert _materialized_rows(conn) == sum(
+        len(facts) for (key, _), facts in live.items() if METRICS[key] != "text"
+    )
+    for (key, qt), facts in live.items():
+        assert query.resolve(TICKER, key, qt) == facts
+
+    # a mapping edit rebuilds the series it changed
+    query.add_metric_mapping(CIK, "zz_revenue", "us-gaap:SalesRevenueNet", -1)
+    for qt in QUERY_TYPES:
+        assert query.resolve(TICKER, "zz_revenue", qt) == _direct("zz_revenue", qt)
+    assert query.resolve(TICKER, "zz_revenue", "quarterly")[-1].value == 99.0
@@ -0,0 +1,103 @@
+"""refresh: checkpointed retries with backoff, giving up, and resuming a run"""
+from contextlib import nullcontext
+from datetime import timedelta
+
+import pytest
+
+import refresh
+from db_setup import get_connection
+from models import FilingFetchError, TickerNotFoundError
+
+UNIVERSE = "test-refresh"
+TICKERS = ["ZZRA", "ZZRB", "ZZRC"]
+
+
+def _clear() -> None:
+    with get_connection() as conn:
+        conn.execute("DELETE FROM refresh_checkpoints WHERE ticker = ANY(%s)", (TICKERS,))
+        conn.execute("DELETE FROM refresh_runs WHERE universe = %s", (UNIVERSE,))
+        conn.commit()
+
+
+def _checkpoints() -> dict[str, tuple]:
+    with get_connection() as conn:
+        rows = conn.execute(
+            "SELECT ticker, last_success IS NOT NULL, attempts FROM refresh_checkpoints WHERE ticker = ANY(%s)",
+            (TICKERS,),
+        ).fetchall()
+        conn.rollback()
+    return {t: rest for t, *rest in rows}
+
+
+@pytest.fixture
+def clean(db):
+    _clear()
+    yield
+    _clear()
+
+
+@pytest.fixture
+def calls(clean, monkeypatch):
+    """ZZRA refreshes, ZZRB's fetch always fails, ZZRC is unknown to SEC."""
+    calls: list[str] = []
+
+    def ingest(parser, ticker, bulk=False):
+        calls.append(ticker)
+        if ticker == "ZZRB":
+            raise FilingFetchError("HTTP 503")
+        if ticker == "ZZRC":
+            raise TickerNotFoundError(ticker)
+        return 1, 0, 0
+
+    monkeypatch.setattr(refresh, "open_parser", lambda conn, **kw: nullcontext())
+    monkeypatch.setattr(refresh, "ingest_numerical_ticker", ingest)
+    return calls
+
+
+def test_failures_back_off_then_give_up(calls):
+    assert refresh.run_refresh(TICKERS, universe=UNIVERSE, max_attempts=2, backoff=0.01) == (1, 0)
+    assert calls == ["ZZRA", "ZZRB", "ZZRC", "ZZRB"]
+    assert _checkpoints() == {"ZZRA": [True, 0], "ZZRB": [False, 2], "ZZRC": [False, 2]}
+
+    # nothing is due again until max_age has passed
+    calls.clear()
+    refresh.run_refresh(TICKERS, universe=UNIVERSE, max_attempts=2, backoff=0.01)
+    assert calls == []
+
+
+def test_retry_waits_out_its_backoff(clean):
+    with get_connection() as conn:
+        run_id, _, started_at = refresh._open_run(conn, UNIVERSE, TICKERS, resume=False)
+        refresh._checkpoint(conn, run_id, "ZZRB", "HTTP 503")
+        refresh._checkpoint(conn, run_id, "ZZRB", "HTTP 503")
+        due, skipped = refresh._due_tickers(
+            conn, ["ZZRB"], started_at, timedelta(hours=1), backoff=60.0, max_attempts=3
+        )
+    (wait, ticker, attempts), = due
+    assert (ticker, attempts, skipped) == ("ZZRB", 2, [])
+    assert 110 < wait <= 120  # 60s doubled after the second failure
+
+
+def test_resume_skips_tickers_already_refreshed(calls, monkeypatch):
+    ingest = refresh.ingest_numerical_ticker
+
+    def interrupted(parser, ticker, bulk=False):
+        if ticker == "ZZRB":
+            raise KeyboardInterrupt
+        return ingest(parser, ticker, bulk)
+
+    monkeypatch.setattr(refresh, "ingest_numerical_ticker", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        refresh.run_refresh(TICKERS, universe=UNIVERSE, max_attempts=1)
+    assert calls == ["ZZRA"]
+
+    # the resumed run keeps the original ticker list and picks up after ZZRA
+    monkeypatch.setattr(refresh, "ingest_numerical_ticker", ingest)
+    refresh.run_refresh(["ZZRC"], universe=UNIVERSE, resume=True, max_attempts=1)
+    assert calls == ["ZZRA", "ZZRB", "ZZRC"]
+    with get_connection() as conn:
+        runs = conn.execute(
+            "SELECT finished_at IS NOT NULL FROM refresh_runs WHERE universe = %s", (UNIVERSE,)
+        ).fetchall()
+        conn.rollback()
+    assert runs == [(True,)]
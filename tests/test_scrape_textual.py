@@ -0,0 +1,62 @@
+"""scrape_textual: manifest states as the sequential path works through filings"""
+from datetime import date
+
+import pytest
+
+from db_setup import get_connection
+from models import Filing, PeriodType, TextualFact
+from scrape_textual import _ingest_textual_filing_type
+
+CIK, TICKER = "0009999951", "ZZST"
+FILINGS = [Filing(CIK, f"{CIK}-2{i}-000001", "x.htm", "10-K", date(2020 + i, 2, 1)) for i in (1, 2)]
+
+
+def _state(accession_number: str) -> str:
+    """a filing's ingest_state as another session sees it."""
+    with get_connection() as conn:
+        row = conn.execute(
+            "SELECT ingest_state FROM filings WHERE cik = %s AND accession_number = %s",
+            (CIK, accession_number),
+        ).fetchone()
+        conn.rollback()
+    return row[0]
+
+
+class _Parser:
+    """parses the first filing, fails the second; records what others saw meanwhile."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.seen: list[str] = []
+
+    def get_filings_to_parse(self, ticker, filing_types, max_filings):
+        return CIK, FILINGS
+
+    def parse_filing(self, filing, ticker, cik):
+        self.seen.append(_state(filing.accession_number))
+        if filing is FILINGS[1]:
+            raise ValueError("malformed filing")
+        return [TextualFact(
+            ticker=ticker, cik=cik, accession_number=filing.accession_number,
+            qname="dei:DocumentType", namespace="http://xbrl.sec.gov/dei/2024",
+            local_name="DocumentType", period_type=PeriodType.DURATION, value="10-K",
+            start_date=date(2020, 1, 1), end_date=date(2020, 12, 31),
+        )]
+
+
+@pytest.fixture
+def conn(db):
+    with get_connection() as conn:
+        conn.execute("DELETE FROM companies WHERE cik = %s", (CIK,))
+        conn.commit()
+        yield conn
+        conn.rollback()
+        conn.execute("DELETE FROM companies WHERE cik = %s", (CIK,))
+        conn.commit()
+
+
+def test_sequential_filings_show_as_parsing_while_in_flight(conn):
+    parser = _Parser(conn)
+    assert _ingest_textual_filing_type(parser, TICKER) == (1, 1)
+    assert parser.seen == ["parsing", "parsing"]
+    assert [_state(f.accession_number) for f in FILINGS] == ["stored", "failed"]
@@ -0,0 +1,115 @@
+"""screener: one-pass cross-sectional screens agree with per-company resolve()"""
+from datetime import date
+
+import pytest
+
+import query
+import screener
+from db_setup import get_connection
+from models import NumericalFact, PeriodType
+from resolved import rebuild_resolved_metrics
+from store import store_numerical_facts
+
+# cik -> (ticker, {fiscal year: (revenue, net income)})
+COMPANIES = {
+    "0009999931": ("ZZSA", {2022: (100.0, 10.0), 2023: (200.0, 30.0)}),
+    "0009999932": ("ZZSB", {2022: (50.0, 20.0), 2023: (80.0, -5.0)}),
+}
+TICKERS = [ticker for ticker, _ in COMPANIES.values()]
+METRICS = {"zz_rev": "us-gaap:Revenues", "zz_ni": "us-gaap:NetIncomeLoss"}
+FY2022, FY2023 = date(2022, 12, 31), date(2023, 12, 31)
+
+
+def _seed(conn, cik: str, ticker: str, years: dict[int, tuple[float, float]]) -> None:
+    store_numerical_facts(conn, [
+        NumericalFact(
+            ticker=ticker, cik=cik, accession_number=f"{cik}-{(year + 1) % 100}-000001",
+            taxonomy="us-gaap", fname=qname.split(":")[1], unit="USD",
+            period_type=PeriodType.DURATION, value=value,
+            start_date=date(year, 1, 1), end_date=date(year, 12, 31),
+            form="10-K", filed_date=date(year + 1, 2, 1),
+        )
+        for year, values in years.items()
+        for qname, value in zip(METRICS.values(), values)
+    ])
+    with conn.cursor() as cur:
+        cur.executemany(
+            "INSERT INTO metric_mappings (cik, metric_key, qname) VALUES (%s, %s, %s)",
+            [(cik, key, qname) for key, qname in METRICS.items()],
+        )
+
+
+def _clear(conn) -> None:
+    conn.execute("DELETE FROM companies WHERE cik = ANY(%s)", (list(COMPANIES),))
+    conn.execute("DELETE FROM metrics WHERE key = ANY(%s)", (list(METRICS),))
+    conn.commit()
+
+
+@pytest.fixture
+def conn(db):
+    with get_connection() as conn:
+        _clear(conn)
+        with conn.cursor() as cur:
+            cur.executemany(
+                "INSERT INTO metrics (key, display_name, format_type) VALUES (%s, %s, 'currency')",
+                [(key, key) for key in METRICS],
+            )
+        for cik, (ticker, years) in COMPANIES.items():
+            _seed(conn, cik, ticker, years)
+        # one company is read from its materialized series, the other live
+        rebuild_resolved_metrics(conn, "0009999932")
+        conn.commit()
+        yield conn
+        conn.rollback()
+        _clear(conn)
+
+
+def _screen(*filters: str, latest: bool = False) -> list[tuple]:
+    return screener.screen(list(METRICS), "annual", filters, tickers=TICKERS, latest=latest).rows()
+
+
+def test_screen_matches_resolve(conn):
+    expected = sorted(
+        (ticker, f.end_date, key, f.value)
+        for ticker in TICKERS
+        for key in METRICS
+        for f in query.resolve(ticker, key, "annual")
+    )
+    got = sorted(
+        (ticker, period, key, value)
+        for ticker, period, *values in _screen()
+        for key, value in zip(METRICS, values)
+    )
+    assert got == expected
+    # newest period first per ticker
+    assert [(t, p) for t, p, *_ in _screen()] == [
+        ("ZZSA", FY2023), ("ZZSA", FY2022), ("ZZSB", FY2023), ("ZZSB", FY2022),
+    ]
+
+
+def test_filters_compare_numbers_and_metrics(conn):
+    assert _screen("zz_rev > 90") == [("ZZSA", FY2023, 200.0, 30.0), ("ZZSA", FY2022, 100.0, 10.0)]
+    assert _screen("zz_ni < 0") == [("ZZSB", FY2023, 80.0, -5.0)]
+    assert _screen("zz_ni > zz_rev") == []
+    assert _screen("zz_rev >= 80", "zz_ni >= 20") == [("ZZSA", FY2023, 200.0, 30.0)]
+
+
+def test_latest_applies_before_filters(conn):
+    assert _screen(latest=True) == [("ZZSA", FY2023, 200.0, 30.0), ("ZZSB", FY2023, 80.0, -5.0)]
+    # ZZSB's older year passes, but only its latest period is considered
+    assert _screen("zz_ni > 15", latest=True) == [("ZZSA", FY2023, 200.0, 30.0)]
+
+
+def test_cli_prints_latest_rows(conn, capsys):
+    args = ["zz_rev", "--latest", "--where", "zz_rev > 90"]
+    for ticker in TICKERS:
+        args += ["-t", ticker]
+    assert screener.main(args) == 0
+    out = capsys.readouterr().out
+    assert "ZZSA\t2023-12-31\t200" in out
+    assert "\n1 row(s)" in out
+
+
+def test_unknown_metrics_are_rejected(conn):
+    with pytest.raises(ValueError, match="zz_missing"):
+        screener.screen(["zz_rev", "zz_missing"])
@@ -0,0 +1,152 @@
+"""store: numerical fact persistence against the configured database"""
+from dataclasses import replace
+from datetime import date
+
+import pytest
+
+from db_setup import get_connection
+from models import Filing, NumericalFact, NumericalFetchError, PeriodType, TextualFact
+from store import (
+    compute_textual_fact_key,
+    store_numerical_fact_stream,
+    store_numerical_facts,
+    store_numerical_facts_bulk,
+    store_textual_facts,
+    store_textual_facts_bulk,
+)
+
+CIK = "0009999903"
+
+
+def _fact(year: int) -> NumericalFact:
+    return NumericalFact(
+        ticker="ZZSC", cik=CIK, accession_number=f"{CIK}-{year % 100}-000001",
+        taxonomy="us-gaap", fname="Revenues", unit="USD", period_type=PeriodType.DURATION,
+        value=float(year), start_date=date(year, 1, 1), end_date=date(year, 12, 31),
+        form="10-K", filed_date=date(year + 1, 2, 1),
+    )
+
+
+def _truncated_stream():
+    yield _fact(2020)
+    yield _fact(2021)
+    raise NumericalFetchError("payload ended early")
+
+
+@pytest.fixture
+def conn(db):
+    with get_connection() as conn:
+        conn.execute("DELETE FROM companies WHERE cik = %s", (CIK,))
+        conn.commit()
+        yield conn
+        conn.rollback()
+        conn.execute("DELETE FROM companies WHERE cik = %s", (CIK,))
+        conn.commit()
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+def test_stream_error_rolls_back_stored_chunks(conn, bulk):
+    with pytest.raises(NumericalFetchError):
+        store_numerical_fact_stream(conn, _truncated_stream(), chunk_size=1, bulk=bulk)
+    # the sequential ingest commits after a parser error; nothing may land
+    conn.commit()
+    assert conn.execute("SELECT COUNT(*) FROM numerical WHERE cik = %s", (CIK,)).fetchone() == (0,)
+
+
+def test_stream_stores_every_chunk(conn):
+    facts = [_fact(2020), _fact(2021), _fact(2022)]
+    assert store_numerical_fact_stream(conn, iter(facts), chunk_size=2) == (3, 0)
+    assert conn.execute("SELECT COUNT(*) FROM numerical WHERE cik = %s", (CIK,)).fetchone() == (3,)
+
+
+def _restated(year: int, value: float, filed: date, accession: str) -> NumericalFact:
+    """the FY`year` revenue fact as reported by one filing."""
+    return replace(_fact(year), value=value, filed_date=filed, accession_number=accession)
+
+
+def _numerical_rows(conn) -> list[tuple]:
+    return conn.execute(
+        "SELECT concept_id, unit, period_type, start_date, end_date, accession_number, value, filed_date "
+        "FROM numerical WHERE cik = %s ORDER BY start_date, end_date",
+        (CIK,),
+    ).fetchall()
+
+
+def test_bulk_load_matches_executemany(conn):
+    # FY2020 is reported by three filings, the middle one out of order; two
+    # FY2021 filings share a filed date, so the higher accession wins
+    facts = [
+        _restated(2020, 1.0, date(2021, 2, 1), f"{CIK}-21-000001"),
+        _restated(2020, 3.0, date(2023, 2, 1), f"{CIK}-23-000001"),
+        _restated(2020, 2.0, date(2022, 2, 1), f"{CIK}-22-000001"),
+        _restated(2021, 4.0, date(2022, 2, 1), f"{CIK}-22-000002"),
+        _restated(2021, 5.0, date(2022, 2, 1), f"{CIK}-22-000003"),
+    ]
+    assert store_numerical_facts(conn, facts, batch_size=2) == (5, 0)
+    rows = _numerical_rows(conn)
+    conn.rollback()
+
+    assert store_numerical_facts_bulk(conn, facts) == (5, 0)
+    assert _numerical_rows(conn) == rows
+    assert [(r[5], r[6]) for r in rows] == [(f"{CIK}-23-000001", 3.0), (f"{CIK}-22-000003", 5.0)]
+
+
+def _textual(accession: str, value: str, dimensions: dict[str, str]) -> TextualFact:
+    return TextualFact(
+        ticker="ZZSC", cik=CIK, accession_number=accession, qname="dei:DocumentType",
+        namespace="http://xbrl.sec.gov/dei/2024", local_name="DocumentType",
+        period_type=PeriodType.DURATION, value=value,
+        start_date=date(2020, 1, 1), end_date=date(2020, 12, 31), dimensions=dimensions,
+    )
+
+
+def _textual_rows(conn) -> list[tuple]:
+    return conn.execute(
+        "SELECT fact_key, accession_number, value, dimensions FROM textual WHERE cik = %s ORDER BY fact_key",
+        (CIK,),
+    ).fetchall()
+
+
+def test_binary_copy_matches_executemany(conn):
+    filings = [Filing(CIK, f"{CIK}-2{i}-000001", "x.htm", "10-K", date(2020 + i, 2, 1)) for i in (1, 2)]
+    segment = {"srt:ProductOrServiceAxis": "us-gaap:ServiceMember"}
+    facts = [
+        _textual(f"{CIK}-22-000001", "10-K/A", {}),
+        _textual(f"{CIK}-21-000001", "10-K", {}),
+        _textual(f"{CIK}-21-000001", "services", segment),
+    ]
+    assert store_textual_facts(conn, filings, facts, batch_size=1) == (3, 0)
+    rows = _textual_rows(conn)
+    conn.rollback()
+
+    assert store_textual_facts_bulk(conn, filings, facts) == (3, 0)
+    assert _textual_rows(conn) == rows
+    # the later accession wins; dimensions round-trip as jsonb
+    assert sorted((r[2], r[3]) for r in rows) == [("10-K/A", {}), ("services", segment)]
+
+
+def test_natural_key_upserts_in_place(conn):
+    instant = replace(
+        _fact(2020), fname="Assets", period_type=PeriodType.INSTANT,
+        start_date=None, end_date=None, instant_date=date(2020, 12, 31),
+    )
+    other_unit = replace(_fact(2020), unit="EUR")
+    older = replace(_fact(2020), value=-1.0, filed_date=date(2020, 6, 1), accession_number=f"{CIK}-20-000009")
+    store_numerical_facts(conn, [_fact(2020), instant, other_unit])
+    restated = replace(instant, value=9.0, filed_date=date(2022, 2, 1), accession_number=f"{CIK}-22-000001")
+    # NULL dates are equal under NULLS NOT DISTINCT, so a restated instant fact
+    # updates its row in place; an older filing arriving late changes nothing
+    assert store_numerical_facts(conn, [restated, older]) == (2, 0)
+    rows = conn.execute(
+        "SELECT unit, period_type, value FROM numerical WHERE cik = %s ORDER BY period_type, unit",
+        (CIK,),
+    ).fetchall()
+    assert rows == [("EUR", "duration", 2020.0), ("USD", "duration", 2020.0), ("USD", "instant", 9.0)]
+
+
+def test_textual_fact_key_ignores_value_but_not_dimensions():
+    base = _textual(f"{CIK}-21-000001", "10-K", {})
+    key = compute_textual_fact_key(base)
+    assert len(key) == 16
+    assert compute_textual_fact_key(replace(base, value="10-K/A", accession_number=f"{CIK}-22-000001")) == key
+    assert compute_textual_fact_key(replace(base, dimensions={"srt:ProductOrServiceAxis": "x"})) != key
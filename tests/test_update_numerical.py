@@ -0,0 +1,54 @@
+"""update_numerical: the facts_filed_through watermark skips already-synced facts"""
+from datetime import date
+
+import pytest
+
+from db_setup import get_connection
+from models import NumericalFact, PeriodType
+from update_numerical import _load_watermark, _store_facts
+
+CIK = "0009999905"
+
+
+def _fact(year: int, value: float = 1.0) -> NumericalFact:
+    """FY`year` revenue from the 10-K filed early the next year."""
+    return NumericalFact(
+        ticker="ZZUN", cik=CIK, accession_number=f"{CIK}-{(year + 1) % 100}-000001",
+        taxonomy="us-gaap", fname="Revenues", unit="USD", period_type=PeriodType.DURATION,
+        value=value, start_date=date(year, 1, 1), end_date=date(year, 12, 31),
+        form="10-K", filed_date=date(year + 1, 2, 1),
+    )
+
+
+@pytest.fixture
+def conn(db):
+    with get_connection() as conn:
+        conn.execute("DELETE FROM companies WHERE cik = %s", (CIK,))
+        conn.commit()
+        yield conn
+        conn.rollback()
+        conn.execute("DELETE FROM companies WHERE cik = %s", (CIK,))
+        conn.commit()
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+def test_watermark_skips_facts_filed_before_it(conn, bulk):
+    assert _store_facts(conn, CIK, [_fact(2020), _fact(2021)], bulk=bulk) == (2, 0, 0)
+    conn.commit()
+    assert _load_watermark(conn, CIK) == date(2022, 2, 1)
+
+    # the next payload repeats history and adds a year; only the watermark
+    # day and later are re-sent
+    facts = [_fact(2020), _fact(2021), _fact(2022)]
+    assert _store_facts(conn, CIK, facts, bulk=bulk) == (2, 0, 1)
+    conn.commit()
+    assert _load_watermark(conn, CIK) == date(2023, 2, 1)
+
+    # a full resync ignores the watermark
+    assert _store_facts(conn, CIK, facts, bulk=bulk, full=True) == (3, 0, 0)
+
+
+def test_unsynced_company_has_no_watermark(conn):
+    assert _load_watermark(conn, CIK) is None
+    assert _store_facts(conn, CIK, [_fact(2020)], stream=True) == (1, 0, 0)
+    assert _load_watermark(conn, CIK) == date(2021, 2, 1)